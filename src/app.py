@@ -1,13 +1,37 @@
 from flask import redirect, request, url_for
 
+import cache_sync
+import fragment_cache
+import instrumentation
+import routes.api
 import routes.bibtex
+import routes.bulk
 import routes.citations
 import routes.delete
 import routes.edit
+import routes.export
+import routes.imports
 import routes.main
 import routes.search
 import routes.testing_env
-from config import app, test_env
+from config import (app, cache_listener_enabled, instrumentation_enabled, search_index_enabled,
+                    slow_query_ms, test_env)
+from etag import conditional
+from repositories import search_index_repository
+
+if instrumentation_enabled:
+    instrumentation.init_app(app, slow_query_ms)
+
+if cache_listener_enabled:
+    cache_sync.start(app)
+
+if search_index_enabled:
+    # Starts building the index in the background; the database answers meanwhile.
+    search_index_repository.refresh_search_index()
+
+    @app.before_request
+    def refresh_search_index():
+        search_index_repository.refresh_search_index()
 
 if test_env:
     @app.route("/test_env/reset_db")
@@ -27,6 +51,12 @@ if test_env:
         return routes.testing_env.json_citations()
 
 
+@app.template_global()
+def citation_row(citation):
+    """Returns the HTML of a citation in the list templates, cached per row version."""
+    return fragment_cache.render_citation_row(citation)
+
+
 @app.route("/", methods=["GET", "POST"])
 def index():
     """Renders the index page and handles new citation submissions."""
@@ -36,6 +66,7 @@ def index():
 
 
 @app.route("/citations", methods=["GET"])
+@conditional
 def citations_view():
     """Renders the citations page showing all saved citations."""
     return routes.citations.get()
@@ -55,19 +86,74 @@ def delete_citation(citation_id):
     return routes.delete.post(citation_id)
 
 
+@app.route("/citations/bulk", methods=["POST"])
+def bulk_citations():
+    """Applies a bulk delete or edit to several citations at once"""
+    return routes.bulk.post()
+
+
 @app.route("/bibtex/<int:citation_id>", methods=["GET"])
+@conditional
 def show_bibtex(citation_id):
     """Renders the bibtex page for a specific citation by its ID"""
     return routes.bibtex.get(citation_id)
 
 
+@app.route("/export", methods=["GET"])
+def export_bibtex():
+    """Streams citations matching the search queries as a BibTeX file."""
+    return routes.export.get()
+
+
+@app.route("/import", methods=["GET", "POST"])
+def import_view():
+    """Renders the import page and handles uploaded BibTeX files."""
+    if request.method == "POST":
+        return routes.imports.post()
+    return routes.imports.get()
+
+
 @app.route("/search", methods=["GET"])
 @app.route("/citations/search", methods=["GET"])
+@conditional
 def citations_search():
     """Renders the search page and handles search queries."""
     return routes.search.get()
 
 
+@app.route("/api/citations", methods=["GET"])
+@conditional
+def api_citations():
+    """Returns one page of citations as JSON or BibTeX."""
+    return routes.api.citations()
+
+
+@app.route("/api/citations/<int:citation_id>", methods=["GET"])
+@conditional
+def api_citation(citation_id):
+    """Returns a single citation as JSON or BibTeX."""
+    return routes.api.citation(citation_id)
+
+
+@app.route("/api/search", methods=["GET"])
+@conditional
+def api_search():
+    """Returns one page of search results as JSON or BibTeX."""
+    return routes.api.search()
+
+
+@app.route("/api/suggest", methods=["GET"])
+def api_suggest():
+    """Returns authors, citation keys or venues completing a prefix."""
+    return routes.api.suggest()
+
+
+@app.route("/api/stats/cache", methods=["GET"])
+def api_cache_stats():
+    """Returns the hit and miss counters of the search result cache."""
+    return routes.api.cache_stats()
+
+
 @app.route("/edit")
 @app.route("/delete")
 @app.route("/bibtex")
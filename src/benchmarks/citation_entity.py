@@ -0,0 +1,110 @@
+"""
+Benchmark for loading citations from database rows.
+
+Builds synthetic rows whose fields are JSON text, as the citation queries
+select them (`fields::text`, which psycopg2 returns as a str), and
+measures how long it takes to turn them into Citation objects with
+to_citation() and how much memory the objects hold. It then renders one
+page of the list the way the citations template does, twice, to show the
+effect of memoized rendering.
+
+Run from the src directory:
+    poetry run python -m benchmarks.citation_entity --rows 100000
+
+Reference results (Python 3.12 on one core of a cloud VM, 100k rows). The
+memory is what the citations add on top of the rows themselves.
+  - JSONB decoded by psycopg2 into a dict for every row: about
+    110 000 rows/s, 150 MB, first page rendered in 0.3 ms
+  - JSON text decoded lazily by Citation with __slots__: about
+    400 000 rows/s, 10 MB, first page rendered in 0.6 ms, again in 0.01 ms
+"""
+import argparse
+import gc
+import json
+import random
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+from benchmarks.bibtex_parser import synthetic_citation
+from repositories.citation_repository import DEFAULT_PER_PAGE, to_citation
+
+
+def synthetic_rows(count, seed=1):
+    """Returns `count` rows shaped like the result of the citation queries."""
+    rng = random.Random(seed)
+    rows = []
+    for i in range(count):
+        citation = synthetic_citation(rng, i)
+        rows.append(SimpleNamespace(
+            id=i + 1,
+            entry_type=citation.entry_type,
+            citation_key=citation.citation_key,
+            fields=json.dumps(citation.fields),
+        ))
+    return rows
+
+
+def _render_page(citations):
+    return [c.to_human_readable() for c in citations[:DEFAULT_PER_PAGE]]
+
+
+def _load(rows):
+    return [to_citation(row) for row in rows]
+
+
+def run(rows):
+    """Loads the rows and renders a page.
+
+    Returns (load seconds, bytes held by the citations, first render
+    seconds, second render seconds).
+    """
+    # The first json.loads() in a process is slow; keep it out of the timings.
+    json.loads(rows[0].fields if rows else "{}")
+
+    # Like timeit, keep the collector from running inside the timed parts.
+    gc.collect()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        citations = _load(rows)
+        load = time.perf_counter() - start
+
+        start = time.perf_counter()
+        _render_page(citations)
+        first = time.perf_counter() - start
+
+        start = time.perf_counter()
+        _render_page(citations)
+        second = time.perf_counter() - start
+    finally:
+        gc.enable()
+
+    # Memory is measured in a separate pass, as tracing slows everything down.
+    del citations
+    gc.collect()
+    tracemalloc.start()
+    citations = _load(rows)
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    return load, memory, first, second
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Benchmark loading Citation objects from rows.")
+    parser.add_argument("--rows", type=int, default=100_000)
+    args = parser.parse_args(argv)
+
+    rows = synthetic_rows(args.rows)
+    load, memory, first, second = run(rows)
+    print(
+        f"Loaded {len(rows)} citations in {load:.2f} s "
+        f"({len(rows) / load:,.0f} rows/s), holding {memory / 1e6:.1f} MB; "
+        f"rendered a page in {first * 1e3:.2f} ms, again in {second * 1e3:.2f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,313 @@
+"""
+Benchmark suite for the citation repository and rendering.
+
+Times the queries behind the list and search pages, creating and updating
+citations and the rendering methods of Citation against a synthetic
+library, and writes the results to a JSON report. Reports from two commits
+can then be compared.
+
+Run from the src directory against a local Postgres (DATABASE_URL):
+    poetry run python -m benchmarks.suite run --size 100k --reset --output before.json
+    poetry run python -m benchmarks.suite run --size 100k --output after.json
+    poetry run python -m benchmarks.suite compare before.json after.json
+
+WARNING: --reset drops and recreates every table of the configured
+database before loading a library of --size synthetic citations. Without
+it the library already in the database is used, so only run the suite
+against a database meant for benchmarking.
+
+Every benchmark runs once untimed and then --runs times; the report holds
+the minimum, median, 95th percentile and mean in milliseconds.
+"""
+import argparse
+import datetime
+import gc
+import itertools
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+from sqlalchemy import text
+
+import db_helper
+from benchmarks.synthetic_library import SIZES, generate
+from config import app, db
+from entities.citation import SUMMARY_FIELDS, Citation
+from repositories import citation_repository
+from repositories.entry_type_repository import get_entry_types
+from result_cache import search_results
+
+SEARCH_FILTERS = {
+    "none": {},
+    "q": {"q": "neural network"},
+    "citation_key": {"citation_key": "smith2020"},
+    "author": {"author": "Smith"},
+    "author_fuzzy": {"author": "Smyth", "fuzzy": True},
+    "entry_type": {"entry_type": "inproceedings"},
+    "year_range": {"year_from": 2015, "year_to": 2020},
+}
+
+SEARCH_SORTS = {
+    "default": {},
+    "year_asc": {"sort_by": "year", "direction": "asc"},
+    "year_desc": {"sort_by": "year", "direction": "desc"},
+    "citation_key_asc": {"sort_by": "citation_key", "direction": "asc"},
+    "citation_key_desc": {"sort_by": "citation_key", "direction": "desc"},
+}
+
+RENDER_SAMPLE_SIZE = 1000
+
+# Keys of the citations created by the benchmark, removed afterwards.
+_CREATED_KEY_PREFIX = "benchmark_created_"
+
+
+def summarize(samples):
+    """Returns the statistics of a list of durations in seconds, in milliseconds."""
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, round(0.95 * (len(ordered) - 1)))]
+    return {
+        "runs": len(ordered),
+        "min_ms": ordered[0] * 1e3,
+        "median_ms": statistics.median(ordered) * 1e3,
+        "p95_ms": p95 * 1e3,
+        "mean_ms": statistics.fmean(ordered) * 1e3,
+    }
+
+
+def measure(function, runs, setup=None):
+    """Times `function` `runs` times after one untimed warm-up run.
+
+    If `setup` is given, it is called untimed before each run and its
+    result is passed to `function`.
+    """
+    samples = []
+    for i in range(runs + 1):
+        args = (setup(),) if setup else ()
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            function(*args)
+            elapsed = time.perf_counter() - start
+        finally:
+            gc.enable()
+        if i:
+            samples.append(elapsed)
+    return summarize(samples)
+
+
+def load_library(size, seed):
+    """Recreates the schema and imports a synthetic library. Returns the seconds taken."""
+    db_helper.setup_db()
+    db_helper.init_db()
+
+    start = time.perf_counter()
+    result = citation_repository.import_citations(generate(size, seed))
+    elapsed = time.perf_counter() - start
+    if result["errors"]:
+        raise RuntimeError(f"{len(result['errors'])} citations could not be imported")
+
+    db.session.execute(text("ANALYZE"))
+    db.session.commit()
+    return elapsed
+
+
+def _id_range():
+    row = db.session.execute(text("SELECT min(id), max(id), count(*) FROM citations")).one()
+    if not row[2]:
+        raise RuntimeError("The database has no citations; run with --reset")
+    return row
+
+
+def bench_pages(results, runs):
+    """Times the first, a middle and the last page of the citations list."""
+    first_id, last_id, _ = _id_range()
+    per_page = citation_repository.DEFAULT_PER_PAGE
+    cursors = {
+        "first": None,
+        "middle": (first_id + last_id) // 2,
+        "last": last_id - per_page // 2,
+    }
+
+    for name, after in cursors.items():
+        results[f"get_citations_page.{name}"] = measure(
+            lambda after=after: citation_repository.get_citations_page(
+                after=after, projection=SUMMARY_FIELDS, rendered=("human_readable",)),
+            runs)
+
+
+def bench_search(results, runs, limit):
+    """Times every combination of a search filter and a sort order.
+
+    The search result cache is cleared before each run, so the queries
+    themselves are timed.
+    """
+    for (filter_name, filters), (sort_name, sort) in itertools.product(
+            SEARCH_FILTERS.items(), SEARCH_SORTS.items()):
+        queries = {**filters, **sort}
+        results[f"search_citations.{filter_name}.{sort_name}"] = measure(
+            lambda _, queries=queries: citation_repository.search_citations(
+                queries, projection=SUMMARY_FIELDS, rendered=("human_readable",),
+                limit=limit),
+            runs, setup=search_results.clear)
+
+
+def bench_writes(results, runs, seed):
+    """Times creating citations and full and partial updates of one citation."""
+    entry_type_id = next(et.id for et in get_entry_types() if et.name == "article")
+    sample = next(generate(1, seed))
+    keys = itertools.count()
+
+    try:
+        results["create_citation"] = measure(
+            lambda: citation_repository.create_citation(
+                entry_type_id, f"{_CREATED_KEY_PREFIX}{next(keys)}", sample.fields),
+            runs)
+    finally:
+        db.session.execute(
+            text("DELETE FROM citations WHERE starts_with(citation_key, :prefix)"),
+            {"prefix": _CREATED_KEY_PREFIX})
+        db.session.commit()
+
+    first_id, last_id, _ = _id_range()
+    citation = citation_repository.get_citation((first_id + last_id) // 2)
+    full_type_id = next(
+        et.id for et in get_entry_types() if et.name == citation.entry_type)
+
+    results["update_citation.full"] = measure(
+        lambda: citation_repository.update_citation(
+            citation.id, full_type_id, citation.citation_key, citation.fields),
+        runs)
+    results["update_citation.fields"] = measure(
+        lambda: citation_repository.update_citation(
+            citation.id, fields=citation.fields),
+        runs)
+
+
+def bench_rendering(results, runs, seed):
+    """Times each rendering method of Citation on fresh, unrendered citations."""
+    sample = list(generate(RENDER_SAMPLE_SIZE, seed))
+
+    def _fresh():
+        return [Citation(c.id, c.entry_type, c.citation_key, c.fields) for c in sample]
+
+    for method in ("to_bibtex", "to_human_readable", "to_compact"):
+        results[f"Citation.{method}.x{RENDER_SAMPLE_SIZE}"] = measure(
+            lambda citations, method=method: [getattr(c, method)() for c in citations],
+            runs, setup=_fresh)
+
+
+def _git(*args):
+    try:
+        return subprocess.run(
+            ("git", *args), capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _meta(args, rows, load_seconds):
+    status = _git("status", "--porcelain", "--untracked-files=no")
+    return {
+        "commit": _git("rev-parse", "HEAD"),
+        "dirty": bool(status) if status is not None else None,
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "size": args.size,
+        "rows": rows,
+        "seed": args.seed,
+        "runs": args.runs,
+        "search_limit": args.search_limit,
+        "load_seconds": load_seconds,
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "postgres": db.session.execute(text("SHOW server_version")).scalar(),
+    }
+
+
+def run(args):
+    """Runs every benchmark and returns the report."""
+    with app.app_context():
+        load_seconds = load_library(SIZES[args.size], args.seed) if args.reset else None
+        rows = _id_range()[2]
+
+        results = {}
+        bench_pages(results, args.runs)
+        bench_search(results, args.runs, args.search_limit)
+        bench_writes(results, args.runs, args.seed)
+        bench_rendering(results, args.runs, args.seed)
+
+        return {"meta": _meta(args, rows, load_seconds), "results": results}
+
+
+def compare(old, new, threshold=0.1):
+    """Returns the lines of a table comparing the median timings of two reports.
+
+    Changes larger than `threshold` (a fraction) are marked as faster or slower.
+    """
+    lines = [
+        f"old: {old['meta'].get('commit')} ({old['meta'].get('rows')} rows)",
+        f"new: {new['meta'].get('commit')} ({new['meta'].get('rows')} rows)",
+        f"{'benchmark':<50} {'old ms':>10} {'new ms':>10} {'change':>8}",
+    ]
+    for name in sorted(old["results"].keys() | new["results"].keys()):
+        before = old["results"].get(name, {}).get("median_ms")
+        after = new["results"].get(name, {}).get("median_ms")
+        if before is None or after is None:
+            status = "new" if before is None else "removed"
+            lines.append(f"{name:<50} {before or '-':>10} {after or '-':>10} {status:>8}")
+            continue
+
+        change = (after - before) / before if before else 0.0
+        mark = ""
+        if change > threshold:
+            mark = " slower"
+        elif change < -threshold:
+            mark = " faster"
+        lines.append(f"{name:<50} {before:>10.2f} {after:>10.2f} {change:>+8.1%}{mark}")
+    return lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the citation repository.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run the benchmarks and write a report")
+    run_parser.add_argument("--size", choices=SIZES, default="100k")
+    run_parser.add_argument("--seed", type=int, default=1)
+    run_parser.add_argument("--runs", type=int, default=10)
+    run_parser.add_argument(
+        "--search-limit", type=int, default=citation_repository.DEFAULT_PER_PAGE + 1,
+        help="search results fetched; by default one page and one more to find the next "
+             "page, like the search page; 0 fetches all")
+    run_parser.add_argument(
+        "--reset", action="store_true",
+        help="drop all tables and load a new synthetic library first")
+    run_parser.add_argument("--output", default="benchmark.json")
+
+    compare_parser = commands.add_parser("compare", help="compare two reports")
+    compare_parser.add_argument("old")
+    compare_parser.add_argument("new")
+    compare_parser.add_argument(
+        "--threshold", type=float, default=0.1,
+        help="relative change of the median reported as faster or slower")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "compare":
+        with open(args.old, encoding="utf-8") as f:
+            old = json.load(f)
+        with open(args.new, encoding="utf-8") as f:
+            new = json.load(f)
+        print("\n".join(compare(old, new, args.threshold)))
+        return
+
+    report = run(args)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {len(report['results'])} results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
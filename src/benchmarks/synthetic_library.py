@@ -0,0 +1,182 @@
+"""
+Seeded generator of synthetic citation libraries.
+
+Citations follow rough real-world distributions: most entries are journal
+articles and conference papers, each entry type has its own set of required
+and optional fields, years are skewed towards recent ones and a few author
+surnames are much more common than others. The same seed always gives the
+same library, so results can be compared between runs.
+"""
+import random
+
+from entities.citation import Citation
+
+SIZES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+
+_WORDS = (
+    "analysis learning systems distributed data model theory network efficient "
+    "method approach survey graph neural algorithm evaluation robust scalable "
+    "query language semantic optimal adaptive parallel secure privacy inference "
+    "estimation control dynamic sparse deep reinforcement retrieval index storage "
+    "transaction compiler verification protocol wireless energy vision speech"
+).split()
+
+_SURNAMES = (
+    "Smith Johnson Williams Brown Jones Garcia Miller Davis Wang Li Zhang Chen "
+    "Liu Kumar Singh Müller Schmidt Virtanen Korhonen Nieminen Tanaka Suzuki "
+    "Kim Lee Park Nguyen Rossi Russo Dubois Martin Silva Santos Novak Kowalski"
+).split()
+
+_GIVEN_INITIALS = "ABCDEFGHIJKLMNOPRSTVW"
+
+_VENUES = (
+    "Information Systems", "Machine Learning Research", "Database Theory",
+    "Computer Networks", "Software Engineering", "Artificial Intelligence",
+    "Computational Linguistics", "Distributed Computing", "Data Engineering",
+)
+
+_PUBLISHERS = ("ACM Press", "Springer", "IEEE", "Elsevier", "MIT Press", "O'Reilly")
+
+_INSTITUTIONS = (
+    "University of Helsinki", "Aalto University", "ETH Zurich", "MIT",
+    "Stanford University", "University of Tokyo", "TU Munich",
+)
+
+# (entry type, weight)
+_ENTRY_TYPES = (
+    ("article", 45), ("inproceedings", 25), ("book", 10), ("incollection", 4),
+    ("misc", 6), ("online", 3), ("phdthesis", 3), ("techreport", 4),
+)
+
+
+def _sentence(rng, low, high):
+    return " ".join(rng.choice(_WORDS) for _ in range(rng.randint(low, high)))
+
+
+# Zipf distribution: the first surnames in the list are the most common ones.
+_SURNAME_WEIGHTS = tuple(1 / rank for rank in range(1, len(_SURNAMES) + 1))
+
+
+def _surname(rng):
+    return rng.choices(_SURNAMES, _SURNAME_WEIGHTS)[0]
+
+
+def _authors(rng, low, high):
+    return " and ".join(
+        f"{_surname(rng)}, {rng.choice(_GIVEN_INITIALS)}."
+        for _ in range(rng.randint(low, high))
+    )
+
+
+def _year(rng):
+    return max(1950, 2025 - int(rng.expovariate(1 / 12)))
+
+
+def _pages(rng):
+    start = rng.randint(1, 900)
+    return f"{start}--{start + rng.randint(4, 30)}"
+
+
+def _doi(rng):
+    return f"10.{rng.randint(1000, 9999)}/{rng.getrandbits(32):x}"
+
+
+def _date(rng):
+    return f"{_year(rng)}-{rng.randint(1, 12):02}-{rng.randint(1, 28):02}"
+
+
+def _maybe(rng, fields, name, probability, value):
+    if rng.random() < probability:
+        fields[name] = value()
+
+
+def _article(rng, fields):
+    fields["journaltitle"] = "Journal of " + rng.choice(_VENUES)
+    _maybe(rng, fields, "volume", 0.8, lambda: str(rng.randint(1, 80)))
+    _maybe(rng, fields, "number", 0.6, lambda: str(rng.randint(1, 12)))
+    _maybe(rng, fields, "pages", 0.85, lambda: _pages(rng))
+    _maybe(rng, fields, "doi", 0.7, lambda: _doi(rng))
+
+
+def _inproceedings(rng, fields):
+    fields["booktitle"] = "Proceedings of the Conference on " + rng.choice(_VENUES)
+    _maybe(rng, fields, "pages", 0.7, lambda: _pages(rng))
+    _maybe(rng, fields, "publisher", 0.4, lambda: rng.choice(_PUBLISHERS))
+    _maybe(rng, fields, "doi", 0.6, lambda: _doi(rng))
+
+
+def _book(rng, fields):
+    fields["publisher"] = rng.choice(_PUBLISHERS)
+    _maybe(rng, fields, "location", 0.6, lambda: rng.choice(("New York", "Berlin", "London")))
+    _maybe(rng, fields, "isbn", 0.7,
+           lambda: f"978-{rng.randint(0, 9)}-{rng.randint(10000, 99999)}")
+    _maybe(rng, fields, "edition", 0.2, lambda: str(rng.randint(2, 5)))
+
+
+def _incollection(rng, fields):
+    fields["booktitle"] = "Handbook of " + rng.choice(_VENUES)
+    fields["publisher"] = rng.choice(_PUBLISHERS)
+    _maybe(rng, fields, "editor", 0.8, lambda: _authors(rng, 1, 3))
+    _maybe(rng, fields, "pages", 0.8, lambda: _pages(rng))
+
+
+def _online(rng, fields):
+    fields["url"] = f"https://example.org/{rng.getrandbits(40):x}"
+    _maybe(rng, fields, "urldate", 0.7, lambda: _date(rng))
+
+
+def _misc(rng, fields):
+    _maybe(rng, fields, "howpublished", 0.5, lambda: "Preprint")
+    _maybe(rng, fields, "url", 0.6,
+           lambda: f"https://arxiv.org/abs/{rng.randint(1000, 2500)}.{rng.randint(10000, 99999)}")
+
+
+def _phdthesis(rng, fields):
+    fields["institution"] = rng.choice(_INSTITUTIONS)
+    fields["type"] = "PhD thesis"
+
+
+def _techreport(rng, fields):
+    fields["institution"] = rng.choice(_INSTITUTIONS)
+    _maybe(rng, fields, "number", 0.9, lambda: f"TR-{rng.randint(1, 999)}")
+
+
+_FIELDS_BY_TYPE = {
+    "article": _article, "inproceedings": _inproceedings, "book": _book,
+    "incollection": _incollection, "online": _online, "misc": _misc,
+    "phdthesis": _phdthesis, "techreport": _techreport,
+}
+
+
+def synthetic_citation(rng, index):
+    """Returns a citation with fields typical of a randomly chosen entry type."""
+    names, weights = zip(*_ENTRY_TYPES)
+    entry_type = rng.choices(names, weights)[0]
+    year = _year(rng)
+
+    fields = {
+        "title": _sentence(rng, 3, 12).capitalize(),
+        "year": str(year),
+    }
+    if entry_type in ("misc", "online"):
+        _maybe(rng, fields, "author", 0.7, lambda: _authors(rng, 1, 3))
+    else:
+        fields["author"] = _authors(rng, 1, 8 if entry_type == "article" else 4)
+
+    _FIELDS_BY_TYPE[entry_type](rng, fields)
+
+    _maybe(rng, fields, "abstract", 0.5 if entry_type == "article" else 0.2,
+           lambda: _sentence(rng, 80, 250).capitalize() + ".")
+    _maybe(rng, fields, "keywords", 0.3, lambda: ", ".join(rng.sample(_WORDS, 4)))
+    _maybe(rng, fields, "note", 0.05, lambda: _sentence(rng, 3, 10))
+
+    first_author = fields.get("author", "anon").split(",")[0].lower()
+    citation_key = f"{first_author}{year}_{index}"
+    return Citation(None, entry_type, citation_key, fields)
+
+
+def generate(count, seed=1):
+    """Yields `count` synthetic citations; the same seed gives the same library."""
+    rng = random.Random(seed)
+    for index in range(count):
+        yield synthetic_citation(rng, index)
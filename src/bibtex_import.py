@@ -0,0 +1,72 @@
+import argparse
+import os
+
+from config import app
+from entities.bibtex_parallel import parse_bibtex_file
+from entities.bibtex_parser import parse_bibtex
+from repositories.citation_repository import IMPORT_BATCH_SIZE, import_citations
+
+
+def _import(citations, parse_errors, batch_size):
+    """Imports parsed citations and merges parse errors into the result."""
+    result = import_citations(citations, batch_size=batch_size)
+
+    result["errors"] = [
+        {"citation_key": e.citation_key, "error": str(e)}
+        for e in parse_errors
+    ] + result["errors"]
+
+    return result
+
+
+def import_bibtex(source, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Parses BibTeX from a string or text file-like object and imports its
+    entries into the database. File-like objects are parsed incrementally.
+    Returns a dict with the number of imported citations and a list of
+    errors from both parsing and importing.
+    """
+    parse_errors = []
+    citations = parse_bibtex(source, errors=parse_errors)
+    return _import(citations, parse_errors, batch_size)
+
+
+def import_bibtex_file(path, batch_size=IMPORT_BATCH_SIZE, workers=None):
+    """
+    Parses a .bib file with `workers` processes (all CPU cores by default)
+    and imports its entries into the database. Returns the same result as
+    import_bibtex().
+    """
+    parse_errors = []
+    citations = parse_bibtex_file(path, errors=parse_errors, workers=workers)
+    return _import(citations, parse_errors, batch_size)
+
+
+def main(argv=None):
+    """Command line entry point for importing a .bib file."""
+    parser = argparse.ArgumentParser(
+        description="Import citations from a BibTeX file.")
+    parser.add_argument("path", help="path to the .bib file")
+    parser.add_argument(
+        "--batch-size", type=int, default=IMPORT_BATCH_SIZE,
+        help=f"citations per INSERT statement (default: {IMPORT_BATCH_SIZE})")
+    parser.add_argument(
+        "--workers", type=int, default=os.cpu_count(),
+        help="parser processes, 1 parses sequentially (default: all CPU cores)")
+    args = parser.parse_args(argv)
+
+    with app.app_context():
+        result = import_bibtex_file(
+            args.path, batch_size=args.batch_size, workers=args.workers)
+
+    for error in result["errors"]:
+        print(f"{error['citation_key'] or '?'}: {error['error']}")
+
+    print(
+        f"Imported {result['imported']} citation(s), "
+        f"{len(result['errors'])} error(s)"
+    )
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
@@ -0,0 +1,160 @@
+import json
+import select
+import threading
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from config import db
+from fragment_cache import citation_rows
+from repositories import entry_fields_repository, entry_type_repository
+from result_cache import search_results
+from search_index import library_index
+from suggestions import suggestion_index
+
+# Channel of the notifications sent by notify_library_change() in schema.sql
+CHANNEL = "library_changes"
+
+# How often the listener checks whether it should stop, and how long it
+# waits before reconnecting after losing its connection.
+POLL_SECONDS = 5
+RECONNECT_SECONDS = 5
+
+# The listener of this process, once started, see ensure_started()
+_listener = {}
+_start_lock = threading.Lock()
+
+
+def invalidate_all():
+    """Drops everything cached locally, e.g. when notifications may have been missed."""
+    entry_type_repository.invalidate_cache()
+    entry_fields_repository.invalidate_cache()
+    citation_rows.clear()
+    search_results.clear_local()
+    library_index.invalidate()
+    suggestion_index.invalidate()
+
+
+def handle_notification(payload):
+    """Evicts the cache entries affected by one change notification."""
+    try:
+        change = json.loads(payload)
+        table = change["table"]
+        ids = change.get("ids")
+    except (ValueError, TypeError, KeyError):
+        invalidate_all()
+        return
+
+    if table == "citations":
+        if ids is None:
+            citation_rows.clear()
+        else:
+            citation_rows.invalidate(ids)
+        search_results.clear_local()
+        library_index.invalidate(ids)
+        suggestion_index.invalidate(ids)
+    elif table == "entry_types":
+        # Rows show the entry type name, and searches filter by it.
+        entry_type_repository.invalidate_cache()
+        citation_rows.clear()
+        search_results.clear_local()
+        library_index.invalidate()
+    elif table == "default_entry_fields":
+        entry_fields_repository.invalidate_cache()
+
+
+class CacheListener(threading.Thread):
+    """
+    A daemon thread that keeps the caches of this process in sync with
+    writes made by other processes. Database triggers send a notification
+    for every statement that changes citations, entry types or default entry
+    fields; the thread listens for them on its own connection and evicts
+    the changed entries. After (re)connecting it drops all local caches,
+    since notifications sent while it was not listening are lost.
+    """
+
+    def __init__(self, engine):
+        super().__init__(name="cache-listener", daemon=True)
+        self.engine = engine
+        self.stopped = threading.Event()
+        self.listening = threading.Event()
+
+    def _errors(self):
+        return (OSError, SQLAlchemyError, self.engine.dialect.loaded_dbapi.Error)
+
+    def _connect(self):
+        # The connection is detached from the pool, as it stays in LISTEN mode.
+        connection = self.engine.raw_connection()
+        connection.detach()
+        connection.driver_connection.autocommit = True
+        with connection.driver_connection.cursor() as cursor:
+            cursor.execute(f"LISTEN {CHANNEL}")
+        return connection
+
+    def listen(self, connection):
+        """Handles notifications until the listener is stopped."""
+        driver_connection = connection.driver_connection
+        while not self.stopped.is_set():
+            readable, _, _ = select.select([driver_connection], [], [], POLL_SECONDS)
+            if not readable:
+                continue
+            driver_connection.poll()
+            while driver_connection.notifies:
+                handle_notification(driver_connection.notifies.pop(0).payload)
+
+    def run(self):
+        while not self.stopped.is_set():
+            try:
+                connection = self._connect()
+            except self._errors():
+                self.stopped.wait(RECONNECT_SECONDS)
+                continue
+
+            try:
+                invalidate_all()
+                self.listening.set()
+                self.listen(connection)
+            except self._errors():
+                self.stopped.wait(RECONNECT_SECONDS)
+            finally:
+                try:
+                    connection.close()
+                except self._errors():
+                    pass
+
+    def stop(self):
+        self.stopped.set()
+
+
+def start(app, wait=True):
+    """Starts the listener of `app`. Each worker process needs its own.
+
+    With `wait`, waits a moment for the listener to connect, so that caches
+    filled after this returns miss no notifications.
+    """
+    with app.app_context():
+        listener = CacheListener(db.engine)
+    listener.start()
+    _listener["thread"] = listener
+    if wait:
+        listener.listening.wait(RECONNECT_SECONDS)
+    return listener
+
+
+def ensure_started(app):
+    """Starts the listener of `app` unless this process already runs one.
+
+    For in-memory data that is always kept, such as the suggestions, which
+    would otherwise never see the writes of other processes. Unlike start()
+    at startup, this is meant to be called lazily from a worker, so it
+    works with gunicorn --preload as well. It is called on the request path,
+    so it does not wait for the listener to connect; the listener drops the
+    local caches, the suggestions included, once it has connected.
+    """
+    listener = _listener.get("thread")
+    if listener is not None and listener.is_alive():
+        return listener
+    with _start_lock:
+        listener = _listener.get("thread")
+        if listener is None or not listener.is_alive():
+            listener = start(app, wait=False)
+        return listener
@@ -9,6 +9,31 @@ load_dotenv()
 test_env = getenv("TEST_ENV") == "true"
 print(f"Test environment: {test_env}")
 
+# Memory cap of the per-process cache of rendered citation rows
+fragment_cache_max_bytes = int(getenv("FRAGMENT_CACHE_MAX_BYTES") or 16 * 1024 * 1024)
+
+# Per-request SQL and template timings in a Server-Timing header and the log
+instrumentation_enabled = getenv("INSTRUMENTATION") == "true"
+# Statements taking at least this many milliseconds are logged as slow queries
+slow_query_ms = float(getenv("SLOW_QUERY_MS") or 100)
+
+# Search results are counted exactly up to this many; above it the count is estimated
+search_exact_count_limit = int(getenv("SEARCH_EXACT_COUNT_LIMIT") or 10_000)
+
+# Cache of search results: "memory" (per process, default), "file" (shared by the
+# worker processes through SEARCH_CACHE_DIR) or "none"
+search_cache_backend = getenv("SEARCH_CACHE_BACKEND") or "memory"
+search_cache_dir = getenv("SEARCH_CACHE_DIR")
+search_cache_ttl = float(getenv("SEARCH_CACHE_TTL") or 300)
+search_cache_max_entries = int(getenv("SEARCH_CACHE_MAX_ENTRIES") or 1024)
+
+# Answer searches from an in-memory index of the library instead of the database
+search_index_enabled = getenv("SEARCH_INDEX") == "true"
+
+# Listen for changes made by other processes and evict them from the local caches.
+# The search index relies on it to see those changes, so it turns it on too.
+cache_listener_enabled = getenv("CACHE_LISTENER") == "true" or search_index_enabled
+
 app = Flask(__name__)
 app.secret_key = getenv("SECRET_KEY")
 app.config["SQLALCHEMY_DATABASE_URI"] = getenv("DATABASE_URL")
@@ -1,9 +1,15 @@
+import argparse
 import os
 import re
 
 from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
 
 from config import app, db
+from repositories import citation_repository, entry_fields_repository, entry_type_repository
+from result_cache import search_results
+from search_index import library_index
+from suggestions import suggestion_index
 
 _IDENTIFIER_RE = re.compile(r"^\w*$")
 
@@ -15,6 +21,15 @@ def _validate_identifier(name):
     return name
 
 
+def invalidate_caches():
+    """Drops process-local caches of data loaded from the database."""
+    entry_type_repository.invalidate_cache()
+    entry_fields_repository.invalidate_cache()
+    search_results.clear()
+    library_index.invalidate()
+    suggestion_index.invalidate()
+
+
 def reset_db():
     """
     Clears all contents from all tables in the database.
@@ -35,6 +50,7 @@ def reset_db():
         sql = text(f"TRUNCATE TABLE {safe_table} CASCADE")
         db.session.execute(sql)
     db.session.commit()
+    invalidate_caches()
 
     print(f"Cleared database contents. Tables: {", ".join(tables_in_db)}")
 
@@ -88,10 +104,41 @@ def setup_db():
     sql = text(schema_sql)
     db.session.execute(sql)
     db.session.commit()
+    invalidate_caches()
 
     tables_in_db = tables()
     print(f"Created database from schema: {", ".join(tables_in_db)}")
 
+    setup_trigram_indexes()
+
+
+def setup_trigram_indexes():
+    """
+    Enables the pg_trgm extension and creates trigram indexes used by
+    the substring and fuzzy filters on citation key and author.
+    The fuzzy filters need the extension, so a failure (creating an
+    extension may require extra privileges) is reported and re-raised
+    rather than leaving a database on which fuzzy search errors.
+    """
+    statements = [
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+        "CREATE INDEX IF NOT EXISTS citations_citation_key_trgm "
+        "ON citations USING GIN (citation_key gin_trgm_ops)",
+        "CREATE INDEX IF NOT EXISTS citations_author_trgm "
+        "ON citations USING GIN ((fields->>'author') gin_trgm_ops)",
+    ]
+
+    try:
+        for statement in statements:
+            db.session.execute(text(statement))
+        db.session.commit()
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        print(f"Could not create trigram indexes: {e}")
+        raise
+
+    print("Created trigram indexes")
+
 
 def init_db():
     """Initialize the database with initial data."""
@@ -118,11 +165,40 @@ def init_db():
     sql = text(initial_data_sql)
     db.session.execute(sql)
     db.session.commit()
+    invalidate_caches()
 
     print("Initialized database with initial data")
 
 
-if __name__ == "__main__":  # pragma: no cover
+def backfill_renders(refresh_all=False):
+    """
+    Stores the rendered forms of citations that have none, e.g. after bulk
+    edits or for citations created before renders were stored.
+    With refresh_all every citation is rendered again.
+    """
+    print("Rendering citations")
+    count = citation_repository.backfill_renders(refresh_all=refresh_all)
+    print(f"Rendered {count} citations")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the database.")
+    parser.add_argument(
+        "command", nargs="?", default="setup", choices=("setup", "backfill-renders"),
+        help="create and initialize the database (default), "
+             "or store missing rendered citations")
+    parser.add_argument(
+        "--all", action="store_true",
+        help="with backfill-renders, render every citation again")
+    args = parser.parse_args(argv)
+
     with app.app_context():
-        setup_db()
-        init_db()
+        if args.command == "backfill-renders":
+            backfill_renders(refresh_all=args.all)
+        else:
+            setup_db()
+            init_db()
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
@@ -0,0 +1,157 @@
+import mmap
+import os
+import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from entities.bibtex_parser import (MONTH_MACROS, BibtexParseError, parse_bibtex,
+                                    parse_string_definition)
+
+# Upper bound for the size of one parsing task, so that a worker never
+# decodes more than about this many bytes of the file at once.
+RANGE_SIZE = 8 * 1024 * 1024
+
+_COUNT_STEP = 16 * 1024 * 1024
+_ENTRY_LINE_RE = re.compile(rb"\n[ \t]*@[ \t]*[A-Za-z]+[ \t]*[{(]")
+_STRING_START_RE = re.compile(rb"@[ \t]*string[ \t]*[{(]", re.IGNORECASE)
+_STRING_WINDOW = 4096
+
+
+def _count(data, start, end):
+    """Returns (brace balance, newline count) of data[start:end]."""
+    balance = newlines = 0
+    for i in range(start, end, _COUNT_STEP):
+        piece = data[i:min(i + _COUNT_STEP, end)]
+        balance += piece.count(b"{") - piece.count(b"}")
+        newlines += piece.count(b"\n")
+    return balance, newlines
+
+
+def _split_ranges(data, parts):
+    """
+    Splits the file contents into about `parts` byte ranges that each start
+    at a top-level @entry. A line starting an entry is only used as a split
+    point if every brace before it is closed, which is checked by counting
+    braces rather than parsing. Returns a list of (start, end, first_line).
+    """
+    size = len(data)
+    points = [(0, 1)]
+    depth = 0
+    line = 1
+    counted = 0
+
+    for target in (size * i // parts for i in range(1, parts)):
+        pos = max(target, points[-1][0])
+        while True:
+            match = _ENTRY_LINE_RE.search(data, pos)
+            if not match:
+                break
+
+            start = match.start() + 1
+            balance, newlines = _count(data, counted, start)
+            depth += balance
+            line += newlines
+            counted = start
+
+            if depth == 0:
+                points.append((start, line))
+                break
+            pos = match.end()
+
+    bounds = [p[0] for p in points[1:]] + [size]
+    return [(start, end, first_line)
+            for (start, first_line), end in zip(points, bounds)]
+
+
+def _collect_macros(data, macros):
+    """Parses every @string definition in the file into `macros`."""
+    for match in _STRING_START_RE.finditer(data):
+        window = _STRING_WINDOW
+        while True:
+            end = min(match.start() + window, len(data))
+            text = data[match.start():end].decode("utf-8", errors="replace")
+            try:
+                if parse_string_definition(text, macros) or end == len(data):
+                    break
+            except ValueError:
+                # Reported by the worker that parses this range.
+                break
+            window *= 4
+
+    return macros
+
+
+def _parse_range(task):
+    """Parses one byte range of the file in a worker process.
+
+    Returns the citations and errors of the range in the order they occur.
+    """
+    path, start, end, first_line, macros = task
+
+    with open(path, "rb") as f:
+        f.seek(start)
+        text = f.read(end - start).decode("utf-8")
+
+    # Errors are appended by the parser as they occur, citations as they
+    # are yielded, so the list keeps their relative order.
+    items = []
+    for citation in parse_bibtex(text, errors=items, macros=macros, first_line=first_line):
+        items.append(citation)
+    return items
+
+
+def _emit(items, errors):
+    for item in items:
+        if isinstance(item, BibtexParseError):
+            if errors is None:
+                raise item
+            errors.append(item)
+        else:
+            yield item
+
+
+def parse_bibtex_file(path, errors=None, macros=None, workers=None, range_size=RANGE_SIZE):
+    """Parses a .bib file using several processes and yields its citations in file order.
+
+    The file is split into byte ranges at top-level @entries and the ranges
+    are parsed in a ProcessPoolExecutor with `workers` processes (all CPU
+    cores by default). All @string macros of the file are collected first
+    and sent to every worker, so a macro is also expanded in entries that
+    come before its definition. `errors` and `macros` behave as in
+    parse_bibtex(). With a single worker the file is parsed sequentially.
+    """
+    workers = workers or os.cpu_count() or 1
+    if macros is None:
+        macros = dict(MONTH_MACROS)
+
+    if workers <= 1:
+        with open(path, "r", encoding="utf-8") as f:
+            yield from parse_bibtex(f, errors=errors, macros=macros)
+        return
+
+    if os.path.getsize(path) == 0:
+        return
+
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            _collect_macros(data, macros)
+            parts = max(workers, -(-len(data) // range_size))
+            ranges = _split_ranges(data, parts)
+
+    tasks = ((path, start, end, first_line, macros)
+             for start, end, first_line in ranges)
+
+    executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        # Only a bounded number of ranges is in flight, so results do not
+        # pile up in memory when the consumer is slower than the workers.
+        pending = deque()
+        for task in tasks:
+            pending.append(executor.submit(_parse_range, task))
+            if len(pending) >= workers * 2:
+                yield from _emit(pending.popleft().result(), errors)
+
+        while pending:
+            yield from _emit(pending.popleft().result(), errors)
+    finally:
+        executor.shutdown(cancel_futures=True)
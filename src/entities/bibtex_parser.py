@@ -0,0 +1,317 @@
+import io
+import re
+
+from entities.citation import Citation
+
+CHUNK_SIZE = 64 * 1024
+
+# Month abbreviations are predefined macros in the standard BibTeX styles.
+MONTH_MACROS = {
+    "jan": "January", "feb": "February", "mar": "March",
+    "apr": "April", "may": "May", "jun": "June",
+    "jul": "July", "aug": "August", "sep": "September",
+    "oct": "October", "nov": "November", "dec": "December",
+}
+
+_ENTRY_START_RE = re.compile(r"@\s*([A-Za-z]+)\s*([{(])")
+# Everything an entry start can begin with, used to detect a start split across chunks.
+_PARTIAL_START_RE = re.compile(r"@\s*[A-Za-z]*\s*")
+_BRACES_RE = re.compile(r"[{}]")
+_BRACES_OR_PAREN_RE = re.compile(r"[{})]")
+_QUOTED_RE = re.compile(r'[{}"]')
+_FIELD_NAME_RE = re.compile(r"([A-Za-z][\w:.+/-]*)\s*=\s*")
+_MACRO_NAME_RE = re.compile(r"[A-Za-z][\w:.+/-]*")
+_NUMBER_RE = re.compile(r"\d+")
+_SPACE_RE = re.compile(r"\s*")
+_SEPARATOR_RE = re.compile(r"[\s,]*")
+
+_SKIPPED_ENTRY_TYPES = ("comment", "preamble")
+
+
+class BibtexParseError(ValueError):
+    """Raised when a BibTeX entry cannot be parsed."""
+
+    def __init__(self, message, line=None, citation_key=None):
+        self.message = message
+        self.line = line
+        self.citation_key = citation_key
+        location = f"Line {line}: " if line else ""
+        super().__init__(f"{location}{message}")
+
+    def __reduce__(self):
+        # Keeps line and key when errors are sent back from worker processes.
+        return self.__class__, (self.message, self.line, self.citation_key)
+
+
+class _EntryReader:  # pylint: disable=R0903
+    """
+    Splits a character stream into top-level @entries, reading it in chunks.
+    Only the unconsumed part of the current chunk and the entry being
+    scanned are kept in memory.
+    """
+
+    def __init__(self, stream, chunk_size=CHUNK_SIZE, first_line=1):
+        self._stream = stream
+        self._chunk_size = chunk_size
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+        self.line = first_line
+
+    def _fill(self):
+        """
+        Reads the next chunk and drops the consumed part of the buffer.
+        Returns how far buffer indices shifted, or None at the end of input.
+        """
+        if self._eof:
+            return None
+
+        chunk = self._stream.read(self._chunk_size)
+        if not chunk:
+            self._eof = True
+            return None
+
+        shift = self._pos
+        self._buffer = self._buffer[self._pos:] + chunk
+        self._pos = 0
+        return shift
+
+    def _advance(self, new_pos):
+        self.line += self._buffer.count("\n", self._pos, new_pos)
+        self._pos = new_pos
+
+    def _find_start(self):
+        """Returns the match of the next entry start, or None at the end of input."""
+        while True:
+            at = self._buffer.find("@", self._pos)
+            if at < 0:
+                self._advance(len(self._buffer))
+                if self._fill() is None:
+                    return None
+                continue
+
+            match = _ENTRY_START_RE.match(self._buffer, at)
+            if match:
+                self._advance(at)
+                return match
+
+            partial = _PARTIAL_START_RE.match(self._buffer, at)
+            if partial.end() == len(self._buffer) and not self._eof:
+                self._advance(at)
+                self._fill()
+                continue
+
+            # A stray "@" outside of an entry
+            self._advance(at + 1)
+
+    def _find_end(self, match):
+        """
+        Returns the (start, end) span of the entry body, reading more input
+        as needed, or None if the input ends before the entry does.
+        Braces nest; a closing parenthesis only counts outside of braces.
+        """
+        opening = match.group(2)
+        pattern = _BRACES_RE if opening == "{" else _BRACES_OR_PAREN_RE
+        depth = 1 if opening == "{" else 0
+        body_start = scan = match.end()
+
+        while True:
+            for delimiter in pattern.finditer(self._buffer, scan):
+                char = delimiter.group()
+                if char == "{":
+                    depth += 1
+                elif char == "}":
+                    depth -= 1
+                    if depth == 0 and opening == "{":
+                        return body_start, delimiter.start()
+                elif depth == 0:
+                    return body_start, delimiter.start()
+
+            scanned = len(self._buffer)
+            shift = self._fill()
+            if shift is None:
+                return None
+            scan = scanned - shift
+            body_start -= shift
+
+    def __iter__(self):
+        """
+        Yields (line, entry_type, body) for each entry. For an entry that is
+        still open at the end of input, body is None and iteration stops.
+        """
+        while True:
+            match = self._find_start()
+            if not match:
+                return
+
+            line = self.line
+            entry_type = match.group(1).lower()
+            span = self._find_end(match)
+
+            if span is None:
+                yield line, entry_type, None
+                return
+
+            body = self._buffer[span[0]:span[1]]
+            self._advance(span[1] + 1)
+            yield line, entry_type, body
+
+
+def _parse_value_part(text, pos, macros):
+    """Parses a braced, quoted, numeric or macro value. Returns (value, next_pos)."""
+    if pos >= len(text):
+        raise ValueError("missing field value")
+
+    if text[pos] == "{":
+        # Fast path for the common case of a value without nested braces
+        end = text.find("}", pos + 1)
+        if end != -1 and text.find("{", pos + 1, end) == -1:
+            return text[pos + 1:end], end + 1
+
+        depth = 0
+        for delimiter in _BRACES_RE.finditer(text, pos):
+            depth += 1 if delimiter.group() == "{" else -1
+            if depth == 0:
+                return text[pos + 1:delimiter.start()], delimiter.end()
+        raise ValueError("unbalanced braces in field value")
+
+    if text[pos] == '"':
+        depth = 0
+        for delimiter in _QUOTED_RE.finditer(text, pos + 1):
+            char = delimiter.group()
+            if char == "{":
+                depth += 1
+            elif char == "}":
+                depth -= 1
+            elif depth == 0 and text[delimiter.start() - 1] != "\\":
+                return text[pos + 1:delimiter.start()], delimiter.end()
+        raise ValueError("unterminated quoted field value")
+
+    match = _NUMBER_RE.match(text, pos)
+    if match:
+        return match.group(), match.end()
+
+    match = _MACRO_NAME_RE.match(text, pos)
+    if match:
+        name = match.group()
+        # Undefined macros are kept verbatim instead of being dropped.
+        return macros.get(name.lower(), name), match.end()
+
+    raise ValueError(f"expected a field value, found {text[pos:pos + 20]!r}")
+
+
+def _parse_value(text, pos, macros):
+    """Parses a value and the parts concatenated to it with '#'. Returns (value, next_pos)."""
+    parts = []
+    while True:
+        part, pos = _parse_value_part(text, pos, macros)
+        parts.append(part)
+
+        pos = _SPACE_RE.match(text, pos).end()
+        if pos < len(text) and text[pos] == "#":
+            pos = _SPACE_RE.match(text, pos + 1).end()
+            continue
+
+        return "".join(parts), pos
+
+
+def _parse_fields(text, macros):
+    """Parses a comma separated list of `name = value` pairs into a dict."""
+    fields = {}
+    pos = _SEPARATOR_RE.match(text).end()
+
+    while pos < len(text):
+        match = _FIELD_NAME_RE.match(text, pos)
+        if not match:
+            raise ValueError(
+                f"expected a field name, found {text[pos:pos + 20]!r}")
+
+        value, pos = _parse_value(text, match.end(), macros)
+        fields[match.group(1).lower()] = value
+
+        if pos < len(text) and text[pos] != ",":
+            raise ValueError(
+                f"expected ',' after field '{match.group(1)}', "
+                f"found {text[pos:pos + 20]!r}")
+        pos = _SEPARATOR_RE.match(text, pos).end()
+
+    return fields
+
+
+def _parse_entry(entry_type, body, macros):
+    """Parses the body of an entry (everything between its delimiters)."""
+    key, _, rest = body.partition(",")
+    citation_key = "".join(key.split())
+    if not citation_key:
+        raise ValueError("missing citation key")
+
+    return Citation(None, entry_type, citation_key, _parse_fields(rest, macros))
+
+
+def parse_string_definition(text, macros):
+    """Parses the @string definition at the start of `text` into `macros`.
+
+    Returns False if the definition does not end within `text`, and raises
+    ValueError if it cannot be parsed.
+    """
+    _, _, body = next(iter(_EntryReader(io.StringIO(text))))
+    if body is None:
+        return False
+    macros.update(_parse_fields(body, macros))
+    return True
+
+
+def parse_bibtex(source, errors=None, macros=None, chunk_size=CHUNK_SIZE, first_line=1):
+    """Parses BibTeX and yields a Citation for each entry in input order.
+
+    `source` is a string or a text file-like object. File-like objects are
+    read incrementally in chunks of `chunk_size` characters, so memory use
+    depends on the largest entry rather than on the size of the file.
+
+    @string macros are expanded in the values of later entries, as is '#'
+    concatenation; month abbreviations are predefined. If `macros` is given
+    it is used as the macro table and updated with the definitions found.
+    @comment and @preamble blocks are skipped.
+
+    If `errors` is a list, entries that cannot be parsed are appended to it
+    as BibtexParseError instances and parsing continues; otherwise the first
+    error is raised. `first_line` is the line number the source starts at,
+    used in error messages.
+
+    Parsing is the inverse of Citation.to_bibtex(): for lowercase entry types
+    and field names and brace-balanced values, parsing the output of
+    to_bibtex() gives back the same entry type, citation key and fields.
+    """
+    if isinstance(source, str):
+        source = io.StringIO(source)
+    if macros is None:
+        macros = dict(MONTH_MACROS)
+
+    for line, entry_type, body in _EntryReader(source, chunk_size, first_line):
+        if body is None:
+            error = BibtexParseError(
+                f"unterminated @{entry_type} entry", line=line)
+            if errors is None:
+                raise error
+            errors.append(error)
+            return
+
+        if entry_type in _SKIPPED_ENTRY_TYPES:
+            continue
+
+        try:
+            if entry_type == "string":
+                macros.update(_parse_fields(body, macros))
+                continue
+            citation = _parse_entry(entry_type, body, macros)
+        except ValueError as e:
+            key = None
+            if entry_type != "string":
+                key = "".join(body.partition(",")[0].split()) or None
+            error = BibtexParseError(str(e), line=line, citation_key=key)
+            if errors is None:
+                raise error from e
+            errors.append(error)
+            continue
+
+        yield citation
@@ -1,9 +1,41 @@
-class Citation:
+import json
+
+# The fields to_human_readable() reads. List views only need these.
+SUMMARY_FIELDS = (
+    "author", "year", "title", "journaltitle", "booktitle", "publisher",
+    "volume", "number", "pages",
+)
+
+
+class Citation:  # pylint: disable=R0902
+    """
+    A citation with its entry type, key and fields.
+
+    `fields` can be given as a dict or as the raw JSON text of one; JSON is
+    only decoded when the fields are first accessed. Citations are treated
+    as read-only, so the rendered representations are computed once per
+    instance and reused.
+
+    `version` identifies the version of the database row the citation was
+    read from; it changes whenever the row is updated. It is None for
+    citations not read from the database.
+    """
+
+    __slots__ = (
+        "_id", "_entry_type", "_citation_key", "_fields", "_version",
+        "_bibtex", "_human_readable", "_compact",
+    )
+
     def __init__(self, citation_id, entry_type, citation_key, fields):
         self._id = citation_id
         self._entry_type = entry_type
         self._citation_key = citation_key
+        # Raw JSON is kept as is until the fields are first accessed.
         self._fields = fields
+        self._version = None
+        self._bibtex = None
+        self._human_readable = None
+        self._compact = None
 
     @property
     def id(self):
@@ -17,10 +49,32 @@ class Citation:
     def citation_key(self):
         return self._citation_key
 
+    @property
+    def version(self):
+        return self._version
+
+    @version.setter
+    def version(self, value):
+        self._version = value
+
     @property
     def fields(self):
+        if isinstance(self._fields, (str, bytes)):
+            try:
+                self._fields = json.loads(self._fields)
+            except json.JSONDecodeError:
+                self._fields = {}
         return self._fields
 
+    def set_rendered(self, bibtex=None, human_readable=None, compact=None):
+        """Sets representations rendered earlier, e.g. stored in the database."""
+        if bibtex is not None:
+            self._bibtex = bibtex
+        if human_readable is not None:
+            self._human_readable = human_readable
+        if compact is not None:
+            self._compact = compact
+
     def _format_container(self, data):
         """
         Build container string from available fields
@@ -50,6 +104,11 @@ class Citation:
 
     def to_human_readable(self):
         """Return a human-readable string representation of the citation."""
+        if self._human_readable is None:
+            self._human_readable = self._human_readable_uncached()
+        return self._human_readable
+
+    def _human_readable_uncached(self):
         data = self.fields or {}
 
         author = data.get("author")
@@ -77,6 +136,11 @@ class Citation:
 
     def to_compact(self):
         """Return a compact one-line representation: entry type — key — brief fields."""
+        if self._compact is None:
+            self._compact = self._compact_uncached()
+        return self._compact
+
+    def _compact_uncached(self):
         items = sorted(self.fields.items())
         brief = ", ".join(v for k, v in items[:3])
         if len(items) > 3:
@@ -86,6 +150,11 @@ class Citation:
 
     def to_bibtex(self):
         """Return a BibTeX string representation of the citation."""
+        if self._bibtex is None:
+            self._bibtex = self._bibtex_uncached()
+        return self._bibtex
+
+    def _bibtex_uncached(self):
         tab_size = 2  # Maybe able to configure?
         spaces = tab_size * " "
 
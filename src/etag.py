@@ -0,0 +1,43 @@
+import hashlib
+from functools import wraps
+
+from flask import make_response, request, session
+
+from repositories.library_repository import get_library_version
+
+
+def library_etag(version):
+    """Returns a strong ETag for the current request at the given library version.
+
+    Pages depend on nothing but the library and the URL, so the version,
+    path and query string together identify the content. Query parameters
+    are sorted so that their order does not matter.
+    """
+    query = sorted(request.args.items(multi=True))
+    digest = hashlib.sha256(repr((request.path, query)).encode("utf-8"))
+    return f"{version}-{digest.hexdigest()[:16]}"
+
+
+def conditional(view):
+    """Adds ETags derived from the library version to a read-only view.
+
+    A request whose If-None-Match matches is answered with 304 Not Modified
+    before the view runs, so polling clients cost one lookup of the version.
+    Pages showing flashed messages differ from request to request and are
+    served without an ETag.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if "_flashes" in session:
+            return view(*args, **kwargs)
+
+        etag = library_etag(get_library_version())
+        if request.if_none_match.contains(etag):
+            response = make_response("", 304)
+        else:
+            response = make_response(view(*args, **kwargs))
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = "no-cache"
+        return response
+
+    return wrapper
@@ -0,0 +1,92 @@
+import sys
+from collections import OrderedDict
+from threading import Lock
+
+from flask import render_template
+from markupsafe import Markup
+
+from config import fragment_cache_max_bytes
+
+
+class FragmentCache:
+    """
+    An in-process LRU cache of rendered HTML fragments.
+
+    Entries are stored per key together with a version; a lookup with any
+    other version is a miss, so a fragment rendered from an older version of
+    a row is never served. The total size of the stored fragments is kept
+    under `max_bytes` by evicting the least recently used ones.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = Lock()
+
+    def get(self, key, version):
+        """Returns the fragment stored for key and version, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key, version, fragment):
+        """Stores a fragment, replacing any other version stored for key."""
+        size = sys.getsizeof(fragment)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            self._pop(key)
+            self._entries[key] = (version, fragment, size)
+            self._size += size
+            while self._size > self.max_bytes:
+                _, (_, _, evicted) = self._entries.popitem(last=False)
+                self._size -= evicted
+
+    def invalidate(self, keys):
+        """Drops the fragments stored for the given keys."""
+        with self._lock:
+            for key in keys:
+                self._pop(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    @property
+    def size(self):
+        """The approximate number of bytes used by the stored fragments."""
+        return self._size
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _pop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= entry[2]
+
+
+# Rows of the citation list templates, keyed by citation ID
+citation_rows = FragmentCache(fragment_cache_max_bytes)
+
+
+def render_citation_row(citation):
+    """Returns the HTML of a citation in the list templates.
+
+    Rows are cached by citation ID and row version. Citations without a
+    version (not read from the database) are always rendered.
+    """
+    if citation.version is None:
+        return Markup(render_template("citation_row.html", c=citation))
+
+    html = citation_rows.get(citation.id, citation.version)
+    if html is None:
+        html = Markup(render_template("citation_row.html", c=citation))
+        citation_rows.put(citation.id, citation.version, html)
+    return html
@@ -0,0 +1,139 @@
+import json
+import logging
+import time
+
+from flask import (before_render_template, current_app, g, has_app_context, request,
+                   template_rendered)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Longest statement text kept for a slow query, so logs stay readable.
+STATEMENT_MAX_LENGTH = 500
+
+
+class RequestStats:  # pylint: disable=R0903
+    """SQL and template timings collected while handling one request."""
+
+    __slots__ = ("started", "query_count", "db_seconds", "template_seconds",
+                 "slow_queries", "_template_depth", "_template_started")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.query_count = 0
+        self.db_seconds = 0.0
+        self.template_seconds = 0.0
+        self.slow_queries = []
+        self._template_depth = 0
+        self._template_started = None
+
+    def template_started(self):
+        # Templates render others (e.g. the cached citation rows); only the
+        # outermost render is timed so nested ones are not counted twice.
+        if self._template_depth == 0:
+            self._template_started = time.perf_counter()
+        self._template_depth += 1
+
+    def template_finished(self):
+        if self._template_depth == 0:
+            return
+        self._template_depth -= 1
+        if self._template_depth == 0:
+            self.template_seconds += time.perf_counter() - self._template_started
+
+
+def current_stats():
+    """Returns the stats of the request being handled, or None outside of one."""
+    if not has_app_context():
+        return None
+    return g.get("request_stats")
+
+
+def _before_cursor_execute(_conn, _cursor, _statement, _parameters, context, _executemany):
+    # The start time is kept on the execution context rather than the
+    # connection, so a statement that fails leaves nothing behind.
+    if current_stats() is not None and context is not None:
+        context.query_started = time.perf_counter()
+
+
+def _after_cursor_execute(_conn, _cursor, statement, _parameters, context, _executemany):
+    stats = current_stats()
+    started = getattr(context, "query_started", None)
+    if stats is None or started is None:
+        return
+
+    elapsed = time.perf_counter() - started
+    stats.query_count += 1
+    stats.db_seconds += elapsed
+    if elapsed * 1e3 >= current_app.config["SLOW_QUERY_MS"]:
+        stats.slow_queries.append({
+            "ms": round(elapsed * 1e3, 2),
+            "statement": " ".join(statement.split())[:STATEMENT_MAX_LENGTH],
+        })
+
+
+def _before_render(_app, **_extra):
+    stats = current_stats()
+    if stats is not None:
+        stats.template_started()
+
+
+def _rendered(_app, **_extra):
+    stats = current_stats()
+    if stats is not None:
+        stats.template_finished()
+
+
+def server_timing(stats, total_seconds):
+    """Returns the Server-Timing header value for the request stats."""
+    return ", ".join((
+        f'db;dur={stats.db_seconds * 1e3:.2f};desc="{stats.query_count} queries"',
+        f"tpl;dur={stats.template_seconds * 1e3:.2f}",
+        f"total;dur={total_seconds * 1e3:.2f}",
+    ))
+
+
+def init_app(app, slow_query_ms):
+    """Records the SQL queries and template renders of each request of `app`.
+
+    Every response gets a Server-Timing header with the database time and
+    query count, the template render time and the total time, and one JSON
+    line is logged per request. Statements taking at least `slow_query_ms`
+    milliseconds are included in the log line and logged as warnings.
+    A streamed response is measured up to the point its body starts.
+    """
+    app.config["SLOW_QUERY_MS"] = slow_query_ms
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    before_render_template.connect(_before_render, app)
+    template_rendered.connect(_rendered, app)
+
+    if app.logger.level == logging.NOTSET:
+        app.logger.setLevel(logging.INFO)
+
+    @app.before_request
+    def start_request_stats():
+        g.request_stats = RequestStats()
+
+    @app.after_request
+    def report_request_stats(response):
+        stats = g.pop("request_stats", None)
+        if stats is None:
+            return response
+
+        total = time.perf_counter() - stats.started
+        response.headers["Server-Timing"] = server_timing(stats, total)
+
+        for query in stats.slow_queries:
+            app.logger.warning("Slow query (%.2f ms): %s", query["ms"], query["statement"])
+        app.logger.info(json.dumps({
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "queries": stats.query_count,
+            "db_ms": round(stats.db_seconds * 1e3, 2),
+            "template_ms": round(stats.template_seconds * 1e3, 2),
+            "total_ms": round(total * 1e3, 2),
+            "slow_queries": stats.slow_queries,
+        }))
+        return response
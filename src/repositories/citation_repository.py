@@ -1,71 +1,232 @@
 import json
+import re
 
 from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
 
-from config import db
+from config import db, search_exact_count_limit
 from entities.citation import Citation
+from fragment_cache import citation_rows
+from repositories.entry_type_repository import get_entry_type, get_entry_types
+from repositories.search_query import normalized_filters, search_filters, search_order_by
+from result_cache import cache_key, search_results
+from search_index import library_index
+from suggestions import suggestion_index
 
+# Representations stored in the citation_renders table
+RENDERED_FORMS = ("bibtex", "human_readable", "compact")
 
-def _to_citation(row):
-    """Converts a database row to a Citation object."""
+
+def to_citation(row):
+    """Converts a database row to a Citation object.
+
+    Fields returned as JSON text are decoded lazily by the Citation.
+    Rendered forms selected with the row are used instead of formatting
+    the citation again.
+    """
     if not row:
         return None
 
-    fields = row.fields or ""
-    if isinstance(fields, str):
-        try:
-            fields = json.loads(fields)
-        except json.JSONDecodeError:
-            fields = {}
-
-    return Citation(
+    citation = Citation(
         row.id,
         row.entry_type,
         row.citation_key,
-        fields
+        row.fields if row.fields is not None else {}
     )
+    citation.set_rendered(
+        **{form: getattr(row, form, None) for form in RENDERED_FORMS})
+    citation.version = getattr(row, "version", None)
+    return citation
+
+
+def _render(entry_type, citation_key, fields):
+    """Returns the rendered forms of a citation as a dict."""
+    citation = Citation(None, entry_type, citation_key, fields)
+    return {
+        "bibtex": citation.to_bibtex(),
+        "human_readable": citation.to_human_readable(),
+        "compact": citation.to_compact(),
+    }
+
 
+_FIELD_NAME_RE = re.compile(r"^[a-z][a-z0-9_]*$")
 
-def get_citations(page=None, per_page=None):
-    """Fetches citations from the database.
 
-    Optional paging:
-      - page: 1-based page number
-      - per_page: items per page
+def _fields_column(projection=None):
+    """Returns the SQL expression for the fields column.
 
-    If both `page` and `per_page` are provided, the query uses LIMIT/OFFSET
-    to return only that page. If omitted, all citations are returned.
+    With a projection (a sequence of field names) only those fields are
+    selected, trimmed into a new JSONB object on the server, so large
+    fields such as abstracts are neither sent nor decoded. Fields a citation
+    does not have are left out. Without a projection the full document is
+    selected.
     """
-    # N.B. This method should probably have a default per_page value...
-    base_sql = (
-        """
-        SELECT
-            c.id,
-            et.name AS entry_type,
-            c.citation_key, c.fields
-        FROM citations c
-        JOIN entry_types et ON c.entry_type_id = et.id
-        ORDER BY c.id
-        """
+    if projection is None:
+        return "c.fields"
+
+    names = list(dict.fromkeys(projection))
+    for name in names:
+        if not isinstance(name, str) or not _FIELD_NAME_RE.match(name):
+            raise ValueError(f"Invalid field name: {name!r}")
+    if not names:
+        return "'{}'::jsonb"
+
+    pairs = ", ".join(f"'{name}', c.fields->'{name}'" for name in names)
+    return f"jsonb_strip_nulls(jsonb_build_object({pairs}))"
+
+
+def _select_citations(projection=None, rendered=()):
+    """Returns the SELECT ... FROM part of the queries reading citations.
+
+    `projection` limits the fields fetched, see _fields_column(). `rendered`
+    names forms from RENDERED_FORMS to read from citation_renders. The
+    fields are then only fetched for citations that lack one of those
+    forms, so pass it when only the rendered forms are needed.
+
+    The fields are selected as JSON text, which Citation decodes only when
+    they are accessed; psycopg2 would otherwise decode every JSONB value.
+    """
+    fields_sql = _fields_column(projection)
+    forms = list(dict.fromkeys(rendered))
+    for form in forms:
+        if form not in RENDERED_FORMS:
+            raise ValueError(f"Unknown rendered form: {form!r}")
+
+    # xmin is the ID of the transaction that wrote the current row version.
+    columns = ["c.id", "et.name AS entry_type", "c.citation_key", "c.xmin::text AS version"]
+    joins = "JOIN entry_types et ON c.entry_type_id = et.id"
+
+    if forms:
+        missing = " OR ".join(f"r.{form} IS NULL" for form in forms)
+        columns.append(f"CASE WHEN {missing} THEN {fields_sql}::text END AS fields")
+        columns.extend(f"r.{form}" for form in forms)
+        joins += " LEFT JOIN citation_renders r ON r.citation_id = c.id"
+    else:
+        columns.append(f"{fields_sql}::text AS fields")
+
+    return f"SELECT {', '.join(columns)} FROM citations c {joins}"
+
+
+def _select_citations_json(projection=None):
+    """Returns the SELECT ... FROM part of the queries reading citations as JSON.
+
+    Each row has the citation ID and a `json` column with the citation as a
+    JSON object serialized by the database, so rows can be written to a
+    response without being decoded. `projection` limits the fields, see
+    _fields_column(). The object is built as JSONB, whose text form writes
+    every level alike (`"key": value`), unlike json_build_object().
+    """
+    return (
+        "SELECT c.id, jsonb_build_object("
+        "'id', c.id, 'entry_type', et.name, 'citation_key', c.citation_key, "
+        f"'fields', {_fields_column(projection)})::text AS json "
+        "FROM citations c JOIN entry_types et ON c.entry_type_id = et.id"
     )
 
-    params = {}
-    if isinstance(page, int) and isinstance(per_page, int):
-        page = max(page, 1)
-        per_page = max(per_page, 1)
-        offset = (page - 1) * per_page
 
-        base_sql = base_sql + " LIMIT :limit OFFSET :offset"
-        params["limit"] = per_page
-        params["offset"] = offset
+DEFAULT_PER_PAGE = 50
 
-    sql = text(base_sql)
-    result = db.session.execute(sql, params).fetchall()
 
-    if not result:
-        return []
+def _keyset_page(select_sql, after, before, per_page):
+    """Fetches the rows of one keyset page in ascending ID order."""
+    params = {"limit": per_page}
+    backwards = isinstance(before, int)
+
+    if backwards:
+        select_sql += " WHERE c.id < :before ORDER BY c.id DESC"
+        params["before"] = before
+    elif isinstance(after, int):
+        select_sql += " WHERE c.id > :after ORDER BY c.id ASC"
+        params["after"] = after
+    else:
+        select_sql += " ORDER BY c.id ASC"
+
+    select_sql += " LIMIT :limit"
+
+    rows = db.session.execute(text(select_sql), params).fetchall()
+    if backwards:
+        rows.reverse()
+    return rows
+
+
+def _with_cursors(rows, after, before, per_page):
+    """Trims rows fetched with one extra row to a page and finds its cursors.
+
+    Returns a tuple (rows, prev_cursor, next_cursor). A cursor is None when
+    there is no page in that direction.
+    """
+    has_more = len(rows) > per_page
+
+    if isinstance(before, int):
+        rows = rows[-per_page:]
+        has_prev, has_next = has_more, True
+    else:
+        rows = rows[:per_page]
+        has_prev, has_next = isinstance(after, int), has_more
+
+    if not rows:
+        return [], None, None
+
+    prev_cursor = rows[0].id if has_prev else None
+    next_cursor = rows[-1].id if has_next else None
+
+    return rows, prev_cursor, next_cursor
 
-    return [_to_citation(c) for c in result]
+
+def get_citations(after=None, before=None, per_page=DEFAULT_PER_PAGE, projection=None,
+                  rendered=()):
+    """Fetches one page of citations from the database using keyset pagination.
+
+    Cursors are citation IDs:
+      - after: return citations with an ID greater than this one
+      - before: return citations with an ID less than this one
+      - per_page: maximum number of citations to return
+
+    If `before` is given it takes precedence over `after`. Citations are always
+    returned in ascending ID order. Since pages are located through the primary
+    key instead of LIMIT/OFFSET, every page costs the same to fetch.
+
+    `projection` and `rendered` select what is fetched, see _select_citations().
+    """
+    if not isinstance(per_page, int) or per_page < 1:
+        per_page = DEFAULT_PER_PAGE
+
+    rows = _keyset_page(
+        _select_citations(projection, rendered), after, before, per_page)
+    return [to_citation(row) for row in rows]
+
+
+def get_citations_page(after=None, before=None, per_page=DEFAULT_PER_PAGE, projection=None,
+                       rendered=()):
+    """Fetches one page of citations together with the cursors of its neighbours.
+
+    Returns a tuple (citations, prev_cursor, next_cursor). A cursor is None
+    when there is no page in that direction. One extra row is fetched to
+    find out whether more citations exist past the current page.
+    """
+    if not isinstance(per_page, int) or per_page < 1:
+        per_page = DEFAULT_PER_PAGE
+
+    citations = get_citations(
+        after=after, before=before, per_page=per_page + 1,
+        projection=projection, rendered=rendered)
+    return _with_cursors(citations, after, before, per_page)
+
+
+def get_citations_json_page(after=None, before=None, per_page=DEFAULT_PER_PAGE,
+                            projection=None):
+    """Like get_citations_page(), but returns the citations as JSON text.
+
+    Returns a tuple (citations, prev_cursor, next_cursor) where citations
+    is a list of JSON objects serialized by the database.
+    """
+    if not isinstance(per_page, int) or per_page < 1:
+        per_page = DEFAULT_PER_PAGE
+
+    rows = _keyset_page(
+        _select_citations_json(projection), after, before, per_page + 1)
+    rows, prev_cursor, next_cursor = _with_cursors(rows, after, before, per_page)
+    return [row.json for row in rows], prev_cursor, next_cursor
 
 
 def get_citation(citation_id):
@@ -76,7 +237,7 @@ def get_citation(citation_id):
         SELECT
             c.id,
             et.name AS entry_type,
-            c.citation_key, c.fields
+            c.citation_key, c.fields::text AS fields
         FROM citations c
         JOIN entry_types et ON c.entry_type_id = et.id
         WHERE c.id = :citation_id
@@ -93,29 +254,249 @@ def get_citation(citation_id):
     if not result:
         return None
 
-    return _to_citation(result)
+    return to_citation(result)
 
 
-def create_citation(entry_type_id, citation_key, fields):
-    """Creates a new citation entry in the database"""
+def get_citation_json(citation_id, projection=None):
+    """Fetches a citation by its ID as a JSON object serialized by the database.
+
+    Returns None if there is no such citation.
+    """
+    sql = text(_select_citations_json(projection) + " WHERE c.id = :citation_id")
+    result = db.session.execute(sql, {"citation_id": citation_id}).fetchone()
+
+    if not result:
+        return None
+
+    return result.json
+
 
+# Columns returned by the writes, read back into a Citation by _written_citation_sql
+_RETURNING = "RETURNING id, entry_type_id, citation_key, fields, xmin::text AS version"
+
+
+def _written_citation_sql(cte):
+    """Returns the final SELECT of a write, joining the written row with its entry type."""
+    return f"""
+        SELECT w.id, et.name AS entry_type, w.citation_key, w.fields::text AS fields, w.version
+        FROM {cte} w JOIN entry_types et ON w.entry_type_id = et.id
+    """
+
+
+def _store_renders(rows):
+    """Stores rendered forms, replacing earlier ones.
+
+    `rows` are dicts with a `citation_id` and the forms from _render().
+    """
     sql = text(
         """
-        INSERT INTO citations (entry_type_id, citation_key, fields)
-        VALUES (:entry_type_id, :citation_key, :fields)
+        INSERT INTO citation_renders (citation_id, bibtex, human_readable, compact)
+        SELECT r.citation_id, r.bibtex, r.human_readable, r.compact
+        FROM jsonb_to_recordset(CAST(:rows AS jsonb)) AS r(
+            citation_id INTEGER, bibtex TEXT, human_readable TEXT, compact TEXT)
+        ON CONFLICT (citation_id) DO UPDATE SET
+            bibtex = EXCLUDED.bibtex,
+            human_readable = EXCLUDED.human_readable,
+            compact = EXCLUDED.compact
         """
     )
+    db.session.execute(sql, {"rows": json.dumps(rows)})
 
-    serialized = json.dumps(fields or {})
+
+def create_citation(entry_type_id, citation_key, fields):
+    """Creates a new citation entry in the database together with its rendered forms.
+
+    Returns the created Citation, read back with the same statement.
+    """
 
     params = {
         "entry_type_id": entry_type_id,
         "citation_key": citation_key,
-        "fields": serialized,
+        "fields": json.dumps(fields or {}),
     }
 
-    db.session.execute(sql, params)
+    renders = {}
+    renders_sql = ""
+    entry_type = get_entry_type(entry_type_id)
+    if entry_type:
+        renders = _render(entry_type.name, citation_key, fields or {})
+        params.update(renders)
+        renders_sql = """,
+            renders AS (
+                INSERT INTO citation_renders (citation_id, bibtex, human_readable, compact)
+                SELECT id, :bibtex, :human_readable, :compact FROM inserted
+            )
+        """
+    # Otherwise the insert is rejected by the foreign key; nothing to render.
+
+    sql = text(
+        f"""
+        WITH inserted AS (
+            INSERT INTO citations (entry_type_id, citation_key, fields)
+            VALUES (:entry_type_id, :citation_key, :fields)
+            {_RETURNING}
+        ){renders_sql}
+        {_written_citation_sql("inserted")}
+        """
+    )
+
+    row = db.session.execute(sql, params).fetchone()
     db.session.commit()
+    search_results.clear()
+
+    citation = to_citation(row)
+    if citation:
+        citation.set_rendered(**renders)
+        library_index.add(citation)
+        suggestion_index.add(citation)
+    return citation
+
+
+IMPORT_BATCH_SIZE = 1000
+
+
+def _insert_batch(batch):
+    """Inserts a batch of citation rows and their rendered forms with one statement.
+
+    IDs are drawn from the sequence up front so that each citation and its
+    renders can be inserted together.
+    """
+    sql = text(
+        """
+        WITH r AS MATERIALIZED (
+            SELECT nextval(pg_get_serial_sequence('citations', 'id')) AS id, r.*
+            FROM jsonb_to_recordset(CAST(:rows AS jsonb)) AS r(
+                entry_type_id INTEGER, citation_key TEXT, fields JSONB,
+                bibtex TEXT, human_readable TEXT, compact TEXT)
+        ),
+        inserted AS (
+            INSERT INTO citations (id, entry_type_id, citation_key, fields)
+            SELECT id, entry_type_id, citation_key, fields FROM r
+            RETURNING id
+        )
+        INSERT INTO citation_renders (citation_id, bibtex, human_readable, compact)
+        SELECT r.id, r.bibtex, r.human_readable, r.compact
+        FROM r JOIN inserted USING (id)
+        """
+    )
+
+    db.session.execute(sql, {"rows": json.dumps(batch)})
+
+
+def _insert_rows(rows, result):
+    """Inserts rows for import_citations() within a savepoint.
+
+    When the database rejects the rows, each half is retried on its own, so
+    only the rejected rows are reported in `result` and the rest is imported.
+    """
+    try:
+        with db.session.begin_nested():
+            _insert_batch(rows)
+        result["imported"] += len(rows)
+    except SQLAlchemyError as e:
+        if len(rows) == 1:
+            result["errors"].append({"citation_key": rows[0]["citation_key"], "error": str(e)})
+            return
+        middle = len(rows) // 2
+        _insert_rows(rows[:middle], result)
+        _insert_rows(rows[middle:], result)
+
+
+def import_citations(citations, batch_size=IMPORT_BATCH_SIZE):
+    """Inserts many citations in batches within a single transaction.
+
+    Entry types are resolved by name with a single lookup. Citations that
+    cannot be imported are reported instead of aborting the import; a batch
+    rejected by the database is rolled back to its savepoint and split until
+    only the rejected citations are left out, see _insert_rows().
+
+    Returns a dict with the number of imported citations and a list of
+    errors, each a dict with `citation_key` and `error`.
+    """
+    if not isinstance(batch_size, int) or batch_size < 1:
+        batch_size = IMPORT_BATCH_SIZE
+
+    entry_type_ids = {et.name: et.id for et in get_entry_types()}
+    result = {"imported": 0, "errors": []}
+    batch = []
+
+    def _flush():
+        if batch:
+            _insert_rows(list(batch), result)
+        batch.clear()
+
+    for citation in citations:
+        entry_type_id = entry_type_ids.get(citation.entry_type)
+
+        if not entry_type_id:
+            error = f"Unknown entry type '{citation.entry_type}'"
+        elif not citation.citation_key:
+            error = "Missing citation key"
+        elif not citation.fields:
+            error = "No fields provided for the citation"
+        else:
+            error = None
+
+        if error:
+            result["errors"].append(
+                {"citation_key": citation.citation_key, "error": error})
+            continue
+
+        batch.append({
+            "entry_type_id": entry_type_id,
+            "citation_key": citation.citation_key,
+            "fields": citation.fields,
+            **_render(citation.entry_type, citation.citation_key, citation.fields),
+        })
+
+        if len(batch) >= batch_size:
+            _flush()
+
+    _flush()
+    db.session.commit()
+    search_results.clear()
+    library_index.invalidate_new()
+    suggestion_index.invalidate_new()
+
+    return result
+
+
+# Stand in for the entry type and key in the renders of an update that does
+# not set them; the update statement puts the written values in their place.
+_TYPE_PLACEHOLDER = "\ue000"
+_KEY_PLACEHOLDER = "\ue001"
+
+
+def _updated_renders_sql(params, entry_type_id, citation_key, fields):
+    """Returns the CTE of update_citation() storing the renders of the citation.
+
+    The citation is rendered before the update runs, so that its renders are
+    stored by the same statement; the rendered forms are added to `params`.
+    Without fields (or with fields containing a placeholder) nothing can be
+    rendered, so the stale renders are dropped.
+    """
+    written = (citation_key or "", *fields, *fields.values()) if fields else ()
+    if not fields or any(
+            _TYPE_PLACEHOLDER in str(t) or _KEY_PLACEHOLDER in str(t) for t in written):
+        return "DELETE FROM citation_renders r USING updated w WHERE r.citation_id = w.id"
+
+    entry_type = get_entry_type(entry_type_id) if entry_type_id else None
+    params.update(_render(
+        entry_type.name if entry_type else _TYPE_PLACEHOLDER,
+        citation_key or _KEY_PLACEHOLDER, fields))
+    params.update(type_placeholder=_TYPE_PLACEHOLDER, key_placeholder=_KEY_PLACEHOLDER)
+    columns = ", ".join(
+        f"replace(replace(:{form}, :type_placeholder, et.name), :key_placeholder, w.citation_key)"
+        for form in RENDERED_FORMS)
+    return f"""
+        INSERT INTO citation_renders (citation_id, bibtex, human_readable, compact)
+        SELECT w.id, {columns}
+        FROM updated w JOIN entry_types et ON w.entry_type_id = et.id
+        ON CONFLICT (citation_id) DO UPDATE SET
+            bibtex = EXCLUDED.bibtex,
+            human_readable = EXCLUDED.human_readable,
+            compact = EXCLUDED.compact
+    """
 
 
 def update_citation(
@@ -124,7 +505,14 @@ def update_citation(
         citation_key=None,
         fields=None
 ):
-    """Updates an existing citation entry in the database."""
+    """Updates an existing citation entry in the database.
+
+    The rendered forms of the citation are stored by the same statement,
+    see _updated_renders_sql().
+
+    Returns the updated Citation, read back with the same statement, or
+    None if there was no such citation or nothing to update.
+    """
 
     values = []
     params = {"citation_id": citation_id}
@@ -143,108 +531,400 @@ def update_citation(
         params["fields"] = serialized
 
     # Nothing to update; returning.
-    # Should this return a value or raise?
     if not values:
-        return
+        return None
 
-    base_sql = (
+    sql = text(
         f"""
-        UPDATE citations
-        SET {", ".join(values)}
-        WHERE id = :citation_id
+        WITH updated AS (
+            UPDATE citations
+            SET {", ".join(values)}
+            WHERE id = :citation_id
+            {_RETURNING}
+        ),
+        renders AS ({_updated_renders_sql(params, entry_type_id, citation_key, fields)})
+        {_written_citation_sql("updated")}
         """
     )
 
-    sql = text(base_sql)
-
-    db.session.execute(sql, params)
+    row = db.session.execute(sql, params).fetchone()
     db.session.commit()
+    citation_rows.invalidate([citation_id])
+    search_results.clear()
+
+    citation = to_citation(row)
+    if citation:
+        citation.set_rendered(**{
+            form: params[form].replace(_TYPE_PLACEHOLDER, citation.entry_type).replace(
+                _KEY_PLACEHOLDER, citation.citation_key)
+            for form in RENDERED_FORMS if form in params})
+        library_index.add(citation)
+        suggestion_index.add(citation)
+    return citation
 
 
 def delete_citation(citation_id):
-    """Deletes a citation entry from the database by its ID"""
+    """Deletes a citation entry from the database by its ID.
+
+    Returns True if the citation existed.
+    """
 
     sql = text(
         """
         DELETE FROM citations
         WHERE id = :citation_id
+        RETURNING id
         """
     )
 
-    db.session.execute(sql, {"citation_id": citation_id})
+    row = db.session.execute(sql, {"citation_id": citation_id}).fetchone()
     db.session.commit()
+    citation_rows.invalidate([citation_id])
+    search_results.clear()
+    library_index.remove(citation_id)
+    suggestion_index.remove(citation_id)
+    return row is not None
 
 
-def search_citations(queries=None):
-    if queries is None:
-        queries = {}
-    base_sql = """
-        SELECT
-            c.id,
-            et.name AS entry_type,
-            c.citation_key,
-            c.fields
-        FROM citations c
-        JOIN entry_types et ON c.entry_type_id = et.id
+def _search(select_sql, queries, limit=None, offset=0):
+    """Runs a search query and returns its rows.
+
+    Without a limit every matching row is returned.
+    """
+    where_sql, params = search_filters(queries or {})
+    select_sql += where_sql
+    select_sql += search_order_by(queries or {})
+
+    if isinstance(limit, int) and limit > 0:
+        select_sql += " LIMIT :limit OFFSET :offset"
+        params["limit"] = limit
+        params["offset"] = offset if isinstance(offset, int) and offset > 0 else 0
+
+    return db.session.execute(text(select_sql), params).fetchall()
+
+
+def _search_by_ids(select_sql, ids):
+    """Returns the rows of the citations with the given IDs in the same order."""
+    if not ids:
+        return []
+    select_sql += (
+        " WHERE c.id = ANY(:ids)"
+        " ORDER BY array_position(CAST(:ids AS integer[]), c.id)"
+    )
+    return db.session.execute(text(select_sql), {"ids": ids}).fetchall()
+
+
+def get_citations_by_ids(ids, projection=None):
+    """Fetches the citations with the given IDs, in the order of the IDs.
+
+    `projection` limits the fields fetched, see _select_citations().
+    """
+    return [to_citation(r) for r in _search_by_ids(_select_citations(projection), list(ids))]
+
+
+def search_citations(queries=None, projection=None, rendered=(), limit=None, offset=0):
+    """Returns the citations matching the search queries.
+
+    `projection` and `rendered` select what is fetched, see _select_citations().
+    `limit` and `offset` select a slice of the results.
+
+    The IDs of a slice are cached per normalized search, so a repeated
+    search only looks up its citations by ID. When the in-memory search
+    index is ready, it finds the IDs instead of the database.
     """
+    select_sql = _select_citations(projection, rendered)
+    if library_index.ready:
+        ids = library_index.search(queries or {}, limit, offset)
+        return [to_citation(r) for r in _search_by_ids(select_sql, ids)]
+    if not isinstance(limit, int) or limit < 1:
+        return [to_citation(r) for r in _search(select_sql, queries, limit, offset)]
+
+    key = cache_key("search", queries or {}, limit, offset)
+    generation = search_results.generation()
+    ids = search_results.get(key)
+    if ids is None:
+        rows = _search(select_sql, queries, limit, offset)
+        search_results.put(key, [r.id for r in rows], generation)
+    else:
+        rows = _search_by_ids(select_sql, ids)
+    return [to_citation(r) for r in rows]
 
-    def _to_int(v):
-        if v is None or v == "":
-            return None
-        try:
-            return int(v)
-        except (TypeError, ValueError):
-            return None
 
-    year_from = _to_int(queries.get("year_from"))
-    year_to = _to_int(queries.get("year_to"))
+def search_citations_json(queries=None, projection=None, limit=None, offset=0):
+    """Like search_citations(), but returns the citations as JSON text.
 
-    filters = []
-    params = {}
+    Returns a list of JSON objects serialized by the database.
+    """
+    if library_index.ready:
+        ids = library_index.search(queries or {}, limit, offset)
+        return [r.json for r in _search_by_ids(_select_citations_json(projection), ids)]
+    rows = _search(_select_citations_json(projection), queries, limit, offset)
+    return [r.json for r in rows]
 
-    if queries.get("q"):
-        filters.append("c.fields::text ILIKE :q")
-        params["q"] = f"%{queries.get('q')}%"
 
-    if queries.get("citation_key"):
-        filters.append("c.citation_key ILIKE :citation_key")
-        params["citation_key"] = f"%{queries.get('citation_key')}%"
+_COUNT_SELECT = "SELECT 1 FROM citations c JOIN entry_types et ON c.entry_type_id = et.id"
 
-    if queries.get("entry_type"):
-        filters.append("et.name = :entry_type")
-        params["entry_type"] = queries.get('entry_type')
 
-    if queries.get("author"):
-        filters.append("c.fields->>'author' ILIKE :author")
-        params["author"] = f"%{queries.get('author')}%"
+def _estimate_count(where_sql, params):
+    """Returns the query planner's estimate of the number of matching citations.
 
-    if year_from:
-        filters.append("(c.fields->>'year')::int >= :year_from")
-        params["year_from"] = year_from
+    Without filters the row count of the table kept by ANALYZE is used.
+    """
+    if not where_sql:
+        sql = text("SELECT reltuples FROM pg_class WHERE oid = 'citations'::regclass")
+        return int(max(db.session.execute(sql).scalar() or 0, 0))
 
-    if year_to:
-        filters.append("(c.fields->>'year')::int <= :year_to")
-        params["year_to"] = year_to
+    sql = text("EXPLAIN (FORMAT JSON) " + _COUNT_SELECT + where_sql)
+    plan = db.session.execute(sql, params).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
 
-    if filters:
-        base_sql += " WHERE " + " AND ".join(filters)
 
-    allowed_sort_by = {"year", "citation_key"}
-    allowed_direction = {"ASC", "DESC"}
-    sort_by = (queries.get("sort_by") or "").lower()
-    direction = (queries.get("direction") or "ASC").upper()
+def count_citations(queries=None, exact_limit=search_exact_count_limit):
+    """Returns (count, exact) for the citations matching the search queries.
 
-    sort_by = sort_by if sort_by in allowed_sort_by else None
-    direction = direction if direction in allowed_direction else "ASC"
+    Matches are counted exactly up to `exact_limit`. Counting more would
+    cost as much as reading every match, so above it the planner's estimate
+    (at least `exact_limit` + 1) is returned and `exact` is False.
+    Counts are cached like search results. The in-memory search index
+    counts every match exactly when it is ready.
+    """
+    if library_index.ready:
+        return library_index.count(queries or {}), True
+
+    key = cache_key("count", normalized_filters(queries or {}), exact_limit)
+    generation = search_results.generation()
+    cached = search_results.get(key)
+    if cached is not None:
+        return tuple(cached)
 
-    if sort_by == "year":
-        base_sql += f" ORDER BY (c.fields->>'year')::int {direction}"
-    elif sort_by == "citation_key":
-        base_sql += f" ORDER BY c.citation_key {direction}"
+    where_sql, params = search_filters(queries or {})
+    sql = text(
+        f"SELECT count(*) FROM ({_COUNT_SELECT}{where_sql} LIMIT :count_limit) matches")
+    count = db.session.execute(sql, {**params, "count_limit": exact_limit + 1}).scalar()
+
+    if count <= exact_limit:
+        result = (count, True)
     else:
-        base_sql += " ORDER BY c.id ASC"
+        result = (max(_estimate_count(where_sql, params), count), False)
+    search_results.put(key, result, generation)
+    return result
+
+
+EXPORT_CHUNK_SIZE = 1000
+
+
+def iter_citations(queries=None, chunk_size=EXPORT_CHUNK_SIZE, rendered=()):
+    """Yields every citation matching the search queries one at a time.
+
+    Rows are read through a server-side cursor `chunk_size` rows at a time,
+    so memory use stays flat regardless of the size of the library.
+    Accepts the same queries as `search_citations`; `rendered` is described
+    in _select_citations().
+    """
+    if queries is None:
+        queries = {}
+    base_sql = _select_citations(rendered=rendered)
+
+    where_sql, params = search_filters(queries)
+    base_sql += where_sql
+    base_sql += search_order_by(queries)
 
     sql = text(base_sql)
 
-    result = db.session.execute(sql, params).fetchall()
-    return [_to_citation(r) for r in result]
+    result = db.session.execute(
+        sql,
+        params,
+        execution_options={"stream_results": True, "yield_per": chunk_size}
+    )
+
+    try:
+        for partition in result.partitions():
+            for row in partition:
+                yield to_citation(row)
+    finally:
+        result.close()
+
+
+def _selection(ids=None, queries=None):
+    """Builds the condition selecting citations for a bulk operation.
+
+    Citations are selected by a list of IDs, or if `ids` is None, by the
+    same filters as `search_citations`. Returns a tuple (condition, params);
+    condition is None when nothing is selected, so that an empty selection
+    never turns into an operation on the whole library.
+    """
+    if ids is not None:
+        ids = [int(i) for i in ids]
+        if not ids:
+            return None, {}
+        return "c.id = ANY(:ids)", {"ids": ids}
+
+    where_sql, params = search_filters(queries or {})
+    if not where_sql:
+        return None, {}
+    return where_sql.replace(" WHERE ", "", 1), params
+
+
+def _invalidate_rows(params):
+    """Drops the cached list rows and search results changed by a bulk operation."""
+    search_results.clear()
+    library_index.invalidate(params.get("ids"))
+    suggestion_index.invalidate(params.get("ids"))
+    if "ids" in params:
+        citation_rows.invalidate(params["ids"])
+    else:
+        citation_rows.clear()
+
+
+def delete_citations(ids=None, queries=None):
+    """Deletes the selected citations with a single statement.
+
+    Returns the number of deleted citations.
+    """
+    condition, params = _selection(ids, queries)
+    if not condition:
+        return 0
+
+    sql = text(
+        f"""
+        DELETE FROM citations c
+        USING entry_types et
+        WHERE et.id = c.entry_type_id AND {condition}
+        """
+    )
+
+    result = db.session.execute(sql, params)
+    db.session.commit()
+    _invalidate_rows(params)
+    return result.rowcount
+
+
+# Drops the rendered forms of the selected citations in the same statement
+# as a bulk update; both parts see the same snapshot and so the same rows.
+_DROP_RENDERS_SQL = """
+    WITH dropped AS (
+        DELETE FROM citation_renders r
+        USING citations c, entry_types et
+        WHERE r.citation_id = c.id AND et.id = c.entry_type_id AND {condition}
+    )
+"""
+
+
+def set_citations_field(field, value, ids=None, queries=None):
+    """Sets a field to the same value on all selected citations.
+
+    An empty value removes the field. The rendered forms of the citations
+    are dropped, see backfill_renders(). Returns the number of updated
+    citations.
+    """
+    if not isinstance(field, str) or not _FIELD_NAME_RE.match(field):
+        raise ValueError(f"Invalid field name: {field!r}")
+
+    condition, params = _selection(ids, queries)
+    if not condition:
+        return 0
+
+    params["field"] = field
+    if value:
+        assignment = (
+            "fields = c.fields || "
+            "jsonb_build_object(CAST(:field AS text), CAST(:value AS text))"
+        )
+        params["value"] = value
+    else:
+        assignment = "fields = c.fields - CAST(:field AS text)"
+
+    sql = text(
+        f"""
+        {_DROP_RENDERS_SQL.format(condition=condition)}
+        UPDATE citations c
+        SET {assignment}
+        FROM entry_types et
+        WHERE et.id = c.entry_type_id AND {condition}
+        """
+    )
+
+    result = db.session.execute(sql, params)
+    db.session.commit()
+    _invalidate_rows(params)
+    return result.rowcount
+
+
+def set_citations_entry_type(entry_type_id, ids=None, queries=None):
+    """Changes the entry type of all selected citations.
+
+    The rendered forms of the citations are dropped, see backfill_renders().
+    Returns the number of updated citations.
+    """
+    condition, params = _selection(ids, queries)
+    if not condition:
+        return 0
+
+    params["entry_type_id"] = entry_type_id
+
+    sql = text(
+        f"""
+        {_DROP_RENDERS_SQL.format(condition=condition)}
+        UPDATE citations c
+        SET entry_type_id = :entry_type_id
+        FROM entry_types et
+        WHERE et.id = c.entry_type_id AND {condition}
+        """
+    )
+
+    result = db.session.execute(sql, params)
+    db.session.commit()
+    _invalidate_rows(params)
+    return result.rowcount
+
+
+RENDER_BATCH_SIZE = 1000
+
+
+def backfill_renders(refresh_all=False, batch_size=RENDER_BATCH_SIZE):
+    """Stores the rendered forms of citations that have none.
+
+    With `refresh_all` every citation is rendered again, e.g. after the
+    formatting code has changed. Citations are processed in batches of
+    `batch_size`, each committed on its own. Returns the number of
+    citations rendered.
+    """
+    if not isinstance(batch_size, int) or batch_size < 1:
+        batch_size = RENDER_BATCH_SIZE
+
+    condition = "TRUE" if refresh_all else "r.citation_id IS NULL"
+    select_sql = text(
+        f"""
+        SELECT c.id, et.name AS entry_type, c.citation_key, c.fields::text AS fields
+        FROM citations c
+        JOIN entry_types et ON c.entry_type_id = et.id
+        LEFT JOIN citation_renders r ON r.citation_id = c.id
+        WHERE c.id > :after AND {condition}
+        ORDER BY c.id ASC
+        LIMIT :limit
+        """
+    )
+    rendered = 0
+    after = 0
+    while True:
+        rows = db.session.execute(
+            select_sql, {"after": after, "limit": batch_size}).fetchall()
+        if not rows:
+            break
+
+        batch = []
+        for row in rows:
+            citation = to_citation(row)
+            batch.append({
+                "citation_id": citation.id,
+                **_render(citation.entry_type, citation.citation_key, citation.fields),
+            })
+        _store_renders(batch)
+        db.session.commit()
+
+        rendered += len(batch)
+        after = rows[-1].id
+
+    return rendered
@@ -2,25 +2,46 @@ from sqlalchemy import text
 
 from config import db
 
+# Maps entry type IDs to their default field names. Loaded once per process
+# and kept here until invalidate_cache() is called. The map is replaced as a
+# whole, so a cache listener thread can drop it while a request reads it.
+_cache = {}
 
-def get_entry_fields(entry_type_id):
-    """Fetches default entry fields for a given entry type ID from the database"""
 
-    sql = text(
-        """
-        SELECT df.name
-        FROM default_entry_fields def
-        JOIN default_fields df ON def.default_field_id = df.id
-        WHERE def.entry_type_id = :entry_type_id
-        ORDER BY df.name
-        """
-    )
+def _load_entry_fields():
+    """Returns the cached entry type to fields map, loading it if needed."""
+    entry_fields = _cache.get("entry_fields")
+    if entry_fields is None:
+        sql = text(
+            """
+            SELECT def.entry_type_id, df.name
+            FROM default_entry_fields def
+            JOIN default_fields df ON def.default_field_id = df.id
+            ORDER BY def.entry_type_id, df.name
+            """
+        )
+
+        result = db.session.execute(sql).fetchall()
+
+        entry_fields = {}
+        for row in result or []:
+            entry_fields.setdefault(row.entry_type_id, []).append(row.name)
+
+        _cache["entry_fields"] = entry_fields
 
-    params = {"entry_type_id": entry_type_id}
+    return entry_fields
 
-    result = db.session.execute(sql, params).fetchall()
 
-    if not result:
+def invalidate_cache():
+    """Drops the cached entry fields so that the next lookup reloads them."""
+    _cache.pop("entry_fields", None)
+
+
+def get_entry_fields(entry_type_id):
+    """Fetches default entry fields for a given entry type ID"""
+    try:
+        entry_type_id = int(entry_type_id)
+    except (TypeError, ValueError):
         return []
 
-    return [r.name for r in result]
+    return list(_load_entry_fields().get(entry_type_id, []))
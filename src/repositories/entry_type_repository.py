@@ -3,6 +3,12 @@ from sqlalchemy import text
 from config import db
 from entities.entry_type import EntryType
 
+# Entry types are static reference data, so they are loaded once per process
+# and kept here until invalidate_cache() is called. The lookups are stored
+# together under one key, so a cache listener thread can drop them while a
+# request reads the ones it got.
+_cache = {}
+
 
 def _to_entry_type(row):
     return EntryType(
@@ -11,66 +17,51 @@ def _to_entry_type(row):
     )
 
 
-def get_entry_types():
-    """Fetches all entry types from the database"""
-
-    sql = text(
-        """
-        SELECT id, name
-        FROM entry_types
-        ORDER BY name, id
-        """
-    )
+def _load_entry_types():
+    """Returns the cached entry type lookups, loading them from the database if needed."""
+    lookups = _cache.get("lookups")
+    if lookups is None:
+        sql = text(
+            """
+            SELECT id, name
+            FROM entry_types
+            ORDER BY name, id
+            """
+        )
 
-    result = db.session.execute(sql).fetchall()
+        result = db.session.execute(sql).fetchall()
+        entry_types = [_to_entry_type(row) for row in result or []]
 
-    if not result:
-        return []
+        lookups = {
+            "by_id": {et.id: et for et in entry_types},
+            "by_name": {et.name: et for et in entry_types},
+            "entry_types": entry_types,
+        }
+        _cache["lookups"] = lookups
 
-    return [_to_entry_type(row) for row in result]
+    return lookups
 
 
-def get_entry_type(entry_type_id):
-    """Fetches an entry type by its ID from the database"""
-
-    sql = text(
-        """
-        SELECT id, name
-        FROM entry_types
-        WHERE id = :entry_type_id
-        """
-    )
+def invalidate_cache():
+    """Drops the cached entry types so that the next lookup reloads them."""
+    _cache.pop("lookups", None)
+
 
-    params = {
-        "entry_type_id": entry_type_id,
-    }
+def get_entry_types():
+    """Fetches all entry types"""
+    return list(_load_entry_types()["entry_types"])
 
-    result = db.session.execute(sql, params).fetchone()
 
-    if not result:
+def get_entry_type(entry_type_id):
+    """Fetches an entry type by its ID"""
+    try:
+        entry_type_id = int(entry_type_id)
+    except (TypeError, ValueError):
         return None
 
-    return _to_entry_type(result)
+    return _load_entry_types()["by_id"].get(entry_type_id)
 
 
 def get_entry_type_by_name(entry_type):
-    """Fetches an entry type by its name from the database"""
-
-    sql = text(
-        """
-        SELECT id, name
-        FROM entry_types
-        WHERE name = :entry_type
-        """
-    )
-
-    params = {
-        "entry_type": entry_type,
-    }
-
-    result = db.session.execute(sql, params).fetchone()
-
-    if not result:
-        return None
-
-    return _to_entry_type(result)
+    """Fetches an entry type by its name"""
+    return _load_entry_types()["by_name"].get(entry_type)
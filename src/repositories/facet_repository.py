@@ -0,0 +1,78 @@
+from sqlalchemy import text
+
+from config import db
+from repositories.search_query import normalized_filters, search_filters
+from result_cache import cache_key, search_results
+
+# Width of the year ranges counted by the facets, and how many authors are listed
+YEAR_FACET_WIDTH = 10
+TOP_AUTHORS = 10
+
+# GROUPING() bits of the rows of each grouping set in _FACETS_SQL
+_FACET_SETS = {0b011: "entry_types", 0b101: "years", 0b110: "authors"}
+
+_YEAR_RANGE_SQL = f"c.year_int / {YEAR_FACET_WIDTH} * {YEAR_FACET_WIDTH}"
+
+_FACETS_SQL = f"""
+    SELECT * FROM (
+        SELECT
+            counts.*,
+            row_number() OVER (
+                PARTITION BY grouping_set ORDER BY author IS NULL, hits DESC, author
+            ) AS rank
+        FROM (
+            SELECT
+                et.name AS entry_type,
+                {_YEAR_RANGE_SQL} AS year,
+                a.author,
+                GROUPING(et.name, {_YEAR_RANGE_SQL}, a.author) AS grouping_set,
+                count(DISTINCT c.id) AS hits
+            FROM citations c
+            JOIN entry_types et ON c.entry_type_id = et.id
+            LEFT JOIN LATERAL regexp_split_to_table(
+                btrim(c.fields->>'author'), '\\s+and\\s+') AS a(author) ON true
+            {{where_sql}}
+            GROUP BY GROUPING SETS ((et.name), ({_YEAR_RANGE_SQL}), (a.author))
+        ) counts
+    ) facets
+    WHERE grouping_set <> {0b110} OR (author IS NOT NULL AND rank <= :top_authors)
+"""
+
+
+def _to_facets(rows):
+    facets = {name: [] for name in _FACET_SETS.values()}
+    for row in rows:
+        name = _FACET_SETS[row.grouping_set]
+        value = {"entry_types": row.entry_type, "years": row.year, "authors": row.author}[name]
+        if value is not None:
+            facets[name].append((value, row.hits))
+
+    facets["entry_types"].sort(key=lambda facet: (-facet[1], facet[0]))
+    facets["years"].sort(reverse=True)
+    facets["authors"].sort(key=lambda facet: (-facet[1], facet[0]))
+    return facets
+
+
+def get_search_facets(queries=None):
+    """Returns how many citations matching the search queries fall in each facet.
+
+    Returns a dict of lists of (value, count) pairs: `entry_types` per entry
+    type, `years` per YEAR_FACET_WIDTH-year range (keyed by its first year,
+    most recent first) and `authors` for the TOP_AUTHORS most frequent
+    authors. All three are counted with one grouped query over the matches.
+
+    Results are cached like search results, per set of filters.
+    """
+    queries = queries or {}
+    key = cache_key("facets", normalized_filters(queries))
+    generation = search_results.generation()
+    facets = search_results.get(key)
+    if facets is not None:
+        return facets
+
+    where_sql, params = search_filters(queries)
+    sql = text(_FACETS_SQL.format(where_sql=where_sql))
+    rows = db.session.execute(sql, {**params, "top_authors": TOP_AUTHORS}).fetchall()
+    facets = _to_facets(rows)
+    search_results.put(key, facets, generation)
+    return facets
@@ -0,0 +1,12 @@
+from sqlalchemy import text
+
+from config import db
+
+
+def get_library_version():
+    """Returns the library version, a number that grows whenever citations
+    or entry types change. Returns 0 if the library has never been written.
+    """
+    sql = text("SELECT version FROM library_version WHERE id")
+    version = db.session.execute(sql).scalar()
+    return version or 0
@@ -0,0 +1,83 @@
+import threading
+
+import cache_sync
+from config import app
+from repositories.citation_repository import get_citations, get_citations_by_ids
+from search_index import library_index
+from suggestions import VENUE_FIELDS, suggestion_index
+
+# Citations read per query while the search index is built
+INDEX_BATCH_SIZE = 1000
+
+
+def _citations_to_index(ids=None, after=0, projection=None):
+    """Yields the citations with the given IDs, or without IDs, all after an ID.
+
+    `projection` limits the fields read, see get_citations().
+    """
+    if ids is not None:
+        yield from get_citations_by_ids(ids, projection)
+        return
+
+    while True:
+        citations = get_citations(after=after, per_page=INDEX_BATCH_SIZE, projection=projection)
+        if not citations:
+            return
+        yield from citations
+        after = citations[-1].id
+
+
+def _in_app_context(update, load):
+    with app.app_context():
+        update(load)
+
+
+def _refresh(index, load):
+    """Brings an index up to date.
+
+    A stale index is rebuilt, and the citations created since the last
+    indexed one (e.g. by an import) are read, on a background thread; the
+    index is not ready until that is done. Otherwise the changed citations
+    are read at once. Returns the thread updating the index, if one was
+    started.
+    """
+    if index.stale:
+        update, name = index.rebuild, "rebuild"
+    elif index.loading_new:
+        update, name = index.refresh, "refresh"
+    else:
+        index.refresh(load)
+        return None
+    thread = threading.Thread(
+        target=_in_app_context, args=(update, load), name=f"{type(index).__name__}-{name}",
+        daemon=True)
+    thread.start()
+    return thread
+
+
+def refresh_search_index():
+    """Brings the in-memory search index up to date, if it is enabled.
+
+    The first call starts building the index from every citation; later
+    calls read the citations changed since, see SearchIndex.invalidate(),
+    in the background if citations were imported.
+    Searches are answered by the database until the index is ready.
+    """
+    return _refresh(library_index, _citations_to_index)
+
+
+def _citations_to_suggest(ids=None, after=0):
+    """Like _citations_to_index(), but reads only the fields suggested."""
+    return _citations_to_index(ids, after, projection=("author", *VENUE_FIELDS))
+
+
+def refresh_suggestion_index():
+    """Brings the index of suggested authors, citation keys and venues up to date.
+
+    The index is built in the background from the first call on, so only
+    when suggestions are used. It is always kept, so the first call also
+    starts the cache listener, through which the index sees the writes of
+    other processes.
+    """
+    cache_sync.ensure_started(app)
+    return _refresh(suggestion_index, _citations_to_suggest)
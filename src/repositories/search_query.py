@@ -0,0 +1,101 @@
+# Search filters that change the set of matches; sorting and paging do not.
+_FILTER_KEYS = ("q", "citation_key", "entry_type", "author", "year_from", "year_to", "fuzzy")
+
+
+def normalized_filters(queries):
+    """Returns the search filters that are set, e.g. as part of a cache key."""
+    return {key: queries[key] for key in _FILTER_KEYS if queries.get(key) not in (None, "", False)}
+
+
+def search_filters(queries):
+    """Builds the WHERE clause and bind parameters for the search queries.
+
+    Returns a tuple (where_sql, params). `where_sql` is an empty string when
+    no filters apply.
+    """
+    def _to_int(v):
+        if v is None or v == "":
+            return None
+        try:
+            return int(v)
+        except (TypeError, ValueError):
+            return None
+
+    year_from = _to_int(queries.get("year_from"))
+    year_to = _to_int(queries.get("year_to"))
+
+    filters = []
+    params = {}
+
+    if queries.get("q"):
+        filters.append(
+            "c.search_vector @@ websearch_to_tsquery('simple', :q)")
+        params["q"] = queries.get("q")
+
+    fuzzy = bool(queries.get("fuzzy"))
+
+    if queries.get("citation_key"):
+        if fuzzy:
+            filters.append(":citation_key <% c.citation_key")
+            params["citation_key"] = queries.get("citation_key")
+        else:
+            filters.append("c.citation_key ILIKE :citation_key")
+            params["citation_key"] = f"%{queries.get('citation_key')}%"
+
+    if queries.get("entry_type"):
+        filters.append("et.name = :entry_type")
+        params["entry_type"] = queries.get('entry_type')
+
+    if queries.get("author"):
+        if fuzzy:
+            filters.append(":author <% (c.fields->>'author')")
+            params["author"] = queries.get("author")
+        else:
+            filters.append("c.fields->>'author' ILIKE :author")
+            params["author"] = f"%{queries.get('author')}%"
+
+    if year_from:
+        filters.append("c.year_int >= :year_from")
+        params["year_from"] = year_from
+
+    if year_to:
+        filters.append("c.year_int <= :year_to")
+        params["year_to"] = year_to
+
+    where_sql = " WHERE " + " AND ".join(filters) if filters else ""
+    return where_sql, params
+
+
+def search_order_by(queries):
+    """Builds the ORDER BY clause for the search queries.
+
+    Without an explicit sort, fuzzy searches are ordered by trigram word
+    similarity and full-text searches by relevance.
+    """
+    allowed_sort_by = {"year", "citation_key"}
+    allowed_direction = {"ASC", "DESC"}
+    sort_by = (queries.get("sort_by") or "").lower()
+    direction = (queries.get("direction") or "ASC").upper()
+
+    sort_by = sort_by if sort_by in allowed_sort_by else None
+    direction = direction if direction in allowed_direction else "ASC"
+
+    if sort_by == "year":
+        return f" ORDER BY c.year_int {direction}"
+    if sort_by == "citation_key":
+        return f" ORDER BY c.citation_key {direction}"
+    if queries.get("fuzzy"):
+        similarities = []
+        if queries.get("citation_key"):
+            similarities.append("word_similarity(:citation_key, c.citation_key)")
+        if queries.get("author"):
+            similarities.append(
+                "word_similarity(:author, c.fields->>'author')")
+        if similarities:
+            return f" ORDER BY {' + '.join(similarities)} DESC, c.id ASC"
+    if queries.get("q"):
+        return (
+            " ORDER BY ts_rank(c.search_vector, "
+            "websearch_to_tsquery('simple', :q)) DESC, c.id ASC"
+        )
+    return " ORDER BY c.id ASC"
@@ -0,0 +1,229 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+import uuid
+from collections import OrderedDict
+from threading import Lock
+
+from config import (search_cache_backend, search_cache_dir, search_cache_max_entries,
+                    search_cache_ttl)
+
+
+class MemoryBackend:
+    """Stores cached values in a dict of this process, evicting the least recently used."""
+
+    shared = False
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._generation = 0
+        self._lock = Lock()
+
+    def get(self, key):
+        """Returns the value stored for key, or None if it is missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def generation(self):
+        """Returns a value that changes whenever the backend is cleared."""
+        return self._generation
+
+    def set(self, key, value, expires_at, generation=None):
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class FileBackend:
+    """
+    Stores cached values as JSON files in a directory shared by all worker
+    processes; a directory under /dev/shm keeps them in shared memory.
+    A file's modification time is its last use, so the least recently used
+    files are removed once there are more than `max_entries`. The generation
+    file holds a new random token after each clear.
+    """
+
+    shared = True
+
+    def __init__(self, directory, max_entries):
+        self.directory = directory
+        self.max_entries = max_entries
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        name = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{name}.json")
+
+    def get(self, key):
+        """Returns the value stored for key, or None if it is missing or expired."""
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                entry = json.load(f)
+            if entry["expires_at"] <= time.time():
+                os.remove(path)
+                return None
+            os.utime(path)
+        except (OSError, ValueError, KeyError):
+            return None
+        return entry["value"]
+
+    def _replace(self, path, write):
+        # Written to a temporary file first, so readers never see a partial file.
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            write(f)
+        os.replace(temp_path, path)
+
+    def generation(self):
+        """Returns a value that changes whenever the backend is cleared."""
+        try:
+            with open(os.path.join(self.directory, "generation"), encoding="utf-8") as f:
+                return f.read()
+        except OSError:
+            return ""
+
+    def set(self, key, value, expires_at, generation=None):
+        path = self._path(key)
+        self._replace(path, lambda f: json.dump({"expires_at": expires_at, "value": value}, f))
+        # Checked after writing: a clear either changed the generation
+        # already, or removes the file after changing it.
+        if generation is not None and generation != self.generation():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return
+        self._evict()
+
+    def _files(self):
+        return [e for e in os.scandir(self.directory) if e.name.endswith(".json")]
+
+    def _evict(self):
+        files = self._files()
+        if len(files) <= self.max_entries:
+            return
+        files.sort(key=lambda e: e.stat().st_mtime)
+        for entry in files[:len(files) - self.max_entries]:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+    def clear(self):
+        # Another process may clear at the same time, so the generation is a
+        # new random token rather than a counter.
+        token = uuid.uuid4().hex
+        self._replace(os.path.join(self.directory, "generation"), lambda f: f.write(token))
+        for entry in self._files():
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+    def __len__(self):
+        return len(self._files())
+
+
+class ResultCache:
+    """
+    A cache of query results with a time to live, stored in a pluggable
+    backend (MemoryBackend or FileBackend). Values must be JSON
+    serializable. Counts hits and misses of this process.
+    """
+
+    def __init__(self, backend, ttl):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = Lock()
+
+    def get(self, key):
+        """Returns the value cached for key, or None."""
+        value = self.backend.get(key) if self.backend is not None else None
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def generation(self):
+        """Returns the generation of the cache, which changes whenever it is cleared.
+
+        Read it before running the query whose result is put, and pass it to
+        put(): a result a concurrent write made stale is then not cached.
+        """
+        return self.backend.generation() if self.backend is not None else None
+
+    def put(self, key, value, generation=None):
+        """Caches a value for key, unless the cache was cleared since `generation`."""
+        if self.backend is not None:
+            self.backend.set(key, value, time.time() + self.ttl, generation)
+
+    def clear(self):
+        """Drops every cached result, e.g. after the library has changed."""
+        if self.backend is not None:
+            self.backend.clear()
+
+    def clear_local(self):
+        """Drops every cached result unless the backend is shared with other processes.
+
+        Used when another process has changed the library; it clears a
+        shared backend itself.
+        """
+        if self.backend is not None and not self.backend.shared:
+            self.backend.clear()
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self.backend) if self.backend is not None else 0,
+        }
+
+
+def cache_key(*parts):
+    """Returns a key for a result, e.g. cache_key("search", queries, limit, offset).
+
+    Dicts such as the normalized queries from parse_search_queries() are
+    serialized with sorted keys, so equal queries give equal keys.
+    """
+    return json.dumps(parts, sort_keys=True, default=str)
+
+
+def _backend():
+    if search_cache_backend == "memory":
+        return MemoryBackend(search_cache_max_entries)
+    if search_cache_backend == "file":
+        directory = search_cache_dir or os.path.join(tempfile.gettempdir(), "search-cache")
+        return FileBackend(directory, search_cache_max_entries)
+    # "none" disables the cache
+    return None
+
+
+# Search results (citation IDs of a page), result counts and facet counts
+search_results = ResultCache(_backend(), search_cache_ttl)
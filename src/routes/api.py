@@ -0,0 +1,198 @@
+import json
+
+from flask import Response, jsonify, request, url_for
+
+from entities.citation import Citation
+from repositories.citation_repository import (DEFAULT_PER_PAGE, count_citations, get_citation,
+                                              get_citation_json, get_citations_json_page,
+                                              get_citations_page, search_citations,
+                                              search_citations_json)
+from repositories.search_index_repository import refresh_suggestion_index
+from result_cache import search_results
+from routes.citations import MAX_PER_PAGE
+from suggestions import SUGGESTION_KINDS, suggestion_index
+from util import parse_search_queries
+
+FORMATS = ("json", "bibtex")
+
+# Number of suggestions returned by /api/suggest by default and at most
+DEFAULT_SUGGESTIONS = 10
+MAX_SUGGESTIONS = 50
+
+
+def _error(message, status=400):
+    return jsonify({"error": message}), status
+
+
+def _per_page():
+    per_page = request.args.get("per_page", DEFAULT_PER_PAGE, type=int)
+    return min(max(per_page, 1), MAX_PER_PAGE)
+
+
+def _projection():
+    """Parses the comma separated `fields` parameter; None if it is not given."""
+    if "fields" not in request.args:
+        return None
+    names = (name.strip().lower() for name in request.args["fields"].split(","))
+    return [name for name in names if name]
+
+
+def _page_url(**cursor):
+    """Returns the URL of the current endpoint with the cursor replaced."""
+    args = request.args.to_dict()
+    for name in ("after", "before", "cursor"):
+        args.pop(name, None)
+    args.update(cursor)
+    return url_for(request.endpoint, **request.view_args, **args)
+
+
+def _links(prev_cursor, next_cursor, name_prev, name_next):
+    """Returns a Link header pointing to the adjacent pages."""
+    links = []
+    if prev_cursor is not None:
+        links.append(f'<{_page_url(**{name_prev: prev_cursor})}>; rel="prev"')
+    if next_cursor is not None:
+        links.append(f'<{_page_url(**{name_next: next_cursor})}>; rel="next"')
+    return {"Link": ", ".join(links)} if links else {}
+
+
+def _json_page(citations_json, headers, **meta):
+    """Writes a page of citations already serialized by the database."""
+    body = '{"citations": [' + ", ".join(citations_json) + "], " + json.dumps(meta)[1:]
+    return Response(body, mimetype="application/json", headers=headers)
+
+
+def _bibtex_page(page, headers, projection):
+    if projection is not None:
+        page = [_project(c, projection) for c in page]
+    body = "".join(c.to_bibtex() + "\n\n" for c in page)
+    return Response(body, mimetype="application/x-bibtex", headers=headers)
+
+
+def _project(found, projection):
+    """Returns a copy of a citation with only the projected fields."""
+    fields = {k: v for k, v in found.fields.items() if k in projection}
+    return Citation(found.id, found.entry_type, found.citation_key, fields)
+
+
+def citations():
+    """Returns one page of citations, paged with the `after` and `before` cursors."""
+    after = request.args.get("after", type=int)
+    before = request.args.get("before", type=int)
+    per_page = _per_page()
+    projection = _projection()
+    output = request.args.get("format", "json")
+    if output not in FORMATS:
+        return _error(f"Unknown format '{output}'")
+
+    try:
+        if output == "bibtex":
+            page, prev_cursor, next_cursor = get_citations_page(
+                after=after, before=before, per_page=per_page, projection=projection,
+                rendered=("bibtex",) if projection is None else ())
+        else:
+            page, prev_cursor, next_cursor = get_citations_json_page(
+                after=after, before=before, per_page=per_page, projection=projection)
+    except ValueError as e:
+        return _error(str(e))
+
+    headers = _links(prev_cursor, next_cursor, "before", "after")
+    if output == "bibtex":
+        return _bibtex_page(page, headers, projection)
+    return _json_page(
+        page, headers, prev_cursor=prev_cursor, next_cursor=next_cursor, per_page=per_page)
+
+
+def citation(citation_id):
+    """Returns a single citation."""
+    projection = _projection()
+    output = request.args.get("format", "json")
+    if output not in FORMATS:
+        return _error(f"Unknown format '{output}'")
+
+    try:
+        if output == "bibtex":
+            found = get_citation(citation_id)
+            if found and projection is not None:
+                found = _project(found, projection)
+            body = found.to_bibtex() + "\n" if found else None
+        else:
+            body = get_citation_json(citation_id, projection)
+    except ValueError as e:
+        return _error(str(e))
+
+    if body is None:
+        return _error("Citation not found", 404)
+    mimetype = "application/x-bibtex" if output == "bibtex" else "application/json"
+    return Response(body, mimetype=mimetype)
+
+
+def search():
+    """Returns one page of the citations matching the search queries.
+
+    Takes the parameters of the search page. Results are paged with the
+    `cursor` parameter, the position of the first result on the page.
+    """
+    queries = parse_search_queries(request.args)
+    offset = max(request.args.get("cursor", 0, type=int), 0)
+    per_page = _per_page()
+    projection = _projection()
+    output = request.args.get("format", "json")
+    if output not in FORMATS:
+        return _error(f"Unknown format '{output}'")
+
+    try:
+        if output == "bibtex":
+            page = search_citations(
+                queries, projection=projection,
+                rendered=("bibtex",) if projection is None else (),
+                limit=per_page + 1, offset=offset)
+        else:
+            page = search_citations_json(
+                queries, projection=projection, limit=per_page + 1, offset=offset)
+    except ValueError as e:
+        return _error(str(e))
+
+    next_cursor = offset + per_page if len(page) > per_page else None
+    prev_cursor = max(offset - per_page, 0) if offset > 0 else None
+    page = page[:per_page]
+
+    headers = _links(prev_cursor, next_cursor, "cursor", "cursor")
+    if output == "bibtex":
+        return _bibtex_page(page, headers, projection)
+    total, total_exact = count_citations(queries)
+    return _json_page(
+        page, headers, prev_cursor=prev_cursor, next_cursor=next_cursor, per_page=per_page,
+        total=total, total_exact=total_exact)
+
+
+def suggest():
+    """Returns the authors, citation keys or venues starting with a prefix.
+
+    Takes `field` (author, citation_key or venue), `prefix` and `limit`.
+    Names and venues match at the start of any of their words. While the
+    suggestions are being built, `ready` is false and they may be
+    incomplete, so responses are not cached.
+    """
+    field = request.args.get("field", "author")
+    if field not in SUGGESTION_KINDS:
+        return _error(f"Unknown field '{field}'")
+    limit = request.args.get("limit", DEFAULT_SUGGESTIONS, type=int)
+    limit = min(max(limit, 1), MAX_SUGGESTIONS)
+
+    refresh_suggestion_index()
+    suggestions = suggestion_index.suggest(field, request.args.get("prefix", ""), limit)
+    response = jsonify({
+        "field": field,
+        "suggestions": [{"value": value, "count": count} for value, count in suggestions],
+        "ready": suggestion_index.ready,
+    })
+    response.headers["Cache-Control"] = "no-store"
+    return response
+
+
+def cache_stats():
+    """Returns the hit and miss counters of the search result cache of this process."""
+    response = jsonify({"search_results": search_results.stats()})
+    response.headers["Cache-Control"] = "no-store"
+    return response
@@ -0,0 +1,71 @@
+from urllib.parse import urlsplit
+
+from flask import flash, redirect, request, url_for
+from sqlalchemy.exc import SQLAlchemyError
+
+import util
+from repositories.citation_repository import (delete_citations,
+                                              set_citations_entry_type,
+                                              set_citations_field)
+from repositories.entry_type_repository import get_entry_type
+
+
+def _redirect_back():
+    """Redirects to the page the bulk form was posted from."""
+    next_url = request.form.get("next", "")
+    # Only local paths are accepted to avoid an open redirect. Browsers
+    # read a backslash as a slash, so "/\evil.com" leaves the site too.
+    parts = urlsplit(next_url)
+    if (parts.scheme or parts.netloc or "\\" in next_url
+            or not next_url.startswith("/")):
+        next_url = url_for("citations_view")
+    return redirect(next_url)
+
+
+def _apply(action, ids, queries):
+    """Runs the bulk action and returns a message describing the result."""
+    if action == "delete":
+        count = delete_citations(ids=ids, queries=queries)
+        return f"Deleted {count} citation(s)."
+
+    if action == "set_field":
+        field = util.collapse_whitespace(request.form.get("field", "")).lower()
+        value = util.sanitize(request.form.get("value", ""))
+        count = set_citations_field(field, value, ids=ids, queries=queries)
+        if not value:
+            return f"Removed field '{field}' from {count} citation(s)."
+        return f"Set field '{field}' on {count} citation(s)."
+
+    if action == "set_entry_type":
+        entry_type = get_entry_type(request.form.get("entry_type_id"))
+        if not entry_type:
+            raise ValueError("Entry type was not found.")
+        count = set_citations_entry_type(
+            entry_type.id, ids=ids, queries=queries)
+        return f"Changed entry type of {count} citation(s) to '{entry_type.name}'."
+
+    raise ValueError(f"Unknown bulk action: {action!r}")
+
+
+def post():
+    """Applies a bulk action to the selected or all matching citations."""
+    # pylint: disable=R0801
+    ids = None
+    queries = None
+
+    if request.form.get("scope") == "search":
+        queries = util.parse_search_queries(request.form)
+    else:
+        ids = request.form.getlist("ids", type=int)
+        if not ids:
+            flash("No citations selected.", "error")
+            return _redirect_back()
+
+    try:
+        message = _apply(request.form.get("action"), ids, queries)
+        flash(message, "success")
+    except (ValueError, TypeError, SQLAlchemyError) as e:
+        flash(
+            f"An error occurred while updating the citations: {str(e)}", "error")
+
+    return _redirect_back()
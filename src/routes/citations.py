@@ -1,9 +1,29 @@
-from flask import render_template
+from flask import render_template, request
 
-from repositories.citation_repository import get_citations
+from entities.citation import SUMMARY_FIELDS
+from repositories.citation_repository import DEFAULT_PER_PAGE, get_citations_page
+from repositories.entry_type_repository import get_entry_types
+
+MAX_PER_PAGE = 200
 
 
 def get():
-    """Renders the citations page showing all saved citations."""
-    citations = get_citations()
-    return render_template("citations.html", citations=citations)
+    """Renders one page of saved citations with links to the adjacent pages."""
+    after = request.args.get("after", type=int)
+    before = request.args.get("before", type=int)
+    per_page = request.args.get("per_page", DEFAULT_PER_PAGE, type=int)
+    per_page = min(max(per_page, 1), MAX_PER_PAGE)
+
+    citations, prev_cursor, next_cursor = get_citations_page(
+        after=after, before=before, per_page=per_page,
+        projection=SUMMARY_FIELDS, rendered=("human_readable",))
+
+    return render_template(
+        "citations.html",
+        citations=citations,
+        prev_cursor=prev_cursor,
+        next_cursor=next_cursor,
+        per_page=per_page,
+        paged=after is not None or before is not None,
+        entry_types=get_entry_types(),
+    )
@@ -8,8 +8,10 @@ def post(citation_id):
     """Handles the deletion of a specific citation by its ID"""
     # pylint: disable=R0801
     try:
-        delete_citation(citation_id)
-        flash("Citation deleted successfully.", "success")
+        if delete_citation(citation_id):
+            flash("Citation deleted successfully.", "success")
+        else:
+            flash("Citation not found.", "error")
     except (ValueError, TypeError, SQLAlchemyError) as e:
         flash(
             f"An error occurred while deleting the citation: {str(e)}", "error")
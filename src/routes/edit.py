@@ -14,12 +14,6 @@ def get(citation_id):
 def post(citation_id):
     """Handles the submission of the edit citation form."""
     # pylint: disable=R0801
-    citation = get_citation(citation_id)
-
-    if not citation:
-        flash("Citation not found.", "error")
-        return redirect(url_for("citations_view"))
-
     citation_key = request.form.get("citation_key", "")
 
     # Collapsing whitespace for citation key only, since it should not contain any spaces.
@@ -36,15 +30,23 @@ def post(citation_id):
         return redirect(url_for("index"))
 
     try:
-        update_citation(
+        citation = update_citation(
             citation_id=citation_id,
             citation_key=sanitized_citation_key,
             fields=posted_fields
         )
+        if not citation:
+            flash("Citation not found.", "error")
+            return redirect(url_for("citations_view"))
         flash("Citation updated successfully.", "success")
     except (ValueError, TypeError, SQLAlchemyError) as e:
         flash(
             f"An error occurred while updating the citation: {str(e)}", "error")
         return redirect(url_for("citations_view"))
 
-    return redirect(url_for("citations_view", _anchor=f"{citation_id}-{sanitized_citation_key}"))
+    # Start the listing at the edited citation so that the anchor is on the page.
+    return redirect(url_for(
+        "citations_view",
+        after=citation.id - 1,
+        _anchor=f"{citation.id}-{citation.citation_key}"
+    ))
@@ -0,0 +1,19 @@
+from flask import Response, request, stream_with_context
+
+from repositories.citation_repository import iter_citations
+from util import parse_search_queries
+
+
+def get():
+    """Streams all citations matching the search queries as a .bib file."""
+    queries = parse_search_queries(request.args) or {}
+
+    def generate():
+        for citation in iter_citations(queries, rendered=("bibtex",)):
+            yield citation.to_bibtex() + "\n\n"
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="application/x-bibtex",
+        headers={"Content-Disposition": "attachment; filename=citations.bib"},
+    )
@@ -0,0 +1,33 @@
+import io
+
+from flask import flash, redirect, render_template, request, url_for
+from sqlalchemy.exc import SQLAlchemyError
+
+from bibtex_import import import_bibtex
+
+
+def get():
+    """Renders the BibTeX import page."""
+    return render_template("import.html", result=None)
+
+
+def post():
+    """Handles the upload of a .bib file and imports its entries."""
+    upload = request.files.get("bibfile")
+    if not upload or not upload.filename:
+        flash("No file selected.", "error")
+        return redirect(url_for("import_view"))
+
+    # The upload is decoded and parsed incrementally instead of read at once.
+    # UnicodeDecodeError is a ValueError, so invalid UTF-8 is reported below.
+    stream = io.TextIOWrapper(upload.stream, encoding="utf-8")
+
+    try:
+        result = import_bibtex(stream)
+    except (ValueError, TypeError, SQLAlchemyError) as e:
+        flash(
+            f"An error occurred while importing the citations: {str(e)}", "error")
+        return redirect(url_for("import_view"))
+
+    flash(f"Imported {result['imported']} citation(s).", "success")
+    return render_template("import.html", result=result)
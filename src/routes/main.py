@@ -1,4 +1,5 @@
 from flask import flash, redirect, render_template, request, session, url_for
+from markupsafe import Markup
 from sqlalchemy.exc import SQLAlchemyError
 
 import util
@@ -57,9 +58,15 @@ def post():
         return redirect(url_for("index"))
 
     try:
-        create_citation(entry_type.get("id"),
-                        sanitized_citation_key, posted_fields)
-        flash("A new citation was added successfully!", "success")
+        citation = create_citation(entry_type.get("id"),
+                                   sanitized_citation_key, posted_fields)
+        link = url_for(
+            "citations_view",
+            after=citation.id - 1,
+            _anchor=f"{citation.id}-{citation.citation_key}"
+        )
+        flash(Markup('A new citation was added successfully! <a href="{}">View it</a>')
+              .format(link), "success")
     except (ValueError, TypeError, SQLAlchemyError) as e:
         flash(
             f"An error occurred while adding the citation: {str(e)}", "error")
@@ -1,19 +1,37 @@
 from flask import render_template, request
 
-from repositories.citation_repository import search_citations
+from entities.citation import SUMMARY_FIELDS
+from repositories.citation_repository import (DEFAULT_PER_PAGE, count_citations,
+                                              search_citations)
 from repositories.entry_type_repository import get_entry_types
+from repositories.facet_repository import YEAR_FACET_WIDTH, get_search_facets
+from routes.citations import MAX_PER_PAGE
 from util import parse_search_queries
 
 
 def get():
-    """Renders the search page and handles search queries."""
+    """Renders the search page and one page of the results of the search queries."""
     queries = parse_search_queries(request.args) or {}
+    page = max(request.args.get("page", 1, type=int), 1)
+    per_page = request.args.get("per_page", DEFAULT_PER_PAGE, type=int)
+    per_page = min(max(per_page, 1), MAX_PER_PAGE)
 
-    citations = search_citations(queries)
+    # One extra row tells whether there is a next page.
+    citations = search_citations(
+        queries, projection=SUMMARY_FIELDS, rendered=("human_readable",),
+        limit=per_page + 1, offset=(page - 1) * per_page)
+    total, total_exact = count_citations(queries)
+    facets = get_search_facets(queries) if citations else None
     entry_types = get_entry_types()
 
     return render_template(
         "search.html",
-        citations=citations,
+        citations=citations[:per_page],
+        total=total,
+        total_exact=total_exact,
+        page=page,
+        has_next=len(citations) > per_page,
+        facets=facets,
+        year_facet_width=YEAR_FACET_WIDTH,
         entry_types=entry_types
     )
@@ -47,5 +47,10 @@ def json_citations():
     if ensurance:
         return ensurance
 
-    citations = get_citations()
+    citations = []
+    page = get_citations()
+    while page:
+        citations.extend(page)
+        page = get_citations(after=page[-1].id)
+
     return jsonify([citation.to_dict() for citation in citations])
@@ -0,0 +1,669 @@
+import json
+import re
+import sys
+from bisect import bisect_left, insort
+from collections import Counter
+from itertools import chain, groupby, islice
+from operator import itemgetter
+from threading import RLock
+
+from config import search_index_enabled
+
+# Words as pg_trgm and, for ordinary text, the 'simple' text search
+# configuration split them: runs of letters and digits, lowercased.
+_WORD_RE = re.compile(r"[^\W_]+")
+
+# The year is the first four-digit number of the year field, as in the year_int column.
+_YEAR_RE = re.compile(r"[0-9]{4}")
+
+# Terms of a websearch_to_tsquery() query: an optional "-" and a quoted phrase or a word
+_QUERY_TERM_RE = re.compile(r'(-?)(?:"([^"]*)"?|([^\s"]+))')
+
+# Default of pg_trgm.word_similarity_threshold, the limit of the <% operator
+WORD_SIMILARITY_THRESHOLD = 0.6
+
+# Fields matched by substring or by similarity, see search_query.search_filters()
+TRIGRAM_FIELDS = ("citation_key", "author")
+
+
+def words(text):
+    """Returns the lowercased words of a string."""
+    return [sys.intern(word) for word in _WORD_RE.findall(text.lower())]
+
+
+def trigrams(text):
+    """Returns the trigrams of a string in order, as pg_trgm extracts them.
+
+    Each word is padded with two spaces in front and one behind.
+    """
+    result = []
+    for word in words(text):
+        padded = f"  {word} "
+        result.extend(padded[i:i + 3] for i in range(len(padded) - 2))
+    return result
+
+
+def word_similarity(query, text):
+    """Returns pg_trgm's word_similarity(query, text).
+
+    It is the greatest similarity between the trigrams of `query` and those
+    of a continuous extent of the trigrams of `text`.
+    """
+    wanted = set(trigrams(query))
+    sequence = trigrams(text)
+    best = 0.0
+    for lower, first in enumerate(sequence):
+        if first not in wanted:
+            continue
+        seen = set()
+        shared = 0
+        for trigram in sequence[lower:]:
+            if trigram not in seen:
+                seen.add(trigram)
+                shared += trigram in wanted
+            if trigram in wanted:
+                best = max(best, shared / (len(wanted) + len(seen) - shared))
+    return best
+
+
+def _as_text(value):
+    """Returns a field value as text, like the ->> operator."""
+    if value is None or isinstance(value, str):
+        return value
+    return json.dumps(value)
+
+
+def _values(value):
+    """Yields the string and number values of a JSON value, like jsonb_to_tsvector()."""
+    if isinstance(value, dict):
+        for item in value.values():
+            yield from _values(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from _values(item)
+    elif isinstance(value, str):
+        yield value
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        yield json.dumps(value)
+
+
+def _like(pattern):
+    """Returns a function telling whether a lowercased text matches ILIKE '%pattern%'.
+
+    In the pattern _ matches any character, % any text, and a backslash
+    escapes the next character.
+    """
+    if not any(c in pattern for c in "%_\\"):
+        return lambda text: pattern in text
+
+    parts = []
+    escaped = False
+    for c in pattern:
+        if escaped or c not in "%_\\":
+            parts.append(re.escape(c))
+            escaped = False
+        elif c == "\\":
+            escaped = True
+        else:
+            parts.append(".*" if c == "%" else ".")
+    regex = re.compile("".join(parts), re.DOTALL)
+    return lambda text: regex.search(text) is not None
+
+
+def _query_terms(query):
+    """Parses a full-text query the way websearch_to_tsquery() does.
+
+    Returns a list of alternatives (separated by "or"), each a list of
+    (negated, words) terms that must all hold. A term of several words is a
+    phrase; its words must follow each other in the same field value.
+    """
+    alternatives = [[]]
+    for match in _QUERY_TERM_RE.finditer(query):
+        negated, phrase, word = match.groups()
+        if phrase is None and not negated and word.lower() == "or":
+            alternatives.append([])
+            continue
+        terms = tuple(words(word if phrase is None else phrase))
+        if terms:
+            alternatives[-1].append((bool(negated), terms))
+    return [terms for terms in alternatives if terms]
+
+
+def _has_phrase(values, phrase):
+    n = len(phrase)
+    return any(
+        value[i:i + n] == phrase
+        for value in values
+        for i in range(len(value) - n + 1)
+    )
+
+
+def _rank(values, wanted):
+    """Counts the occurrences of the wanted words, which stands in for ts_rank()."""
+    return sum(word in wanted for value in values for word in value)
+
+
+def _to_int(value):
+    try:
+        return int(value) if value not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _set_bit(bits, i):
+    if i >> 3 >= len(bits):
+        bits.extend(bytes((i >> 3) - len(bits) + 1))
+    bits[i >> 3] |= 1 << (i & 7)
+
+
+def _clear_bit(bits, i):
+    if i >> 3 < len(bits):
+        bits[i >> 3] &= ~(1 << (i & 7)) & 0xFF
+
+
+def _has_bit(bits, i):
+    return i >> 3 < len(bits) and bits[i >> 3] >> (i & 7) & 1
+
+
+def discard(items, item):
+    """Removes an item from a sorted list."""
+    i = bisect_left(items, item)
+    if i < len(items) and items[i] == item:
+        del items[i]
+
+
+def _descending(pairs):
+    """Yields the IDs of sorted (value, id) pairs by value descending and ID ascending."""
+    for _, group in groupby(reversed(pairs), key=itemgetter(0)):
+        yield from reversed([citation_id for _, citation_id in group])
+
+
+class _Document:  # pylint: disable=R0903
+    """What the index keeps of a citation."""
+
+    __slots__ = ("entry_type", "citation_key", "year", "texts", "values")
+
+    def __init__(self, citation):
+        fields = citation.fields or {}
+        year = _as_text(fields.get("year"))
+        match = _YEAR_RE.search(year) if year else None
+
+        self.entry_type = citation.entry_type
+        self.citation_key = citation.citation_key
+        self.year = int(match.group()) if match else None
+        # Lowercased texts of the fields in TRIGRAM_FIELDS that are set
+        texts = {"citation_key": citation.citation_key, "author": _as_text(fields.get("author"))}
+        self.texts = {field: text.lower() for field, text in texts.items() if text is not None}
+        # Words of each string and number in the fields, for full-text search
+        self.values = tuple(tuple(words(value)) for value in _values(fields))
+
+
+class IncrementalIndex:  # pylint: disable=R0902
+    """
+    Base of the in-memory indexes kept in step with the citations table.
+    Subclasses hold the data in the attributes named by _DATA, set up by
+    _clear() and changed by _insert(), _remove() and _sort_bulk().
+
+    A new or wholly invalidated index is `stale` and is built with
+    rebuild(), meant to run off the request path: the new data is read
+    without holding the lock and swapped in at the end. Writes made
+    meanwhile are queued and read again afterwards. Citations marked by
+    invalidate() and invalidate_new() are read by refresh(), which is
+    cheap enough to run before a request unless `loading_new`: an import
+    can create any number of citations.
+
+    The index only answers while it is `ready`, i.e. nothing is pending.
+    A disabled index never becomes ready.
+    """
+
+    # Attributes holding the data of the index, swapped in by rebuild()
+    _DATA = ()
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self._lock = RLock()
+        self._stale = True
+        self._rebuilding = False
+        self._reload = set()
+        self._load_new = False
+        self._last_id = 0
+        # IDs written during each refresh() in progress, see refresh()
+        self._loads = []
+        self._clear()
+
+    def _clear(self):
+        raise NotImplementedError
+
+    def _insert(self, citation, bulk=False):
+        """Adds a citation that is not in the index. With `bulk`, sorted data
+        may be left unsorted until _sort_bulk() is called."""
+        raise NotImplementedError
+
+    def _remove(self, citation_id):
+        """Drops a citation from the index, if it is there."""
+        raise NotImplementedError
+
+    def _sort_bulk(self):
+        """Sorts what _insert() left unsorted during a bulk insert."""
+
+    @property
+    def ready(self):
+        """True when the index is enabled and up to date, so it can answer."""
+        return self.enabled and not (
+            self._stale or self._rebuilding or self._loads or self._reload or self._load_new)
+
+    @property
+    def stale(self):
+        """True when the index has to be built with rebuild() and no rebuild is running."""
+        return self.enabled and self._stale and not self._rebuilding
+
+    @property
+    def loading_new(self):
+        """True when refresh() has to read the citations marked by invalidate_new()."""
+        return self.enabled and self._load_new and not (self._stale or self._rebuilding)
+
+    def _written(self, citation_id):
+        """Records a write; returns False if the data is about to be replaced anyway."""
+        if self._stale:
+            return False
+        if self._rebuilding:
+            self._reload.add(citation_id)
+            return False
+        for written in self._loads:
+            written.add(citation_id)
+        return True
+
+    def add(self, citation):
+        """Adds a citation to the index, replacing the earlier version of it."""
+        if not self.enabled:
+            return
+        with self._lock:
+            if self._written(citation.id):
+                self._remove(citation.id)
+                self._insert(citation)
+                self._last_id = max(self._last_id, citation.id)
+
+    def remove(self, citation_id):
+        if not self.enabled:
+            return
+        with self._lock:
+            if self._written(citation_id):
+                self._remove(citation_id)
+
+    def invalidate(self, ids=None):
+        """Marks the citations with the given IDs to be read again by refresh().
+
+        Without IDs the whole index is stale and has to be rebuilt.
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            if ids is None:
+                self._stale = True
+            else:
+                self._reload.update(int(i) for i in ids)
+
+    def invalidate_new(self):
+        """Marks the citations created after the last indexed one to be read by refresh()."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._load_new = True
+
+    def rebuild(self, load):
+        """Builds a stale index again from every citation.
+
+        `load(after=0)` must return every citation with an ID greater than
+        `after`. The citations are read into a new index and swapped in, so
+        the lock is only held for the swap. Does nothing unless the index is
+        `stale`, so concurrent calls build it once.
+        """
+        with self._lock:
+            if not self.stale:
+                return
+            self._stale = False
+            self._rebuilding = True
+            self._reload.clear()
+            self._load_new = False
+
+        try:
+            built = type(self)()
+            built._bulk_insert(load(after=0))  # pylint: disable=W0212
+        except BaseException:
+            with self._lock:
+                self._stale = True
+                self._rebuilding = False
+            raise
+
+        with self._lock:
+            for name in (*self._DATA, "_last_id"):
+                setattr(self, name, getattr(built, name))
+            self._rebuilding = False
+
+    def refresh(self, load):
+        """Reads the citations marked by invalidate() and invalidate_new().
+
+        `load(ids=None, after=0)` must return the citations with the given
+        IDs, or without IDs, every citation with an ID greater than `after`.
+        The lock is not held while reading; citations written meanwhile are
+        newer than what was read and are left as they are. A stale index is
+        left to rebuild().
+        """
+        if not self.enabled or self.ready:
+            return
+        with self._lock:
+            if self._stale or self._rebuilding or not (self._reload or self._load_new):
+                return
+            ids = sorted(self._reload)
+            after = self._last_id if self._load_new else None
+            self._reload.clear()
+            self._load_new = False
+            written = set()
+            self._loads.append(written)
+
+        try:
+            citations = list(load(ids=ids)) if ids else []
+            if after is not None:
+                citations.extend(load(after=after))
+        except BaseException:
+            with self._lock:
+                self._loads.remove(written)
+                self._reload.update(ids)
+                self._load_new = self._load_new or after is not None
+            raise
+
+        with self._lock:
+            self._loads.remove(written)
+            if self._stale or self._rebuilding:
+                return
+            for citation_id in ids:
+                if citation_id not in written:
+                    self._remove(citation_id)
+            self._bulk_insert(c for c in citations if c.id not in written)
+
+    def _bulk_insert(self, citations):
+        # Sorted data is sorted once after inserting, instead of per citation.
+        for citation in citations:
+            self._remove(citation.id)
+            self._insert(citation, bulk=True)
+            self._last_id = max(self._last_id, citation.id)
+        self._sort_bulk()
+
+
+class SearchIndex(IncrementalIndex):  # pylint: disable=R0902
+    """
+    An in-memory index of the citations that answers searches with the same
+    filters and order as the SQL queries of search_citations():
+
+      - an inverted index from the words of the field values to citations,
+        for the full-text query `q`
+      - per field in TRIGRAM_FIELDS, an index from words to citations and
+        from trigrams to words, for substring and fuzzy matches
+      - (year, id) pairs sorted by year, for year ranges and sorting
+      - (citation_key, id) pairs sorted by key, for sorting
+      - a bitmap of citation IDs per entry type
+
+    Relevance is approximated: full-text matches are ordered by how often
+    the query words occur instead of ts_rank(). Keys are sorted by code
+    point, which is the database order under the C collation.
+
+    See IncrementalIndex for how the index is kept up to date.
+    """
+
+    _DATA = ("_documents", "_ids", "_postings", "_words", "_trigrams", "_years", "_undated",
+             "_keys", "_entry_types")
+
+    def _clear(self):
+        self._documents = {}
+        self._ids = []
+        self._postings = {}
+        self._words = {field: {} for field in TRIGRAM_FIELDS}
+        self._trigrams = {field: {} for field in TRIGRAM_FIELDS}
+        self._years = []
+        self._undated = []
+        self._keys = []
+        self._entry_types = {}
+
+    def __len__(self):
+        return len(self._documents)
+
+    def _sort_bulk(self):
+        for items in (self._ids, self._undated, self._years, self._keys):
+            items.sort()
+
+    def _insert(self, citation, bulk=False):
+        citation_id = citation.id
+        document = self._documents[citation_id] = _Document(citation)
+        add = list.append if bulk else insort
+        add(self._ids, citation_id)
+
+        for token in {token for value in document.values for token in value}:
+            self._postings.setdefault(token, set()).add(citation_id)
+
+        for field, text in document.texts.items():
+            for word in set(words(text)):
+                ids = self._words[field].get(word)
+                if ids is None:
+                    ids = self._words[field][word] = set()
+                    for trigram in set(trigrams(word)):
+                        self._trigrams[field].setdefault(trigram, set()).add(word)
+                ids.add(citation_id)
+
+        if document.year is None:
+            add(self._undated, citation_id)
+        else:
+            add(self._years, (document.year, citation_id))
+        add(self._keys, (document.citation_key, citation_id))
+        _set_bit(self._entry_types.setdefault(document.entry_type, bytearray()), citation_id)
+
+    def _remove(self, citation_id):
+        document = self._documents.pop(citation_id, None)
+        if document is None:
+            return
+        discard(self._ids, citation_id)
+
+        for token in {token for value in document.values for token in value}:
+            ids = self._postings[token]
+            ids.discard(citation_id)
+            if not ids:
+                del self._postings[token]
+
+        for field, text in document.texts.items():
+            for word in set(words(text)):
+                ids = self._words[field][word]
+                ids.discard(citation_id)
+                if ids:
+                    continue
+                del self._words[field][word]
+                for trigram in set(trigrams(word)):
+                    self._trigrams[field][trigram].discard(word)
+                    if not self._trigrams[field][trigram]:
+                        del self._trigrams[field][trigram]
+
+        if document.year is None:
+            discard(self._undated, citation_id)
+        else:
+            discard(self._years, (document.year, citation_id))
+        discard(self._keys, (document.citation_key, citation_id))
+        _clear_bit(self._entry_types[document.entry_type], citation_id)
+
+    def search(self, queries, limit=None, offset=0):
+        """Returns the IDs of the citations matching the search queries.
+
+        Takes the queries of parse_search_queries() and orders the results
+        like search_order_by(). `limit` and `offset` select a slice.
+        """
+        offset = offset if isinstance(offset, int) and offset > 0 else 0
+        stop = offset + limit if isinstance(limit, int) and limit > 0 else None
+        with self._lock:
+            candidates, bits, similarity = self._filter(queries)
+            ordered = self._ordered(queries, candidates, bits, similarity)
+            return list(islice(ordered, offset, stop))
+
+    def count(self, queries):
+        """Returns the number of citations matching the search queries."""
+        with self._lock:
+            candidates, bits, _ = self._filter(queries)
+            if candidates is None:
+                if bits is None:
+                    return len(self._documents)
+                return int.from_bytes(bits, "little").bit_count()
+            if bits is None:
+                return len(candidates)
+            return sum(1 for citation_id in candidates if _has_bit(bits, citation_id))
+
+    def _filter(self, queries):
+        """Applies the filters of the search queries.
+
+        Returns a tuple (candidates, bits, similarity). `candidates` is a set
+        of IDs, or None when only the entry type filters the citations. The
+        entry type is applied by testing `bits`, the bitmap of the entry type,
+        which is None without an entry type. `similarity` maps the IDs of
+        fuzzy matches to the sum of their word similarities.
+        """
+        matches = []
+        similarity = None
+
+        if queries.get("q"):
+            matches.append(self._full_text(queries["q"]))
+
+        for field in TRIGRAM_FIELDS:
+            if not queries.get(field):
+                continue
+            if queries.get("fuzzy"):
+                similar = self._similar(field, queries[field])
+                similarity = Counter(similar) + (similarity or Counter())
+                matches.append(similar.keys())
+            else:
+                matches.append(self._containing(field, queries[field]))
+
+        year_from = _to_int(queries.get("year_from"))
+        year_to = _to_int(queries.get("year_to"))
+        if year_from or year_to:
+            matches.append(self._year_range(year_from, year_to))
+
+        bits = None
+        if queries.get("entry_type"):
+            bits = self._entry_types.get(queries["entry_type"], bytearray())
+
+        if not matches:
+            return None, bits, similarity
+        matches.sort(key=len)
+        return set(matches[0]).intersection(*matches[1:]), bits, similarity
+
+    def _ordered(self, queries, candidates, bits, similarity):
+        """Returns an iterable of the matching IDs in the order of search_order_by()."""
+        sort_by = (queries.get("sort_by") or "").lower()
+        descending = (queries.get("direction") or "ASC").upper() == "DESC"
+        documents = self._documents
+
+        if candidates is None:
+            if sort_by == "year":
+                ordered = (chain(self._undated, _descending(self._years)) if descending
+                           else chain(map(itemgetter(1), self._years), self._undated))
+            elif sort_by == "citation_key":
+                ordered = (_descending(self._keys) if descending
+                           else map(itemgetter(1), self._keys))
+            else:
+                ordered = self._ids
+            if bits is None:
+                return ordered
+            return (citation_id for citation_id in ordered if _has_bit(bits, citation_id))
+
+        matched = sorted(candidates if bits is None else
+                         (citation_id for citation_id in candidates if _has_bit(bits, citation_id)))
+
+        # Sorting is stable, so equal values stay in ID order in both directions.
+        if sort_by == "year":
+            # Citations without a year come last, or first when descending, like NULLs.
+            matched.sort(key=lambda i: (documents[i].year is None, documents[i].year or 0),
+                         reverse=descending)
+        elif sort_by == "citation_key":
+            matched.sort(key=lambda i: documents[i].citation_key, reverse=descending)
+        elif similarity:
+            matched.sort(key=similarity.get, reverse=True)
+        elif queries.get("q"):
+            wanted = {word for terms in _query_terms(queries["q"])
+                      for negated, phrase in terms if not negated for word in phrase}
+            matched.sort(key=lambda i: _rank(documents[i].values, wanted), reverse=True)
+        return matched
+
+    def _term(self, phrase):
+        """Returns the IDs of the citations containing a word or phrase."""
+        postings = sorted((self._postings.get(word, set()) for word in phrase), key=len)
+        ids = postings[0].intersection(*postings[1:])
+        if len(phrase) == 1:
+            return ids
+        return {i for i in ids if _has_phrase(self._documents[i].values, phrase)}
+
+    def _full_text(self, query):
+        """Returns the IDs of the citations matching a websearch_to_tsquery() query."""
+        result = set()
+        for terms in _query_terms(query):
+            wanted = sorted((self._term(phrase) for negated, phrase in terms if not negated),
+                            key=len)
+            matched = wanted[0].intersection(*wanted[1:]) if wanted else set(self._documents)
+            for negated, phrase in terms:
+                if negated:
+                    matched -= self._term(phrase)
+            result |= matched
+        return result
+
+    def _containing(self, field, pattern):
+        """Returns the IDs of the citations whose field matches ILIKE '%pattern%'."""
+        pattern = pattern.lower()
+        matches = _like(pattern)
+        documents = self._documents
+        index = self._words[field]
+
+        # The longest word of the pattern is part of a word of every match.
+        literal = max((word for part in re.split(r"[%_\\]", pattern) for word in words(part)),
+                      key=len, default="")
+        if not literal:
+            ids = [i for i, document in documents.items() if field in document.texts]
+        else:
+            vocabulary = index.keys()
+            if len(literal) >= 3:
+                vocabulary = sorted(
+                    (self._trigrams[field].get(literal[i:i + 3], set())
+                     for i in range(len(literal) - 2)),
+                    key=len)
+                vocabulary = vocabulary[0].intersection(*vocabulary[1:])
+            ids = {i for word in vocabulary if literal in word for i in index[word]}
+        return {i for i in ids if matches(documents[i].texts[field])}
+
+    def _similar(self, field, query):
+        """Returns the similarities of the citations whose field is similar to the query.
+
+        Matches are those with a word_similarity() of at least the threshold.
+        A match shares at least that share of the query's trigrams with the
+        words of its field, so only citations that do are compared.
+        """
+        wanted = set(trigrams(query))
+        shared_by_word = Counter()
+        for trigram in wanted:
+            shared_by_word.update(self._trigrams[field].get(trigram, ()))
+
+        shared = Counter()
+        for word, count in shared_by_word.items():
+            for citation_id in self._words[field][word]:
+                shared[citation_id] += count
+
+        result = {}
+        for citation_id, count in shared.items():
+            if count < WORD_SIMILARITY_THRESHOLD * len(wanted):
+                continue
+            similarity = word_similarity(query, self._documents[citation_id].texts[field])
+            if similarity >= WORD_SIMILARITY_THRESHOLD:
+                result[citation_id] = similarity
+        return result
+
+    def _year_range(self, year_from, year_to):
+        """Returns the IDs of the citations with a year in the range; either end may be None."""
+        lower = bisect_left(self._years, (year_from,)) if year_from else 0
+        upper = bisect_left(self._years, (year_to + 1,)) if year_to else len(self._years)
+        return {citation_id for _, citation_id in self._years[lower:upper]}
+
+
+# Index answering searches in this process instead of the database, see SEARCH_INDEX
+library_index = SearchIndex(search_index_enabled)
@@ -12,11 +12,17 @@ VALUES (
 -- Query examples
 -- Find all articles from year 2020
 SELECT c.* FROM citations c JOIN entry_types t ON t.id = c.entry_type_id
-WHERE t.name = 'article' AND c.fields->>'year' = '2020';
+WHERE t.name = 'article' AND c.year_int = 2020;
 
 -- Find citations that contain a specific JSON fragment (containment)
 SELECT * FROM citations WHERE fields @> '{"publisher":"OUP"}'::jsonb;
 
+-- Full-text search over field values, most relevant first
+SELECT id, citation_key, ts_rank(search_vector, websearch_to_tsquery('simple', 'survey ML')) AS rank
+FROM citations
+WHERE search_vector @@ websearch_to_tsquery('simple', 'survey ML')
+ORDER BY rank DESC;
+
 -- Update JSON fields (add or overwrite a key)
 UPDATE citations SET fields = fields || '{"publisher":"OUP"}'::jsonb WHERE citation_key = 'Smith2020';
 
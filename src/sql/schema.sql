@@ -1,4 +1,6 @@
 -- Dropping existing tables if they exist to avoid conflicts
+DROP TABLE IF EXISTS library_version;
+DROP TABLE IF EXISTS citation_renders;
 DROP TABLE IF EXISTS citations;
 DROP TABLE IF EXISTS entry_types;
 DROP TABLE IF EXISTS default_fields;
@@ -17,9 +19,52 @@ CREATE TABLE citations (
   id SERIAL PRIMARY KEY,
   entry_type_id INTEGER REFERENCES entry_types(id),
   citation_key TEXT NOT NULL,
-  fields JSONB NOT NULL DEFAULT '{}'::jsonb
+  fields JSONB NOT NULL DEFAULT '{}'::jsonb,
+  -- Full-text document over the string and numeric field values (keys are not included)
+  search_vector TSVECTOR GENERATED ALWAYS AS (
+    jsonb_to_tsvector('simple', fields, '["string", "numeric"]')
+  ) STORED,
+  -- Year parsed leniently: first four-digit number in the year field ("2020a" -> 2020, "in press" -> NULL)
+  year_int INTEGER GENERATED ALWAYS AS (
+    (substring(fields->>'year' FROM '[0-9]{4}'))::int
+  ) STORED
 );
 
+-- This is for storing the rendered forms of each citation, so that lists and
+-- exports do not format every row again. Rows are written with the citation;
+-- a citation without one is formatted on the fly until it is backfilled.
+CREATE TABLE citation_renders (
+  citation_id INTEGER PRIMARY KEY REFERENCES citations(id) ON DELETE CASCADE,
+  bibtex TEXT NOT NULL,
+  human_readable TEXT NOT NULL,
+  compact TEXT NOT NULL
+);
+
+-- This is for storing a counter that changes whenever the library does. Read
+-- routes derive their ETags from it. It has a single row.
+CREATE TABLE library_version (
+  id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+  version BIGINT NOT NULL DEFAULT 1
+);
+
+-- Bumps the library version once per writing statement. The row is created
+-- if it is missing, e.g. after the table has been truncated.
+CREATE OR REPLACE FUNCTION bump_library_version() RETURNS trigger AS $$
+BEGIN
+  INSERT INTO library_version (id, version) VALUES (TRUE, 1)
+  ON CONFLICT (id) DO UPDATE SET version = library_version.version + 1;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER citations_bump_library_version
+  AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON citations
+  FOR EACH STATEMENT EXECUTE FUNCTION bump_library_version();
+
+CREATE TRIGGER entry_types_bump_library_version
+  AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON entry_types
+  FOR EACH STATEMENT EXECUTE FUNCTION bump_library_version();
+
 -- This is for storing predefined field names (e.g., title, author, year)
 CREATE TABLE default_fields (
   id SERIAL PRIMARY KEY,
@@ -33,16 +78,77 @@ CREATE TABLE default_entry_fields (
   PRIMARY KEY (entry_type_id, default_field_id)
 );
 
+-- Tells the listening app processes which rows changed, so that they can evict
+-- them from their caches. One notification is sent per writing statement with
+-- the IDs of up to 500 changed rows; without IDs, everything in the table may
+-- have changed. default_entry_fields is cached as a whole and sends no IDs.
+CREATE OR REPLACE FUNCTION notify_library_change() RETURNS trigger AS $$
+DECLARE
+  ids INTEGER[];
+BEGIN
+  IF TG_OP <> 'TRUNCATE' AND TG_TABLE_NAME <> 'default_entry_fields' THEN
+    IF TG_OP = 'DELETE' THEN
+      SELECT array_agg(id) INTO ids FROM (SELECT id FROM old_rows LIMIT 501) changed;
+    ELSE
+      SELECT array_agg(id) INTO ids FROM (SELECT id FROM new_rows LIMIT 501) changed;
+    END IF;
+    IF ids IS NULL THEN
+      RETURN NULL;
+    END IF;
+  END IF;
+
+  PERFORM pg_notify('library_changes', json_build_object(
+    'table', TG_TABLE_NAME,
+    'ids', CASE WHEN cardinality(ids) <= 500 THEN ids END
+  )::text);
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Transition tables can only be declared on triggers for a single event.
+CREATE TRIGGER citations_notify_insert
+  AFTER INSERT ON citations REFERENCING NEW TABLE AS new_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION notify_library_change();
+CREATE TRIGGER citations_notify_update
+  AFTER UPDATE ON citations REFERENCING NEW TABLE AS new_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION notify_library_change();
+CREATE TRIGGER citations_notify_delete
+  AFTER DELETE ON citations REFERENCING OLD TABLE AS old_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION notify_library_change();
+CREATE TRIGGER citations_notify_truncate
+  AFTER TRUNCATE ON citations
+  FOR EACH STATEMENT EXECUTE FUNCTION notify_library_change();
+
+CREATE TRIGGER entry_types_notify_insert
+  AFTER INSERT ON entry_types REFERENCING NEW TABLE AS new_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION notify_library_change();
+CREATE TRIGGER entry_types_notify_update
+  AFTER UPDATE ON entry_types REFERENCING NEW TABLE AS new_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION notify_library_change();
+CREATE TRIGGER entry_types_notify_delete
+  AFTER DELETE ON entry_types REFERENCING OLD TABLE AS old_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION notify_library_change();
+CREATE TRIGGER entry_types_notify_truncate
+  AFTER TRUNCATE ON entry_types
+  FOR EACH STATEMENT EXECUTE FUNCTION notify_library_change();
+
+CREATE TRIGGER default_entry_fields_notify
+  AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON default_entry_fields
+  FOR EACH STATEMENT EXECUTE FUNCTION notify_library_change();
+
 
 -- Indices to improve query performance
 -- GIN index for fast jsonb containment queries on citation fields
 CREATE INDEX IF NOT EXISTS citations_fields_gin ON citations USING GIN (fields);
 
+-- GIN index for full-text search over the citation field values
+CREATE INDEX IF NOT EXISTS citations_search_vector_gin ON citations USING GIN (search_vector);
+
 -- Index for filtering by entry_type_id (useful when listing citations by type)
 CREATE INDEX IF NOT EXISTS citations_entry_type_idx ON citations (entry_type_id);
 
--- Expression index for commonly queried scalar inside the JSONB (e.g., year)
-CREATE INDEX IF NOT EXISTS citations_fields_year_idx ON citations ((fields->>'year'));
+-- B-tree index on the parsed year for year range filters and sorting
+CREATE INDEX IF NOT EXISTS citations_year_int_idx ON citations (year_int);
 
 -- Index to speed up lookups of which entry types reference a given default field
 CREATE INDEX IF NOT EXISTS default_entry_fields_by_field_idx ON default_entry_fields (default_field_id);
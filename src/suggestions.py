@@ -0,0 +1,120 @@
+import re
+from bisect import bisect_left, insort
+
+from search_index import IncrementalIndex, discard
+
+# Kinds of values suggested, see _suggested_values()
+SUGGESTION_KINDS = ("author", "citation_key", "venue")
+
+# Fields whose values are suggested as venues
+VENUE_FIELDS = ("journaltitle", "booktitle")
+
+# Separator of the names in a BibTeX author field
+_AUTHOR_SEPARATOR_RE = re.compile(r"\s+and\s+", re.IGNORECASE)
+
+# Words at whose start a value can be matched
+_WORD_RE = re.compile(r"[^\W_]+")
+
+
+def _normalized(value):
+    """Collapses the whitespace of a value."""
+    return " ".join(value.split()) if isinstance(value, str) else ""
+
+
+def _suggested_values(citation):
+    """Returns the distinct (kind, value) pairs a citation adds to the suggestions."""
+    fields = citation.fields or {}
+    values = {("citation_key", citation.citation_key)}
+    if isinstance(fields.get("author"), str):
+        for name in _AUTHOR_SEPARATOR_RE.split(fields["author"]):
+            values.add(("author", _normalized(name)))
+    for field in VENUE_FIELDS:
+        values.add(("venue", _normalized(fields.get(field))))
+    return tuple((kind, value) for kind, value in values if value)
+
+
+def _prefix_keys(kind, value):
+    """Returns the casefolded texts under which a value is found by prefix.
+
+    Citation keys are matched from their start, names and venues from the
+    start of any of their words, so "smi" finds "John Smith".
+    """
+    folded = value.casefold()
+    if kind == "citation_key":
+        return [folded]
+    return [folded[match.start():] for match in _WORD_RE.finditer(folded)] or [folded]
+
+
+class SuggestionIndex(IncrementalIndex):
+    """
+    The distinct author names, citation keys and venues (journal and book
+    titles) of the library, for completing what a user types. Per kind,
+    (text, value) pairs are kept in an array sorted by text, so the values
+    starting with a prefix are found by binary search. The number of
+    citations with each value is kept too, to drop a value with its last
+    citation.
+
+    See IncrementalIndex for how the index is kept up to date.
+    """
+
+    _DATA = ("_values", "_counts", "_entries")
+
+    def _clear(self):
+        self._values = {}
+        self._counts = {kind: {} for kind in SUGGESTION_KINDS}
+        self._entries = {kind: [] for kind in SUGGESTION_KINDS}
+
+    def __len__(self):
+        return len(self._values)
+
+    def _insert(self, citation, bulk=False):
+        pairs = self._values[citation.id] = _suggested_values(citation)
+        for kind, value in pairs:
+            counts = self._counts[kind]
+            counts[value] = counts.get(value, 0) + 1
+            if counts[value] > 1:
+                continue
+            entries = self._entries[kind]
+            for key in _prefix_keys(kind, value):
+                if bulk:
+                    entries.append((key, value))
+                else:
+                    insort(entries, (key, value))
+
+    def _remove(self, citation_id):
+        for kind, value in self._values.pop(citation_id, ()):
+            counts = self._counts[kind]
+            counts[value] -= 1
+            if counts[value]:
+                continue
+            del counts[value]
+            for key in _prefix_keys(kind, value):
+                discard(self._entries[kind], (key, value))
+
+    def _sort_bulk(self):
+        for entries in self._entries.values():
+            entries.sort()
+
+    def suggest(self, kind, prefix, limit):
+        """Returns up to `limit` (value, count) pairs of values of a kind
+        matching a prefix, ignoring case, in alphabetical order of the match.
+
+        `count` is the number of citations with the value. The work done is
+        bounded by the limit, not by the size of the library.
+        """
+        key = _normalized(prefix).casefold()
+        if not key or limit < 1:
+            return []
+        with self._lock:
+            entries = self._entries[kind]
+            counts = self._counts[kind]
+            found = {}
+            for i in range(bisect_left(entries, (key,)), len(entries)):
+                text, value = entries[i]
+                if not text.startswith(key) or len(found) == limit:
+                    break
+                found.setdefault(value, counts[value])
+            return list(found.items())
+
+
+suggestion_index = SuggestionIndex()
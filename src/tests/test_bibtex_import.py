@@ -0,0 +1,69 @@
+import io
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import bibtex_import
+
+
+class TestBibtexImport(unittest.TestCase):
+    @patch("bibtex_import.import_citations")
+    def test_import_bibtex_merges_parse_and_import_errors(self, mock_import):
+        def _consume(citations, batch_size):
+            keys = [c.citation_key for c in citations]
+            return {"imported": len(keys), "errors": [
+                {"citation_key": "x", "error": "Unknown entry type 'foo'"}]}
+
+        mock_import.side_effect = _consume
+
+        result = bibtex_import.import_bibtex(
+            "@misc{bad, title}\n@misc{ok, title={T}}", batch_size=10)
+
+        self.assertEqual(result["imported"], 1)
+        self.assertEqual(len(result["errors"]), 2)
+        self.assertEqual(result["errors"][0]["citation_key"], "bad")
+        self.assertIn("Line 1", result["errors"][0]["error"])
+        self.assertEqual(result["errors"][1]["citation_key"], "x")
+
+    @patch("bibtex_import.import_citations")
+    def test_import_bibtex_accepts_streams(self, mock_import):
+        mock_import.side_effect = lambda citations, batch_size: {
+            "imported": len(list(citations)), "errors": []}
+
+        result = bibtex_import.import_bibtex(
+            io.StringIO("@misc{a, title={A}}\n@misc{b, title={B}}"))
+
+        self.assertEqual(result, {"imported": 2, "errors": []})
+
+    @patch("bibtex_import.import_citations")
+    def test_import_bibtex_file_parses_in_parallel(self, mock_import):
+        mock_import.side_effect = lambda citations, batch_size: {
+            "imported": len(list(citations)), "errors": []}
+
+        with tempfile.NamedTemporaryFile(
+                "w", suffix=".bib", delete=False, encoding="utf-8") as f:
+            f.write("@misc{a, title={A}}\n@misc{b, title}\n")
+            path = f.name
+
+        try:
+            result = bibtex_import.import_bibtex_file(path, workers=2)
+        finally:
+            os.unlink(path)
+
+        self.assertEqual(result["imported"], 1)
+        self.assertEqual(result["errors"][0]["citation_key"], "b")
+
+    @patch("bibtex_import.import_bibtex_file")
+    def test_main_imports_file_and_reports(self, mock_import):
+        mock_import.return_value = {"imported": 2, "errors": []}
+
+        with patch("builtins.print") as mock_print:
+            bibtex_import.main(["library.bib", "--batch-size", "5"])
+
+        mock_import.assert_called_once_with(
+            "library.bib", batch_size=5, workers=os.cpu_count())
+        mock_print.assert_called_with("Imported 2 citation(s), 0 error(s)")
+
+if __name__ == "__main__":
+    unittest.main()
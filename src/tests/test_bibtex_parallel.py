@@ -0,0 +1,82 @@
+import os
+import random
+import tempfile
+import unittest
+
+from entities.bibtex_parallel import _split_ranges, parse_bibtex_file
+from entities.bibtex_parser import parse_bibtex
+from tests.test_bibtex_parser import _random_citation
+
+
+class TestBibtexParallel(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(42)
+        parts = ["@comment{Merged {bibliography}}\n"]
+        for i in range(200):
+            parts.append(_random_citation(rng).to_bibtex())
+            if i == 50:
+                parts.append("@misc{broken, title}")
+            if i == 120:
+                parts.append('@string{venue = "Late Venue"}')
+        parts.append("@misc{uses-macro, booktitle = venue # { 2025}}")
+        self.text = "\n\n".join(parts) + "\n"
+
+        with tempfile.NamedTemporaryFile(
+                "w", suffix=".bib", delete=False, encoding="utf-8") as f:
+            f.write(self.text)
+            self.path = f.name
+
+    def tearDown(self):
+        os.unlink(self.path)
+
+    def test_matches_sequential_parse_in_file_order(self):
+        sequential_errors = []
+        sequential = list(parse_bibtex(self.text, errors=sequential_errors))
+
+        errors = []
+        parallel = list(parse_bibtex_file(
+            self.path, errors=errors, workers=2, range_size=2048))
+
+        self.assertEqual([c.to_dict() for c in parallel],
+                         [c.to_dict() for c in sequential])
+        self.assertEqual([(e.line, e.citation_key, str(e)) for e in errors],
+                         [(e.line, e.citation_key, str(e))
+                          for e in sequential_errors])
+
+    def test_macros_are_broadcast_to_all_ranges(self):
+        macros = {}
+        citations = list(parse_bibtex_file(
+            self.path, errors=[], macros=macros, workers=2, range_size=2048))
+
+        self.assertEqual(citations[-1].fields["booktitle"], "Late Venue 2025")
+        self.assertEqual(macros["venue"], "Late Venue")
+
+    def test_raises_first_error_without_error_list(self):
+        with self.assertRaises(ValueError):
+            list(parse_bibtex_file(self.path, workers=2, range_size=2048))
+
+    def test_single_worker_parses_sequentially(self):
+        citations = list(parse_bibtex_file(self.path, errors=[], workers=1))
+        self.assertEqual(len(citations), 201)
+
+    def test_empty_file(self):
+        with open(self.path, "w", encoding="utf-8"):
+            pass
+        self.assertEqual(list(parse_bibtex_file(self.path, workers=2)), [])
+
+    def test_split_ranges_only_at_top_level_entries(self):
+        data = (b"@misc{a, note = {x\n@misc{inside, note = {y}}}}\n"
+                b"@misc{b, note = {z}}\n")
+
+        ranges = _split_ranges(data, 4)
+
+        self.assertEqual(ranges[0][0], 0)
+        self.assertEqual(ranges[-1][1], len(data))
+        starts = [start for start, _, _ in ranges]
+        self.assertNotIn(data.index(b"@misc{inside"), starts)
+        self.assertIn(data.index(b"@misc{b"), starts)
+        self.assertEqual(ranges[-1][2], 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
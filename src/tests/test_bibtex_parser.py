@@ -0,0 +1,171 @@
+import io
+import random
+import string
+import unittest
+
+from entities.bibtex_parser import BibtexParseError, parse_bibtex, parse_string_definition
+from entities.citation import Citation
+
+
+def _random_value(rng, depth=0):
+    """Returns a random brace-balanced field value."""
+    alphabet = string.ascii_letters + string.digits + " ,.;:'\"@#=()-\n\\"
+    parts = []
+    for _ in range(rng.randint(0, 4)):
+        if depth < 2 and rng.random() < 0.2:
+            parts.append("{" + _random_value(rng, depth + 1) + "}")
+        else:
+            parts.append("".join(rng.choice(alphabet)
+                         for _ in range(rng.randint(0, 12))))
+    return "".join(parts)
+
+
+def _random_citation(rng):
+    entry_type = rng.choice(["article", "book", "misc", "inproceedings"])
+    key = "".join(rng.choice(string.ascii_letters + string.digits + ":-_/")
+                  for _ in range(rng.randint(1, 16)))
+    names = ["author", "title", "year", "journaltitle", "note", "pages",
+             "abstract", "file", "x_custom"]
+    fields = {name: _random_value(rng)
+              for name in rng.sample(names, rng.randint(0, len(names)))}
+    return Citation(None, entry_type, key, fields)
+
+
+class TestBibtexParser(unittest.TestCase):
+    def test_parses_braced_quoted_and_bare_values(self):
+        text = """
+        @Article{doe2020,
+          Author = {Doe, {J}ohn},
+          title = "A {"}quoted{"} title",
+          year = 2020,
+        }
+        """
+
+        citations = list(parse_bibtex(text))
+
+        self.assertEqual(len(citations), 1)
+        c = citations[0]
+        self.assertIsNone(c.id)
+        self.assertEqual(c.entry_type, "article")
+        self.assertEqual(c.citation_key, "doe2020")
+        self.assertEqual(c.fields, {
+            "author": "Doe, {J}ohn",
+            "title": 'A {"}quoted{"} title',
+            "year": "2020",
+        })
+
+    def test_parses_parenthesized_entries(self):
+        citations = list(parse_bibtex("@book(k1, title = {T (1)})"))
+        self.assertEqual(citations[0].citation_key, "k1")
+        self.assertEqual(citations[0].fields, {"title": "T (1)"})
+
+    def test_skips_comments_and_text_between_entries(self):
+        text = """
+        Some free text @comment{ignored {nested}}
+        @misc{k1, note = {n1}}
+        @preamble{"\\newcommand{\\x}{y}"}
+        @misc{k2, note = {n2}}
+        """
+        keys = [c.citation_key for c in parse_bibtex(text)]
+        self.assertEqual(keys, ["k1", "k2"])
+
+    def test_collects_errors_and_continues(self):
+        text = "@misc{bad, title}\n@misc{ , title={x}}\n@misc{ok, title={T}}\n"
+        errors = []
+
+        citations = list(parse_bibtex(text, errors=errors))
+
+        self.assertEqual([c.citation_key for c in citations], ["ok"])
+        self.assertEqual(len(errors), 2)
+        self.assertEqual(errors[0].citation_key, "bad")
+        self.assertEqual(errors[0].line, 1)
+        self.assertIn("Line 2", str(errors[1]))
+
+    def test_raises_without_error_list(self):
+        with self.assertRaises(BibtexParseError):
+            list(parse_bibtex("@misc{k, title = {unbalanced}"))
+
+    def test_unterminated_entry_is_reported(self):
+        errors = []
+        text = "@misc{ok, title={T}}\n\n@book{k, title = {x}"
+        citations = list(parse_bibtex(text, errors=errors))
+        self.assertEqual(len(citations), 1)
+        self.assertEqual(errors[0].line, 3)
+
+    def test_to_bibtex_output_parses_back(self):
+        text = "@book{k-bib,\n  author = {A1},\n  title = {T1}\n}"
+        c = next(parse_bibtex(text))
+        self.assertEqual(c.to_bibtex(), text)
+
+    def test_round_trip_property(self):
+        rng = random.Random(20251017)
+        originals = [_random_citation(rng) for _ in range(300)]
+        text = "\n\n".join(c.to_bibtex() for c in originals)
+
+        for chunk_size in (1, 7, 4096):
+            parsed = list(parse_bibtex(io.StringIO(text), chunk_size=chunk_size))
+            self.assertEqual(
+                [c.to_dict() for c in parsed],
+                [c.to_dict() for c in originals]
+            )
+
+    def test_string_macros_and_concatenation(self):
+        text = """
+        @String{acm = "ACM Press"}
+        @string(pre = {Proc. of })
+        @inproceedings{k1,
+          publisher = acm,
+          booktitle = pre # "the " # {Conf},
+          month = jan,
+          series = undefined,
+          year = 1999
+        }
+        """
+        c = next(parse_bibtex(text))
+        self.assertEqual(c.fields, {
+            "publisher": "ACM Press",
+            "booktitle": "Proc. of the Conf",
+            "month": "January",
+            "series": "undefined",
+            "year": "1999",
+        })
+
+    def test_macros_argument_is_used_and_updated(self):
+        macros = {"ieee": "IEEE"}
+        text = "@string{x = {X}}\n@misc{k, publisher = ieee # x}"
+        c = next(parse_bibtex(text, macros=macros))
+        self.assertEqual(c.fields["publisher"], "IEEEX")
+        self.assertEqual(macros, {"ieee": "IEEE", "x": "X"})
+
+    def test_parse_string_definition(self):
+        macros = {"a": "A"}
+        self.assertTrue(parse_string_definition("@string{x = a # {X}} @misc{k}", macros))
+        self.assertEqual(macros, {"a": "A", "x": "AX"})
+
+        self.assertFalse(parse_string_definition("@string{y = {Y", macros))
+        self.assertNotIn("y", macros)
+        with self.assertRaises(ValueError):
+            parse_string_definition("@string{y = }", macros)
+
+    def test_reads_file_like_objects_in_chunks(self):
+        text = "@comment{x @misc{no}}\n@misc{k1, note = {a {b} c}}\n@book{k2, title = {T}}"
+
+        for chunk_size in range(1, 12):
+            stream = io.StringIO(text)
+            keys = [c.citation_key for c in parse_bibtex(stream, chunk_size=chunk_size)]
+            self.assertEqual(keys, ["k1", "k2"])
+
+    def test_reports_lines_across_chunks(self):
+        text = "\n\n@misc{k1, note = {a}}\n\n@misc{k2, note}\n"
+        errors = []
+        list(parse_bibtex(io.StringIO(text), errors=errors, chunk_size=3))
+        self.assertEqual(errors[0].line, 5)
+
+    def test_missing_comma_between_fields(self):
+        errors = []
+        list(parse_bibtex("@misc{k, a = {1} b = {2}}", errors=errors))
+        self.assertIn("expected ','", str(errors[0]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,25 @@
+import unittest
+
+import app  # registers the routes used by url_for
+from config import app as flask_app
+from routes.bulk import _redirect_back
+
+
+class TestRedirectBack(unittest.TestCase):
+    def redirect_location(self, next_url):
+        with flask_app.test_request_context(
+                "/citations/bulk", method="POST", data={"next": next_url}):
+            return _redirect_back().location
+
+    def test_redirects_to_local_path(self):
+        self.assertEqual(self.redirect_location("/search?author=bob"), "/search?author=bob")
+
+    def test_rejects_other_sites(self):
+        for next_url in ("", "search", "//evil.com", "/\\evil.com", "\\\\evil.com",
+                         "https://evil.com/", "/\\/evil.com"):
+            with self.subTest(next_url=next_url):
+                self.assertEqual(self.redirect_location(next_url), "/citations")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,181 @@
+import json
+import unittest
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import cache_sync
+
+
+def notification(table, ids=None):
+    return json.dumps({"table": table, "ids": ids})
+
+
+@patch("cache_sync.search_results")
+@patch("cache_sync.citation_rows")
+@patch("cache_sync.entry_fields_repository")
+@patch("cache_sync.entry_type_repository")
+class TestHandleNotification(unittest.TestCase):
+    def test_changed_citations_are_evicted(self, entry_types, entry_fields, rows, results):
+        cache_sync.handle_notification(notification("citations", [3, 5]))
+
+        rows.invalidate.assert_called_once_with([3, 5])
+        rows.clear.assert_not_called()
+        results.clear_local.assert_called_once()
+        entry_types.invalidate_cache.assert_not_called()
+        entry_fields.invalidate_cache.assert_not_called()
+
+    @patch("cache_sync.library_index")
+    def test_changed_citations_are_read_again_by_search_index(
+            self, index, _entry_types, _entry_fields, _rows, _results):
+        cache_sync.handle_notification(notification("citations", [3, 5]))
+        index.invalidate.assert_called_once_with([3, 5])
+
+        cache_sync.handle_notification(notification("entry_types", [1]))
+        index.invalidate.assert_called_with()
+
+    @patch("cache_sync.suggestion_index")
+    def test_changed_citations_are_read_again_by_suggestions(
+            self, suggestions, _entry_types, _entry_fields, _rows, _results):
+        cache_sync.handle_notification(notification("citations", [3, 5]))
+        suggestions.invalidate.assert_called_once_with([3, 5])
+
+        cache_sync.handle_notification(notification("entry_types", [1]))
+        suggestions.invalidate.assert_called_once()
+
+    def test_without_ids_all_rows_are_dropped(self, _entry_types, _entry_fields, rows, results):
+        cache_sync.handle_notification(notification("citations"))
+
+        rows.invalidate.assert_not_called()
+        rows.clear.assert_called_once()
+        results.clear_local.assert_called_once()
+
+    def test_entry_type_change_drops_rows_and_searches(
+            self, entry_types, entry_fields, rows, results):
+        cache_sync.handle_notification(notification("entry_types", [1]))
+
+        entry_types.invalidate_cache.assert_called_once()
+        rows.clear.assert_called_once()
+        results.clear_local.assert_called_once()
+        entry_fields.invalidate_cache.assert_not_called()
+
+    def test_default_entry_fields_change(self, entry_types, entry_fields, rows, results):
+        cache_sync.handle_notification(notification("default_entry_fields"))
+
+        entry_fields.invalidate_cache.assert_called_once()
+        entry_types.invalidate_cache.assert_not_called()
+        rows.clear.assert_not_called()
+        results.clear_local.assert_not_called()
+
+    def test_malformed_payload_drops_everything(self, entry_types, entry_fields, rows, results):
+        cache_sync.handle_notification("{not json")
+
+        entry_types.invalidate_cache.assert_called_once()
+        entry_fields.invalidate_cache.assert_called_once()
+        rows.clear.assert_called_once()
+        results.clear_local.assert_called_once()
+
+
+class TestCacheListener(unittest.TestCase):
+    def setUp(self):
+        self.engine = MagicMock()
+        self.engine.dialect.loaded_dbapi.Error = type("DBAPIError", (Exception,), {})
+        self.listener = cache_sync.CacheListener(self.engine)
+        self.driver_connection = MagicMock()
+        self.driver_connection.notifies = []
+        self.connection = SimpleNamespace(driver_connection=self.driver_connection)
+
+    @patch("cache_sync.handle_notification")
+    @patch("cache_sync.select.select")
+    def test_listen_handles_pending_notifications(self, select, handle):
+        def poll():
+            self.driver_connection.notifies.extend([
+                SimpleNamespace(payload="a"), SimpleNamespace(payload="b")])
+        self.driver_connection.poll.side_effect = poll
+
+        def ready(*_args):
+            if select.call_count == 3:
+                self.listener.stop()
+            return ([self.driver_connection] if select.call_count == 1 else []), [], []
+        select.side_effect = ready
+
+        self.listener.listen(self.connection)
+
+        self.assertEqual([c.args[0] for c in handle.call_args_list], ["a", "b"])
+        self.assertEqual(self.driver_connection.notifies, [])
+        self.driver_connection.poll.assert_called_once()
+
+    @patch("cache_sync.invalidate_all")
+    @patch("cache_sync.select.select")
+    def test_reconnects_after_connection_is_lost(self, select, invalidate_all):
+        raw_connection = MagicMock()
+        raw_connection.driver_connection = self.driver_connection
+        self.engine.raw_connection.return_value = raw_connection
+
+        def lost(*_args):
+            if select.call_count == 2:
+                self.listener.stop()
+            raise OSError("connection lost")
+        select.side_effect = lost
+
+        with patch.object(cache_sync, "RECONNECT_SECONDS", 0):
+            self.listener.run()
+
+        self.assertEqual(self.engine.raw_connection.call_count, 2)
+        self.assertEqual(invalidate_all.call_count, 2)
+        raw_connection.detach.assert_called()
+        self.assertEqual(raw_connection.close.call_count, 2)
+        cursor = self.driver_connection.cursor.return_value.__enter__.return_value
+        cursor.execute.assert_called_with("LISTEN library_changes")
+
+
+@patch("cache_sync.start")
+class TestEnsureStarted(unittest.TestCase):
+    def setUp(self):
+        patcher = patch.dict(cache_sync._listener, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_starts_one_listener_per_process(self, start):
+        def started(_app, wait):
+            listener = MagicMock()
+            listener.is_alive.return_value = True
+            cache_sync._listener["thread"] = listener
+            return listener
+        start.side_effect = started
+
+        first = cache_sync.ensure_started("app")
+        self.assertIs(cache_sync.ensure_started("app"), first)
+        start.assert_called_once_with("app", wait=False)
+
+    def test_restarts_a_listener_that_died(self, start):
+        dead = MagicMock()
+        dead.is_alive.return_value = False
+        cache_sync._listener["thread"] = dead
+
+        self.assertIs(cache_sync.ensure_started("app"), start.return_value)
+
+
+@patch("cache_sync.db")
+@patch("cache_sync.CacheListener")
+class TestStart(unittest.TestCase):
+    def setUp(self):
+        patcher = patch.dict(cache_sync._listener, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_waits_for_the_listener_to_connect(self, listener_class, _db):
+        listener = cache_sync.start(MagicMock())
+
+        listener.start.assert_called_once()
+        listener.listening.wait.assert_called_once_with(cache_sync.RECONNECT_SECONDS)
+        self.assertIs(cache_sync._listener["thread"], listener_class.return_value)
+
+    def test_does_not_wait_without_wait(self, listener_class, _db):
+        cache_sync.start(MagicMock(), wait=False)
+
+        listener_class.return_value.start.assert_called_once()
+        listener_class.return_value.listening.wait.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,4 +1,6 @@
+import json
 import unittest
+from unittest.mock import patch
 
 from entities.citation import Citation
 
@@ -72,6 +74,48 @@ class TestCitationEntity(unittest.TestCase):
         self.assertIn("citation_key", r)
         self.assertIn("k7", r)
 
+    def test_fields_given_as_json_are_decoded_lazily(self):
+        with patch("entities.citation.json.loads", wraps=json.loads) as loads:
+            c = Citation(1, "misc", "k1", '{"title": "T", "year": "2001"}')
+            loads.assert_not_called()
+
+            self.assertEqual(c.entry_type, "misc")
+            self.assertEqual(c.citation_key, "k1")
+            loads.assert_not_called()
+
+            self.assertEqual(c.fields, {"title": "T", "year": "2001"})
+            self.assertIs(c.fields, c.fields)
+            loads.assert_called_once()
+
+    def test_invalid_json_fields_decode_to_empty_dict(self):
+        c = Citation(1, "misc", "k1", "not json")
+        self.assertEqual(c.fields, {})
+        self.assertEqual(c.to_human_readable(), "k1 (misc)")
+
+    def test_representations_are_memoized(self):
+        c = Citation(1, "article", "k1", {"title": "T", "author": "A"})
+
+        self.assertIs(c.to_bibtex(), c.to_bibtex())
+        self.assertIs(c.to_human_readable(), c.to_human_readable())
+        self.assertIs(c.to_compact(), c.to_compact())
+
+        with patch.object(Citation, "_format_container") as format_container:
+            c.to_human_readable()
+            format_container.assert_not_called()
+
+    def test_set_rendered_is_used_instead_of_formatting(self):
+        c = Citation(1, "misc", "k1", {"title": "T"})
+        c.set_rendered(human_readable="Stored.", bibtex=None)
+
+        self.assertEqual(c.to_human_readable(), "Stored.")
+        self.assertEqual(c.to_bibtex(), "@misc{k1,\n  title = {T}\n}")
+
+    def test_uses_slots(self):
+        c = Citation(1, "misc", "k1", {})
+        self.assertFalse(hasattr(c, "__dict__"))
+        with self.assertRaises(AttributeError):
+            c.extra = 1
+
 
 if __name__ == "__main__":
     unittest.main()
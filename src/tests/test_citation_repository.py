@@ -4,9 +4,26 @@ from types import SimpleNamespace
 from unittest.mock import MagicMock, patch
 
 import repositories.citation_repository as repo
+from entities.citation import SUMMARY_FIELDS
+from result_cache import search_results
+
+# A row as returned by the statements writing a citation
+WRITTEN_ROW = SimpleNamespace(
+    id=3, entry_type="misc", citation_key="k3", fields='{"title": "T"}', version="1")
 
 
 class TestCitationRepository(unittest.TestCase):
+    def setUp(self):
+        # Entry types are read from a process-wide cache backed by the database.
+        patcher = patch(
+            "repositories.citation_repository.get_entry_type",
+            side_effect=lambda entry_type_id: SimpleNamespace(
+                id=entry_type_id, name="misc"),
+        )
+        self.mock_get_entry_type = patcher.start()
+        self.addCleanup(patcher.stop)
+        search_results.clear()
+
     @patch("repositories.citation_repository.db")
     def test_get_citations_returns_citations_list(self, mock_db):
         rows = [
@@ -43,28 +60,49 @@ class TestCitationRepository(unittest.TestCase):
         self.assertEqual(citations, [])
 
     @patch("repositories.citation_repository.db")
-    def test_get_citations_with_paging(self, mock_db):
+    def test_get_citations_with_after_cursor(self, mock_db):
         rows = [
-            SimpleNamespace(id=1, entry_type="book",
-                            citation_key="k1", fields={"title": "T1"}),
-            SimpleNamespace(id=2, entry_type="article",
-                            citation_key="k2", fields={"title": "T2"}),
             SimpleNamespace(id=3, entry_type="misc",
                             citation_key="k3", fields={"title": "T3"}),
         ]
 
         mock_result = MagicMock()
-        mock_result.fetchall.return_value = [rows[1]]
+        mock_result.fetchall.return_value = rows
         mock_db.session.execute.return_value = mock_result
 
-        citations = repo.get_citations(page=2, per_page=1)
+        citations = repo.get_citations(after=2, per_page=1)
         self.assertEqual(len(citations), 1)
+        self.assertEqual(citations[0].id, 3)
 
-        # # UNNECESSARY. Here to satisfy type checker...
-        if not citations[0]:
-            self.fail("Citations should not be None")
+        args, kwargs = mock_db.session.execute.call_args
+        sql = str(args[0])
+        params = args[1]
+
+        self.assertIn("WHERE c.id > :after ORDER BY c.id ASC", sql)
+        self.assertNotIn("OFFSET", sql)
+        self.assertEqual(params["after"], 2)
+        self.assertEqual(params["limit"], 1)
+
+    @patch("repositories.citation_repository.db")
+    def test_get_citations_with_before_cursor_returns_ascending(self, mock_db):
+        rows = [
+            SimpleNamespace(id=4, entry_type="misc",
+                            citation_key="k4", fields={}),
+            SimpleNamespace(id=3, entry_type="misc",
+                            citation_key="k3", fields={}),
+        ]
+
+        mock_result = MagicMock()
+        mock_result.fetchall.return_value = rows
+        mock_db.session.execute.return_value = mock_result
 
-        self.assertEqual(citations[0].id, 2)
+        citations = repo.get_citations(before=5, after=1, per_page=2)
+        self.assertEqual([c.id for c in citations], [3, 4])
+
+        args, kwargs = mock_db.session.execute.call_args
+        self.assertIn("WHERE c.id < :before ORDER BY c.id DESC", str(args[0]))
+        self.assertEqual(args[1]["before"], 5)
+        self.assertNotIn("after", args[1])
 
     @patch("repositories.citation_repository.db")
     def test_get_citations_invalid_page_params(self, mock_db):
@@ -72,9 +110,110 @@ class TestCitationRepository(unittest.TestCase):
         mock_result.fetchall.return_value = []
         mock_db.session.execute.return_value = mock_result
 
-        citations = repo.get_citations(page="x", per_page="y")
+        citations = repo.get_citations(after="x", per_page="y")
         self.assertEqual(citations, [])
 
+        args, kwargs = mock_db.session.execute.call_args
+        self.assertNotIn("after", args[1])
+        self.assertEqual(args[1]["limit"], repo.DEFAULT_PER_PAGE)
+
+    @patch("repositories.citation_repository.get_citations")
+    def test_get_citations_page_first_page(self, mock_get):
+        mock_get.return_value = [
+            repo.Citation(i, "misc", f"k{i}", {}) for i in (1, 2, 3)]
+
+        citations, prev_cursor, next_cursor = repo.get_citations_page(
+            per_page=2)
+
+        mock_get.assert_called_once_with(
+            after=None, before=None, per_page=3, projection=None, rendered=())
+        self.assertEqual([c.id for c in citations], [1, 2])
+        self.assertIsNone(prev_cursor)
+        self.assertEqual(next_cursor, 2)
+
+    @patch("repositories.citation_repository.get_citations")
+    def test_get_citations_page_passes_projection(self, mock_get):
+        mock_get.return_value = []
+
+        repo.get_citations_page(
+            per_page=2, projection=("title",), rendered=("human_readable",))
+
+        mock_get.assert_called_once_with(
+            after=None, before=None, per_page=3,
+            projection=("title",), rendered=("human_readable",))
+
+    @patch("repositories.citation_repository.db")
+    def test_get_citations_selects_full_fields_without_projection(self, mock_db):
+        mock_db.session.execute.return_value.fetchall.return_value = []
+
+        repo.get_citations()
+
+        sql = str(mock_db.session.execute.call_args[0][0])
+        self.assertIn("c.fields", sql)
+        self.assertNotIn("jsonb_build_object", sql)
+
+    @patch("repositories.citation_repository.db")
+    def test_get_citations_with_projection_trims_fields(self, mock_db):
+        mock_db.session.execute.return_value.fetchall.return_value = [
+            SimpleNamespace(id=1, entry_type="article", citation_key="k1",
+                            fields={"title": "T"}),
+        ]
+
+        citations = repo.get_citations(projection=("title", "author", "title"))
+
+        sql = str(mock_db.session.execute.call_args[0][0])
+        self.assertIn(
+            "jsonb_strip_nulls(jsonb_build_object("
+            "'title', c.fields->'title', 'author', c.fields->'author'))::text AS fields",
+            sql)
+        self.assertEqual(citations[0].fields, {"title": "T"})
+
+    @patch("repositories.citation_repository.db")
+    def test_search_citations_with_projection_trims_fields(self, mock_db):
+        mock_db.session.execute.return_value.fetchall.return_value = []
+
+        repo.search_citations({"author": "bob"}, projection=SUMMARY_FIELDS)
+
+        sql = str(mock_db.session.execute.call_args[0][0])
+        self.assertIn("jsonb_build_object('author', c.fields->'author'", sql)
+        self.assertNotIn("abstract", sql)
+        self.assertIn("c.fields->>'author' ILIKE :author", sql)
+
+    def test_fields_column_projection(self):
+        self.assertEqual(repo._fields_column(), "c.fields")
+        self.assertEqual(repo._fields_column(()), "'{}'::jsonb")
+        for projection in (["title; DROP TABLE citations"], ["Title"], [None]):
+            with self.assertRaises(ValueError):
+                repo._fields_column(projection)
+
+    @patch("repositories.citation_repository.get_citations")
+    def test_get_citations_page_last_page(self, mock_get):
+        mock_get.return_value = [repo.Citation(5, "misc", "k5", {})]
+
+        citations, prev_cursor, next_cursor = repo.get_citations_page(
+            after=4, per_page=2)
+
+        self.assertEqual([c.id for c in citations], [5])
+        self.assertEqual(prev_cursor, 5)
+        self.assertIsNone(next_cursor)
+
+    @patch("repositories.citation_repository.get_citations")
+    def test_get_citations_page_before_cursor(self, mock_get):
+        mock_get.return_value = [
+            repo.Citation(i, "misc", f"k{i}", {}) for i in (2, 3, 4)]
+
+        citations, prev_cursor, next_cursor = repo.get_citations_page(
+            before=5, per_page=2)
+
+        self.assertEqual([c.id for c in citations], [3, 4])
+        self.assertEqual(prev_cursor, 3)
+        self.assertEqual(next_cursor, 4)
+
+    @patch("repositories.citation_repository.get_citations")
+    def test_get_citations_page_empty(self, mock_get):
+        mock_get.return_value = []
+        self.assertEqual(repo.get_citations_page(after=99), ([], None, None))
+
     @patch("repositories.citation_repository.db")
     def test_get_citation_returns_none_when_not_found(self, mock_db):
         mock_result = MagicMock()
@@ -119,6 +258,7 @@ class TestCitationRepository(unittest.TestCase):
 
     @patch("repositories.citation_repository.db")
     def test_update_citation_commits(self, mock_db):
+        mock_db.session.execute.return_value.fetchone.return_value = WRITTEN_ROW
         citation_id = 10
         entry_type_id = 2
         citation_key = "k10"
@@ -164,21 +304,23 @@ class TestCitationRepository(unittest.TestCase):
         self.assertEqual(citation.fields, {"title": "T42"})
 
     @patch("repositories.citation_repository.db")
-    def test_get_citations_single_param_no_paging(self, mock_db):
+    def test_get_citations_defaults_to_first_page(self, mock_db):
         rows = [SimpleNamespace(id=1, entry_type="book",
                                 citation_key="k1", fields={"title": "T1"})]
         mock_result = MagicMock()
         mock_result.fetchall.return_value = rows
         mock_db.session.execute.return_value = mock_result
 
-        citations = repo.get_citations(page=2)
+        citations = repo.get_citations()
         self.assertEqual(len(citations), 1)
 
-        citations = repo.get_citations(per_page=5)
-        self.assertEqual(len(citations), 1)
+        args, kwargs = mock_db.session.execute.call_args
+        self.assertNotIn("WHERE", str(args[0]))
+        self.assertIn("LIMIT :limit", str(args[0]))
 
     @patch("repositories.citation_repository.db")
     def test_update_citation_executes_update(self, mock_db):
+        mock_db.session.execute.return_value.fetchone.return_value = WRITTEN_ROW
         citation_id = 1
         entry_type_id = 2
         citation_key = "k4"
@@ -186,8 +328,7 @@ class TestCitationRepository(unittest.TestCase):
 
         repo.update_citation(citation_id, entry_type_id, citation_key, fields)
 
-        mock_db.session.execute.assert_called_once()
-        args, kwargs = mock_db.session.execute.call_args
+        args, kwargs = mock_db.session.execute.call_args_list[0]
         sql = args[0]
         params = args[1]
 
@@ -210,12 +351,12 @@ class TestCitationRepository(unittest.TestCase):
     @patch("repositories.citation_repository.db")
     def test_update_citation_partial_fields(self, mock_db):
         mock_result = MagicMock()
+        mock_result.fetchone.return_value = WRITTEN_ROW
         mock_db.session.execute.return_value = mock_result
 
         repo.update_citation(5, citation_key="only-key")
 
-        mock_db.session.execute.assert_called_once()
-        args, kwargs = mock_db.session.execute.call_args
+        args, kwargs = mock_db.session.execute.call_args_list[0]
         sql = args[0]
         params = args[1]
 
@@ -230,14 +371,15 @@ class TestCitationRepository(unittest.TestCase):
         mock_result.fetchall.return_value = []
         mock_db.session.execute.return_value = mock_result
 
-        repo.get_citations(page=3, per_page=5)
+        repo.get_citations(after=10, per_page=5)
 
         mock_db.session.execute.assert_called_once()
         args, kwargs = mock_db.session.execute.call_args
 
         params = args[1] if len(args) > 1 else kwargs.get("params", {})
         self.assertEqual(params.get("limit"), 5)
-        self.assertEqual(params.get("offset"), 10)
+        self.assertEqual(params.get("after"), 10)
+        self.assertNotIn("offset", params)
 
     @patch("repositories.citation_repository.db")
     def test_update_citation_with_falsy_values_noops(self, mock_db):
@@ -246,13 +388,13 @@ class TestCitationRepository(unittest.TestCase):
         mock_db.session.commit.assert_not_called()
 
     def test_to_citation_object_handles_none(self):
-        citation = repo._to_citation(None)
+        citation = repo.to_citation(None)
         self.assertIsNone(citation)
 
     def test_to_citation_object_handles_empty_fields(self):
         row = SimpleNamespace(
             id=3, entry_type="misc", citation_key="k3", fields=None)
-        citation = repo._to_citation(row)
+        citation = repo.to_citation(row)
         self.assertIsNotNone(citation)
 
         # # UNNECESSARY. Here to satisfy type checker...
@@ -291,7 +433,7 @@ class TestCitationRepository(unittest.TestCase):
         sql = args[0]
         params = args[1]
 
-        self.assertEqual(params["q"], "%alpha%")
+        self.assertEqual(params["q"], "alpha")
         self.assertEqual(params["citation_key"], "%ck%")
         self.assertEqual(params["entry_type"], "book")
         self.assertEqual(params["author"], "%Bob%")
@@ -300,8 +442,14 @@ class TestCitationRepository(unittest.TestCase):
 
         sql_str = str(sql)
         self.assertIn("WHERE", sql_str)
-        self.assertIn("(c.fields->>'year')::int", sql_str)
-        self.assertIn("ORDER BY (c.fields->>'year')::int DESC", sql_str)
+        self.assertIn(
+            "c.search_vector @@ websearch_to_tsquery('simple', :q)", sql_str)
+        self.assertIn("c.fields::text AS fields", sql_str)
+        self.assertNotIn("fields::text", sql_str.split("WHERE", 1)[1])
+        self.assertIn("c.year_int >= :year_from", sql_str)
+        self.assertIn("c.year_int <= :year_to", sql_str)
+        self.assertNotIn("::int", sql_str)
+        self.assertIn("ORDER BY c.year_int DESC", sql_str)
 
     @patch("repositories.citation_repository.db")
     def test_search_citations_handles_nonint_years(self, mock_db):
@@ -319,7 +467,7 @@ class TestCitationRepository(unittest.TestCase):
         params = args[1]
 
         self.assertNotIn("year_from", params)
-        self.assertEqual(params.get("q"), "%x%")
+        self.assertEqual(params.get("q"), "x")
         self.assertIn("ORDER BY c.citation_key ASC", str(sql))
 
     @patch("repositories.citation_repository.db")
@@ -338,7 +486,59 @@ class TestCitationRepository(unittest.TestCase):
 
         self.assertNotIn("q", params)
         self.assertEqual(params.get("year_from"), 2001)
-        self.assertIn("ORDER BY (c.fields->>'year')::int DESC", str(sql))
+        self.assertIn("ORDER BY c.year_int DESC", str(sql))
+
+    @patch("repositories.citation_repository.db")
+    def test_search_full_text_orders_by_rank_without_sort_by(self, mock_db):
+        mock_result = MagicMock()
+        mock_result.fetchall.return_value = []
+        mock_db.session.execute.return_value = mock_result
+
+        repo.search_citations({"q": "machine learning"})
+
+        args, kwargs = mock_db.session.execute.call_args
+        self.assertEqual(args[1]["q"], "machine learning")
+        self.assertIn(
+            "ORDER BY ts_rank(c.search_vector, "
+            "websearch_to_tsquery('simple', :q)) DESC, c.id ASC",
+            str(args[0])
+        )
+
+    @patch("repositories.citation_repository.db")
+    def test_search_fuzzy_uses_trigram_similarity(self, mock_db):
+        mock_result = MagicMock()
+        mock_result.fetchall.return_value = []
+        mock_db.session.execute.return_value = mock_result
+
+        queries = {"citation_key": "smtih", "author": "jonh", "fuzzy": True}
+        repo.search_citations(queries)
+
+        args, kwargs = mock_db.session.execute.call_args
+        sql_str = str(args[0])
+        params = args[1]
+
+        self.assertEqual(params["citation_key"], "smtih")
+        self.assertEqual(params["author"], "jonh")
+        self.assertIn(":citation_key <% c.citation_key", sql_str)
+        self.assertIn(":author <% (c.fields->>'author')", sql_str)
+        self.assertNotIn("ILIKE", sql_str)
+        self.assertIn(
+            "ORDER BY word_similarity(:citation_key, c.citation_key) + "
+            "word_similarity(:author, c.fields->>'author') DESC",
+            sql_str
+        )
+
+    @patch("repositories.citation_repository.db")
+    def test_search_fuzzy_respects_explicit_sort(self, mock_db):
+        mock_result = MagicMock()
+        mock_result.fetchall.return_value = []
+        mock_db.session.execute.return_value = mock_result
+
+        repo.search_citations(
+            {"author": "jonh", "fuzzy": True, "sort_by": "citation_key"})
+
+        args, kwargs = mock_db.session.execute.call_args
+        self.assertIn("ORDER BY c.citation_key ASC", str(args[0]))
 
     @patch("repositories.citation_repository.db")
     def test_search_sort_by_citation_key(self, mock_db):
@@ -378,6 +578,674 @@ class TestCitationRepository(unittest.TestCase):
         self.assertEqual(params.get("year_from"), 2001)
         self.assertIn("ORDER BY c.id ASC", str(sql))
 
+    @patch("repositories.citation_repository.db")
+    def test_iter_citations_streams_in_chunks(self, mock_db):
+        rows = [
+            SimpleNamespace(id=1, entry_type="book",
+                            citation_key="k1", fields={"title": "T1"}),
+            SimpleNamespace(id=2, entry_type="misc",
+                            citation_key="k2", fields={"title": "T2"}),
+        ]
+        mock_result = MagicMock()
+        mock_result.partitions.return_value = iter([[rows[0]], [rows[1]]])
+        mock_db.session.execute.return_value = mock_result
+
+        citations = list(repo.iter_citations({"author": "Bob"}, chunk_size=1))
+
+        self.assertEqual([c.id for c in citations], [1, 2])
+        mock_result.close.assert_called_once()
+
+        args, kwargs = mock_db.session.execute.call_args
+        self.assertIn("c.fields->>'author' ILIKE :author", str(args[0]))
+        self.assertEqual(args[1]["author"], "%Bob%")
+        self.assertEqual(
+            kwargs["execution_options"],
+            {"stream_results": True, "yield_per": 1}
+        )
+
+    @patch("repositories.citation_repository.db")
+    def test_iter_citations_without_queries(self, mock_db):
+        mock_result = MagicMock()
+        mock_result.partitions.return_value = iter([])
+        mock_db.session.execute.return_value = mock_result
+
+        self.assertEqual(list(repo.iter_citations()), [])
+
+        args, kwargs = mock_db.session.execute.call_args
+        self.assertNotIn("WHERE", str(args[0]))
+        self.assertIn("ORDER BY c.id ASC", str(args[0]))
+
+    @patch("repositories.citation_repository.get_entry_types")
+    @patch("repositories.citation_repository.db")
+    def test_import_citations_batches_and_reports_errors(self, mock_db, mock_types):
+        mock_types.return_value = [SimpleNamespace(id=1, name="book")]
+        citations = [
+            repo.Citation(None, "book", "k1", {"title": "T1"}),
+            repo.Citation(None, "nope", "k2", {"title": "T2"}),
+            repo.Citation(None, "book", "k3", {}),
+            repo.Citation(None, "book", "k4", {"title": "T4"}),
+            repo.Citation(None, "book", "k5", {"title": "T5"}),
+        ]
+
+        result = repo.import_citations(citations, batch_size=2)
+
+        self.assertEqual(result["imported"], 3)
+        self.assertEqual(
+            [e["citation_key"] for e in result["errors"]], ["k2", "k3"])
+        self.assertIn("Unknown entry type 'nope'", result["errors"][0]["error"])
+
+        mock_types.assert_called_once()
+        self.assertEqual(mock_db.session.execute.call_count, 2)
+        args, kwargs = mock_db.session.execute.call_args_list[0]
+        self.assertIn("jsonb_to_recordset", str(args[0]))
+        rows = json.loads(args[1]["rows"])
+        self.assertEqual([r["citation_key"] for r in rows], ["k1", "k4"])
+        self.assertEqual(rows[0], {
+            "entry_type_id": 1, "citation_key": "k1", "fields": {"title": "T1"},
+            "bibtex": "@book{k1,\n  title = {T1}\n}",
+            "human_readable": "T1.",
+            "compact": "book — k1 — T1",
+        })
+        self.assertIn("INSERT INTO citation_renders", str(args[0]))
+        mock_db.session.commit.assert_called_once()
+
+    @patch("repositories.citation_repository.get_entry_types")
+    @patch("repositories.citation_repository.db")
+    def test_import_citations_failed_batch_does_not_abort(self, mock_db, mock_types):
+        mock_types.return_value = [SimpleNamespace(id=1, name="book")]
+        mock_db.session.execute.side_effect = [
+            repo.SQLAlchemyError("boom"), MagicMock()]
+        citations = [
+            repo.Citation(None, "book", "k1", {"title": "T1"}),
+            repo.Citation(None, "book", "k2", {"title": "T2"}),
+        ]
+
+        result = repo.import_citations(citations, batch_size=1)
+
+        self.assertEqual(result["imported"], 1)
+        self.assertEqual(result["errors"][0]["citation_key"], "k1")
+        self.assertEqual(mock_db.session.begin_nested.call_count, 2)
+        mock_db.session.commit.assert_called_once()
+
+    @patch("repositories.citation_repository.get_entry_types")
+    @patch("repositories.citation_repository.db")
+    def test_import_citations_reports_only_rejected_rows(self, mock_db, mock_types):
+        mock_types.return_value = [SimpleNamespace(id=1, name="book")]
+        inserted = []
+
+        def execute(_sql, params):
+            keys = [row["citation_key"] for row in json.loads(params["rows"])]
+            if "bad" in keys:
+                raise repo.SQLAlchemyError("unsupported Unicode escape sequence")
+            inserted.extend(keys)
+        mock_db.session.execute.side_effect = execute
+        citations = [repo.Citation(None, "book", key, {"title": key})
+                     for key in ("k1", "k2", "bad", "k4", "k5")]
+
+        result = repo.import_citations(citations)
+
+        self.assertEqual(result["imported"], 4)
+        self.assertEqual(sorted(inserted), ["k1", "k2", "k4", "k5"])
+        self.assertEqual(result["errors"], [{
+            "citation_key": "bad", "error": "unsupported Unicode escape sequence"}])
+        mock_db.session.commit.assert_called_once()
+
+    @patch("repositories.citation_repository.db")
+    def test_delete_citations_by_ids(self, mock_db):
+        mock_db.session.execute.return_value = MagicMock(rowcount=2)
+
+        count = repo.delete_citations(ids=["1", 2])
+
+        self.assertEqual(count, 2)
+        args, kwargs = mock_db.session.execute.call_args
+        self.assertIn("DELETE FROM citations c", str(args[0]))
+        self.assertIn("c.id = ANY(:ids)", str(args[0]))
+        self.assertEqual(args[1], {"ids": [1, 2]})
+        mock_db.session.commit.assert_called_once()
+
+    @patch("repositories.citation_repository.db")
+    def test_delete_citations_by_search_filter(self, mock_db):
+        mock_db.session.execute.return_value = MagicMock(rowcount=5)
+
+        count = repo.delete_citations(queries={"entry_type": "misc"})
+
+        self.assertEqual(count, 5)
+        args, kwargs = mock_db.session.execute.call_args
+        sql = str(args[0])
+        self.assertIn("USING entry_types et", sql)
+        self.assertIn("AND et.name = :entry_type", sql)
+        self.assertNotIn("WHERE et.id = c.entry_type_id AND  WHERE", sql)
+        self.assertEqual(args[1], {"entry_type": "misc"})
+
+    @patch("repositories.citation_repository.db")
+    def test_bulk_operations_ignore_empty_selection(self, mock_db):
+        self.assertEqual(repo.delete_citations(ids=[]), 0)
+        self.assertEqual(repo.delete_citations(queries={"q": ""}), 0)
+        self.assertEqual(repo.delete_citations(), 0)
+        self.assertEqual(repo.set_citations_field("note", "x", ids=[]), 0)
+        self.assertEqual(repo.set_citations_entry_type(1, queries={}), 0)
+
+        mock_db.session.execute.assert_not_called()
+        mock_db.session.commit.assert_not_called()
+
+    @patch("repositories.citation_repository.db")
+    def test_set_citations_field_sets_value(self, mock_db):
+        mock_db.session.execute.return_value = MagicMock(rowcount=3)
+
+        count = repo.set_citations_field("publisher", "ACM", ids=[1, 2, 3])
+
+        self.assertEqual(count, 3)
+        args, kwargs = mock_db.session.execute.call_args
+        sql = str(args[0])
+        self.assertIn("UPDATE citations c", sql)
+        self.assertIn("c.fields || jsonb_build_object", sql)
+        self.assertEqual(args[1]["field"], "publisher")
+        self.assertEqual(args[1]["value"], "ACM")
+        mock_db.session.commit.assert_called_once()
+
+    @patch("repositories.citation_repository.db")
+    def test_set_citations_field_empty_value_removes_field(self, mock_db):
+        mock_db.session.execute.return_value = MagicMock(rowcount=1)
+
+        repo.set_citations_field("note", "", queries={"author": "bob"})
+
+        args, kwargs = mock_db.session.execute.call_args
+        self.assertIn("fields = c.fields - CAST(:field AS text)", str(args[0]))
+        self.assertNotIn("value", args[1])
+        self.assertEqual(args[1]["author"], "%bob%")
+
+    @patch("repositories.citation_repository.db")
+    def test_set_citations_field_rejects_invalid_names(self, mock_db):
+        for field in ("", "Bad-Name", "x; DROP TABLE citations", None):
+            with self.assertRaises(ValueError):
+                repo.set_citations_field(field, "v", ids=[1])
+        mock_db.session.execute.assert_not_called()
+
+    @patch("repositories.citation_repository.db")
+    def test_set_citations_entry_type(self, mock_db):
+        mock_db.session.execute.return_value = MagicMock(rowcount=4)
+
+        count = repo.set_citations_entry_type(7, ids=[1, 2, 3, 4])
+
+        self.assertEqual(count, 4)
+        args, kwargs = mock_db.session.execute.call_args
+        self.assertIn("SET entry_type_id = :entry_type_id", str(args[0]))
+        self.assertEqual(args[1], {"ids": [1, 2, 3, 4], "entry_type_id": 7})
+
+    @patch("repositories.citation_repository.db")
+    def test_create_citation_stores_renders(self, mock_db):
+        repo.create_citation(1, "k1", {"title": "T", "author": "A"})
+
+        mock_db.session.execute.assert_called_once()
+        args, kwargs = mock_db.session.execute.call_args
+        self.assertIn("INSERT INTO citation_renders", str(args[0]))
+        self.assertEqual(args[1]["human_readable"], "A. T.")
+        self.assertTrue(args[1]["bibtex"].startswith("@misc{k1,"))
+        self.assertEqual(args[1]["compact"], "misc — k1 — A, T")
+
+    @patch("repositories.citation_repository.db")
+    def test_create_citation_with_unknown_entry_type_skips_renders(self, mock_db):
+        self.mock_get_entry_type.side_effect = None
+        self.mock_get_entry_type.return_value = None
+
+        repo.create_citation(99, "k1", {"title": "T"})
+
+        args, kwargs = mock_db.session.execute.call_args
+        self.assertNotIn("citation_renders", str(args[0]))
+        self.assertNotIn("bibtex", args[1])
+
+    @patch("repositories.citation_repository.db")
+    def test_update_citation_stores_renders(self, mock_db):
+        mock_db.session.execute.return_value.fetchone.return_value = SimpleNamespace(
+            id=3, entry_type="misc", citation_key="k3", fields='{"title": "New"}')
+
+        citation = repo.update_citation(3, 1, "k3", {"title": "New"})
+
+        mock_db.session.execute.assert_called_once()
+        args, kwargs = mock_db.session.execute.call_args
+        self.assertIn("INSERT INTO citation_renders", str(args[0]))
+        self.assertIn("ON CONFLICT (citation_id) DO UPDATE", str(args[0]))
+        self.assertEqual(args[1]["bibtex"], "@misc{k3,\n  title = {New}\n}")
+        self.assertEqual(args[1]["compact"], "misc — k3 — New")
+        self.assertEqual(citation.to_human_readable(), "New.")
+        mock_db.session.commit.assert_called_once()
+
+    @patch("repositories.citation_repository.db")
+    def test_update_without_entry_type_renders_placeholders_for_the_statement(self, mock_db):
+        mock_db.session.execute.return_value.fetchone.return_value = SimpleNamespace(
+            id=3, entry_type="book", citation_key="k3", fields='{"title": "New"}')
+
+        citation = repo.update_citation(3, fields={"title": "New"})
+
+        self.mock_get_entry_type.assert_not_called()
+        args, kwargs = mock_db.session.execute.call_args
+        self.assertIn("replace(replace(:compact, :type_placeholder, et.name), "
+                      ":key_placeholder, w.citation_key)", str(args[0]))
+        self.assertEqual(
+            args[1]["compact"],
+            f"{args[1]['type_placeholder']} — {args[1]['key_placeholder']} — New")
+        self.assertEqual(citation.to_compact(), "book — k3 — New")
+        self.assertEqual(citation.to_bibtex(), "@book{k3,\n  title = {New}\n}")
+
+    @patch("repositories.citation_repository.db")
+    def test_update_without_fields_drops_renders(self, mock_db):
+        mock_db.session.execute.return_value.fetchone.return_value = SimpleNamespace(
+            id=3, entry_type="misc", citation_key="k3", fields='{"title": "Kept"}')
+
+        citation = repo.update_citation(3, citation_key="k3")
+
+        mock_db.session.execute.assert_called_once()
+        args, kwargs = mock_db.session.execute.call_args
+        self.assertIn("DELETE FROM citation_renders", str(args[0]))
+        self.assertNotIn("bibtex", args[1])
+        self.assertEqual(citation.to_human_readable(), "Kept.")
+
+    @patch("repositories.citation_repository.db")
+    def test_update_with_placeholder_in_fields_drops_renders(self, mock_db):
+        mock_db.session.execute.return_value.fetchone.return_value = WRITTEN_ROW
+
+        repo.update_citation(3, citation_key="k3", fields={"title": "\ue000"})
+
+        self.assertIn("DELETE FROM citation_renders",
+                      str(mock_db.session.execute.call_args.args[0]))
+
+    @patch("repositories.citation_repository.db")
+    def test_create_citation_returns_created_citation(self, mock_db):
+        mock_db.session.execute.return_value.fetchone.return_value = SimpleNamespace(
+            id=8, entry_type="misc", citation_key="k8", fields={"title": "T"},
+            version="77")
+
+        citation = repo.create_citation(1, "k8", {"title": "T"})
+
+        sql = str(mock_db.session.execute.call_args[0][0])
+        self.assertIn("RETURNING id, entry_type_id, citation_key, fields, xmin::text", sql)
+        self.assertIn("FROM inserted w JOIN entry_types et", sql)
+        self.assertEqual((citation.id, citation.entry_type, citation.version),
+                         (8, "misc", "77"))
+        self.assertEqual(citation.to_human_readable(), "T.")
+        mock_db.session.commit.assert_called_once()
+
+    @patch("repositories.citation_repository.db")
+    def test_update_citation_returns_updated_citation(self, mock_db):
+        mock_db.session.execute.return_value.fetchone.return_value = SimpleNamespace(
+            id=3, entry_type="misc", citation_key="k3", fields={"title": "New"})
+
+        citation = repo.update_citation(3, citation_key="k3", fields={"title": "New"})
+
+        sql = str(mock_db.session.execute.call_args_list[0][0][0])
+        self.assertIn("FROM updated w JOIN entry_types et", sql)
+        self.assertEqual((citation.id, citation.citation_key), (3, "k3"))
+
+    @patch("repositories.citation_repository.db")
+    def test_update_citation_returns_none_when_not_found(self, mock_db):
+        mock_db.session.execute.return_value.fetchone.return_value = None
+
+        self.assertIsNone(repo.update_citation(404, citation_key="k"))
+        self.assertIsNone(repo.update_citation(404))
+
+    @patch("repositories.citation_repository.db")
+    def test_delete_citation_reports_whether_it_existed(self, mock_db):
+        mock_db.session.execute.return_value.fetchone.side_effect = [
+            SimpleNamespace(id=7), None]
+
+        self.assertTrue(repo.delete_citation(7))
+        self.assertFalse(repo.delete_citation(7))
+        self.assertIn("RETURNING id", str(mock_db.session.execute.call_args[0][0]))
+
+    @patch("repositories.citation_repository.db")
+    def test_count_citations_exact_below_limit(self, mock_db):
+        mock_db.session.execute.return_value.scalar.return_value = 42
+
+        self.assertEqual(repo.count_citations({"author": "bob"}, exact_limit=100), (42, True))
+
+        mock_db.session.execute.assert_called_once()
+        args, kwargs = mock_db.session.execute.call_args
+        self.assertIn("LIMIT :count_limit) matches", str(args[0]))
+        self.assertIn("c.fields->>'author' ILIKE :author", str(args[0]))
+        self.assertEqual(args[1], {"author": "%bob%", "count_limit": 101})
+
+    @patch("repositories.citation_repository.db")
+    def test_count_citations_estimates_filtered_counts_above_limit(self, mock_db):
+        plan = [{"Plan": {"Plan Rows": 5000}}]
+        mock_db.session.execute.return_value.scalar.side_effect = [101, json.dumps(plan)]
+
+        count = repo.count_citations({"entry_type": "article"}, exact_limit=100)
+
+        self.assertEqual(count, (5000, False))
+        args, kwargs = mock_db.session.execute.call_args
+        self.assertTrue(str(args[0]).startswith("EXPLAIN (FORMAT JSON) SELECT 1"))
+        self.assertEqual(args[1], {"entry_type": "article"})
+
+    @patch("repositories.citation_repository.db")
+    def test_count_citations_uses_table_statistics_without_filters(self, mock_db):
+        mock_db.session.execute.return_value.scalar.side_effect = [101, 250000.0]
+        self.assertEqual(repo.count_citations(exact_limit=100), (250000, False))
+        self.assertIn("pg_class", str(mock_db.session.execute.call_args[0][0]))
+
+        # Before ANALYZE the estimate is unknown (-1); the capped count is a lower bound.
+        search_results.clear()
+        mock_db.session.execute.return_value.scalar.side_effect = [101, -1.0]
+        self.assertEqual(repo.count_citations(exact_limit=100), (101, False))
+
+    @patch("repositories.citation_repository.db")
+    def test_search_citations_caches_ids_of_a_page(self, mock_db):
+        mock_db.session.execute.return_value.fetchall.return_value = [
+            SimpleNamespace(id=i, entry_type="misc", citation_key=f"k{i}", fields={})
+            for i in (5, 2)
+        ]
+
+        first = repo.search_citations({"author": "bob", "page": None}, limit=2)
+        second = repo.search_citations({"page": None, "author": "bob"}, limit=2)
+
+        self.assertEqual([c.id for c in first], [5, 2])
+        self.assertEqual([c.id for c in second], [5, 2])
+        calls = mock_db.session.execute.call_args_list
+        self.assertEqual(len(calls), 2)
+        self.assertIn("ILIKE :author", str(calls[0][0][0]))
+        self.assertIn("WHERE c.id = ANY(:ids)", str(calls[1][0][0]))
+        self.assertIn("array_position(CAST(:ids AS integer[]), c.id)", str(calls[1][0][0]))
+        self.assertEqual(calls[1][0][1], {"ids": [5, 2]})
+
+        repo.search_citations({"author": "bob"}, limit=2, offset=2)
+        self.assertIn("ILIKE :author", str(mock_db.session.execute.call_args[0][0]))
+
+    @patch("repositories.citation_repository.db")
+    def test_results_read_before_a_concurrent_write_are_not_cached(self, mock_db):
+        def write_then_return(result):
+            # A write in another request commits and clears the cache
+            # while the query runs.
+            def execute(*_args):
+                search_results.clear()
+                return result
+            return execute
+
+        rows = MagicMock()
+        rows.fetchall.return_value = [SimpleNamespace(
+            id=5, entry_type="misc", citation_key="k5", fields={})]
+        mock_db.session.execute.side_effect = write_then_return(rows)
+        repo.search_citations({"author": "bob"}, limit=2)
+
+        counts = MagicMock()
+        counts.scalar.return_value = 1
+        mock_db.session.execute.side_effect = write_then_return(counts)
+        repo.count_citations({"author": "bob"})
+
+        self.assertEqual(search_results.stats()["entries"], 0)
+        repo.search_citations({"author": "bob"}, limit=2)
+        repo.count_citations({"author": "bob"})
+        self.assertEqual(mock_db.session.execute.call_count, 4)
+
+    @patch("repositories.citation_repository.db")
+    def test_search_citations_cached_empty_page_skips_lookup(self, mock_db):
+        mock_db.session.execute.return_value.fetchall.return_value = []
+
+        repo.search_citations({"author": "nobody"}, limit=20)
+        self.assertEqual(repo.search_citations({"author": "nobody"}, limit=20), [])
+        mock_db.session.execute.assert_called_once()
+
+    @patch("repositories.citation_repository.db")
+    def test_count_citations_cached_regardless_of_sort(self, mock_db):
+        mock_db.session.execute.return_value.scalar.return_value = 3
+
+        repo.count_citations({"author": "bob", "sort_by": "year"})
+        self.assertEqual(repo.count_citations({"author": "bob"}), (3, True))
+        mock_db.session.execute.assert_called_once()
+
+    @patch("repositories.citation_repository.get_entry_types", return_value=[])
+    @patch("repositories.citation_repository.db")
+    def test_writes_clear_cached_search_results(self, mock_db, mock_entry_types):
+        mock_db.session.execute.return_value = MagicMock(rowcount=1)
+        mock_db.session.execute.return_value.fetchone.return_value = WRITTEN_ROW
+        writes = (
+            lambda: repo.create_citation(1, "k", {"title": "T"}),
+            lambda: repo.import_citations([]),
+            lambda: repo.update_citation(3, citation_key="k3"),
+            lambda: repo.delete_citation(3),
+            lambda: repo.delete_citations(ids=[3]),
+            lambda: repo.set_citations_field("note", "x", ids=[3]),
+            lambda: repo.set_citations_entry_type(2, ids=[3]),
+        )
+
+        for write in writes:
+            search_results.put("key", [1])
+            write()
+            self.assertIsNone(search_results.get("key"))
+
+    @patch("repositories.citation_repository.db")
+    def test_bulk_updates_drop_renders(self, mock_db):
+        mock_db.session.execute.return_value = MagicMock(rowcount=1)
+
+        repo.set_citations_field("note", "x", ids=[1])
+        field_sql = str(mock_db.session.execute.call_args[0][0])
+        repo.set_citations_entry_type(2, ids=[1])
+        type_sql = str(mock_db.session.execute.call_args[0][0])
+
+        for sql in (field_sql, type_sql):
+            self.assertIn("DELETE FROM citation_renders r", sql)
+            self.assertEqual(sql.count("c.id = ANY(:ids)"), 2)
+
+    @patch("repositories.citation_repository.db")
+    def test_rendered_forms_are_read_instead_of_formatted(self, mock_db):
+        mock_db.session.execute.return_value.fetchall.return_value = [
+            SimpleNamespace(id=1, entry_type="misc", citation_key="k1",
+                            fields=None, human_readable="Stored."),
+            SimpleNamespace(id=2, entry_type="misc", citation_key="k2",
+                            fields={"title": "T"}, human_readable=None),
+        ]
+
+        citations = repo.get_citations(
+            projection=SUMMARY_FIELDS, rendered=("human_readable",))
+
+        sql = str(mock_db.session.execute.call_args[0][0])
+        self.assertIn("LEFT JOIN citation_renders r", sql)
+        self.assertIn("CASE WHEN r.human_readable IS NULL THEN jsonb_strip_nulls(", sql)
+        self.assertIn("r.human_readable", sql)
+        self.assertNotIn("r.bibtex", sql)
+        self.assertEqual(
+            [c.to_human_readable() for c in citations], ["Stored.", "T."])
+
+    def test_select_citations_rejects_unknown_forms(self):
+        with self.assertRaises(ValueError):
+            repo._select_citations(rendered=("html",))
+
+    @patch("repositories.citation_repository.db")
+    def test_iter_citations_reads_rendered_bibtex(self, mock_db):
+        mock_result = MagicMock()
+        mock_result.partitions.return_value = iter([[
+            SimpleNamespace(id=1, entry_type="misc", citation_key="k1",
+                            fields=None, bibtex="@misc{k1}"),
+        ]])
+        mock_db.session.execute.return_value = mock_result
+
+        citations = list(repo.iter_citations(rendered=("bibtex",)))
+
+        self.assertIn("CASE WHEN r.bibtex IS NULL THEN c.fields::text END",
+                      str(mock_db.session.execute.call_args[0][0]))
+        self.assertEqual(citations[0].to_bibtex(), "@misc{k1}")
+
+    @patch("repositories.citation_repository.db")
+    def test_backfill_renders_in_batches(self, mock_db):
+        first = [SimpleNamespace(id=i, entry_type="misc", citation_key=f"k{i}",
+                                 fields={"title": f"T{i}"}) for i in (1, 2)]
+        second = [SimpleNamespace(id=5, entry_type="book", citation_key="k5",
+                                  fields='{"title": "T5"}')]
+        mock_db.session.execute.return_value.fetchall.side_effect = [first, second, []]
+
+        count = repo.backfill_renders(batch_size=2)
+
+        self.assertEqual(count, 3)
+        calls = mock_db.session.execute.call_args_list
+        self.assertEqual(len(calls), 5)
+        self.assertIn("r.citation_id IS NULL", str(calls[0][0][0]))
+        self.assertEqual(calls[0][0][1], {"after": 0, "limit": 2})
+        self.assertEqual(calls[2][0][1], {"after": 2, "limit": 2})
+        rows = json.loads(calls[3][0][1]["rows"])
+        self.assertEqual(rows, [{
+            "citation_id": 5,
+            "bibtex": "@book{k5,\n  title = {T5}\n}",
+            "human_readable": "T5.",
+            "compact": "book — k5 — T5",
+        }])
+        self.assertEqual(mock_db.session.commit.call_count, 2)
+
+    @patch("repositories.citation_repository.db")
+    def test_backfill_renders_refresh_all(self, mock_db):
+        mock_db.session.execute.return_value.fetchall.return_value = []
+
+        self.assertEqual(repo.backfill_renders(refresh_all=True), 0)
+
+        sql = str(mock_db.session.execute.call_args[0][0])
+        self.assertNotIn("r.citation_id IS NULL", sql)
+
+    @patch("repositories.citation_repository.citation_rows")
+    @patch("repositories.citation_repository.db")
+    def test_writes_invalidate_cached_rows(self, mock_db, mock_rows):
+        mock_db.session.execute.return_value = MagicMock(rowcount=1)
+        mock_db.session.execute.return_value.fetchone.return_value = WRITTEN_ROW
+
+        repo.update_citation(3, citation_key="k3")
+        mock_rows.invalidate.assert_called_with([3])
+        repo.delete_citation(4)
+        mock_rows.invalidate.assert_called_with([4])
+        repo.delete_citations(ids=["5", 6])
+        mock_rows.invalidate.assert_called_with([5, 6])
+
+        mock_rows.clear.assert_not_called()
+        repo.set_citations_field("note", "x", queries={"author": "bob"})
+        mock_rows.clear.assert_called_once()
+
+    @patch("repositories.citation_repository.db")
+    def test_to_citation_reads_row_version(self, mock_db):
+        mock_db.session.execute.return_value.fetchall.return_value = [
+            SimpleNamespace(id=1, entry_type="misc", citation_key="k1",
+                            fields={}, version="1234"),
+        ]
+
+        citations = repo.get_citations()
+
+        self.assertIn("c.xmin::text AS version",
+                      str(mock_db.session.execute.call_args[0][0]))
+        self.assertEqual(citations[0].version, "1234")
+
+    @patch("repositories.citation_repository.db")
+    def test_get_citations_json_page_serializes_in_database(self, mock_db):
+        mock_db.session.execute.return_value.fetchall.return_value = [
+            SimpleNamespace(id=i, json=f'{{"id": {i}}}') for i in (3, 2, 1)]
+
+        citations, prev_cursor, next_cursor = repo.get_citations_json_page(
+            before=4, per_page=2, projection=["title"])
+
+        args, kwargs = mock_db.session.execute.call_args
+        sql = str(args[0])
+        self.assertIn("SELECT c.id, jsonb_build_object('id', c.id, 'entry_type', et.name", sql)
+        self.assertIn("'fields', jsonb_strip_nulls(jsonb_build_object('title'", sql)
+        self.assertIn("WHERE c.id < :before ORDER BY c.id DESC", sql)
+        self.assertEqual(args[1], {"limit": 3, "before": 4})
+        self.assertEqual(citations, ['{"id": 2}', '{"id": 3}'])
+        self.assertEqual((prev_cursor, next_cursor), (2, 3))
+
+    @patch("repositories.citation_repository.db")
+    def test_get_citations_by_ids_keeps_the_order_of_the_ids(self, mock_db):
+        mock_db.session.execute.return_value.fetchall.return_value = [
+            SimpleNamespace(id=i, entry_type="misc", citation_key=f"k{i}", fields="{}")
+            for i in (5, 2)]
+
+        citations = repo.get_citations_by_ids({5: None, 2: None}, projection=["title"])
+
+        args, kwargs = mock_db.session.execute.call_args
+        self.assertIn("ORDER BY array_position(CAST(:ids AS integer[]), c.id)", str(args[0]))
+        self.assertIn("jsonb_build_object('title'", str(args[0]))
+        self.assertEqual(args[1], {"ids": [5, 2]})
+        self.assertEqual([c.id for c in citations], [5, 2])
+        self.assertEqual(repo.get_citations_by_ids([]), [])
+
+    @patch("repositories.citation_repository.db")
+    def test_get_citation_json(self, mock_db):
+        mock_db.session.execute.return_value.fetchone.return_value = SimpleNamespace(
+            id=5, json='{"id": 5}')
+
+        self.assertEqual(repo.get_citation_json(5), '{"id": 5}')
+        args, kwargs = mock_db.session.execute.call_args
+        self.assertIn("WHERE c.id = :citation_id", str(args[0]))
+        self.assertEqual(args[1], {"citation_id": 5})
+
+        mock_db.session.execute.return_value.fetchone.return_value = None
+        self.assertIsNone(repo.get_citation_json(6))
+
+    @patch("repositories.citation_repository.db")
+    def test_search_citations_json_with_limit_and_offset(self, mock_db):
+        mock_db.session.execute.return_value.fetchall.return_value = [
+            SimpleNamespace(id=1, json='{"id": 1}')]
+
+        result = repo.search_citations_json(
+            {"author": "bob"}, limit=10, offset=20)
+
+        self.assertEqual(result, ['{"id": 1}'])
+        args, kwargs = mock_db.session.execute.call_args
+        sql = str(args[0])
+        self.assertIn("c.fields->>'author' ILIKE :author", sql)
+        self.assertTrue(sql.endswith("LIMIT :limit OFFSET :offset"))
+        self.assertEqual(args[1]["limit"], 10)
+        self.assertEqual(args[1]["offset"], 20)
+
+    @patch("repositories.citation_repository.db")
+    def test_search_citations_without_limit_returns_all(self, mock_db):
+        mock_db.session.execute.return_value.fetchall.return_value = []
+
+        repo.search_citations({"author": "bob"}, offset=5)
+
+        args, kwargs = mock_db.session.execute.call_args
+        self.assertNotIn("LIMIT", str(args[0]))
+        self.assertNotIn("offset", args[1])
+
+    @patch("repositories.citation_repository.library_index")
+    @patch("repositories.citation_repository.db")
+    def test_ready_search_index_finds_ids_and_counts(self, mock_db, mock_index):
+        mock_index.ready = True
+        mock_index.search.return_value = [5, 2]
+        mock_index.count.return_value = 7
+        mock_db.session.execute.return_value.fetchall.return_value = [
+            SimpleNamespace(id=i, entry_type="misc", citation_key=f"k{i}", fields={})
+            for i in (5, 2)
+        ]
+
+        citations = repo.search_citations({"author": "bob"}, limit=2, offset=4)
+
+        self.assertEqual([c.id for c in citations], [5, 2])
+        mock_index.search.assert_called_once_with({"author": "bob"}, 2, 4)
+        args, kwargs = mock_db.session.execute.call_args
+        self.assertIn("WHERE c.id = ANY(:ids)", str(args[0]))
+        self.assertEqual(args[1], {"ids": [5, 2]})
+
+        self.assertEqual(repo.count_citations({"author": "bob"}), (7, True))
+        mock_index.count.assert_called_once_with({"author": "bob"})
+        mock_db.session.execute.assert_called_once()
+
+    @patch("repositories.citation_repository.get_entry_types", return_value=[])
+    @patch("repositories.citation_repository.get_entry_type", return_value=None)
+    @patch("repositories.citation_repository.suggestion_index")
+    @patch("repositories.citation_repository.library_index")
+    @patch("repositories.citation_repository.db")
+    def test_writes_update_search_index(
+            self, mock_db, mock_index, mock_suggestions, *_mock_entry_types):
+        mock_db.session.execute.return_value = MagicMock(rowcount=1)
+        mock_db.session.execute.return_value.fetchone.return_value = SimpleNamespace(
+            id=3, entry_type="misc", citation_key="k3", fields={})
+
+        created = repo.create_citation(1, "k3", {})
+        mock_index.add.assert_called_once_with(created)
+        updated = repo.update_citation(3, citation_key="k3")
+        mock_index.add.assert_called_with(updated)
+        repo.delete_citation(3)
+        mock_index.remove.assert_called_once_with(3)
+        repo.import_citations([])
+        mock_index.invalidate_new.assert_called_once()
+        repo.delete_citations(ids=["5", 6])
+        mock_index.invalidate.assert_called_with([5, 6])
+        repo.set_citations_field("note", "x", queries={"author": "bob"})
+        mock_index.invalidate.assert_called_with(None)
+        self.assertEqual(mock_suggestions.method_calls, mock_index.method_calls)
+
 
 if __name__ == "__main__":
     unittest.main()
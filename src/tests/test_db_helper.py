@@ -2,6 +2,8 @@ import os
 import unittest
 from unittest.mock import MagicMock, patch
 
+from sqlalchemy.exc import SQLAlchemyError
+
 import db_helper
 
 
@@ -113,12 +115,60 @@ class TestDbHelper(unittest.TestCase):
 
         self.assertFalse(mock_db.session.execute.called)
 
+    @patch("db_helper.db")
+    def test_setup_trigram_indexes_creates_extension_and_indexes(self, mock_db):
+        db_helper.setup_trigram_indexes()
+
+        statements = [str(c.args[0])
+                      for c in mock_db.session.execute.call_args_list]
+        self.assertIn("CREATE EXTENSION IF NOT EXISTS pg_trgm", statements[0])
+        self.assertTrue(any("citation_key gin_trgm_ops" in s for s in statements))
+        self.assertTrue(
+            any("(fields->>'author') gin_trgm_ops" in s for s in statements))
+        mock_db.session.commit.assert_called_once()
+
+    @patch("db_helper.db")
+    def test_setup_trigram_indexes_rolls_back_and_raises_on_error(self, mock_db):
+        mock_db.session.execute.side_effect = SQLAlchemyError("no privilege")
+
+        with self.assertRaises(SQLAlchemyError):
+            db_helper.setup_trigram_indexes()
+
+        mock_db.session.rollback.assert_called_once()
+        mock_db.session.commit.assert_not_called()
+
+    @patch("db_helper.entry_fields_repository")
+    @patch("db_helper.entry_type_repository")
+    @patch("db_helper.db")
+    def test_reset_db_invalidates_caches(self, mock_db, mock_types, mock_fields):
+        with patch.object(db_helper, 'tables', return_value=["books"]):
+            db_helper.reset_db()
+
+        mock_types.invalidate_cache.assert_called()
+        mock_fields.invalidate_cache.assert_called()
+
     def test_reset_db_raises_on_invalid_identifier(self):
         with patch.object(db_helper, 'tables', return_value=["bad-name"]):
             with patch("db_helper.db"):
                 with self.assertRaises(ValueError):
                     db_helper.reset_db()
 
+    @patch("db_helper.citation_repository")
+    def test_main_backfill_renders(self, mock_citations):
+        mock_citations.backfill_renders.return_value = 3
+
+        db_helper.main(["backfill-renders", "--all"])
+
+        mock_citations.backfill_renders.assert_called_once_with(refresh_all=True)
+
+    @patch("db_helper.init_db")
+    @patch("db_helper.setup_db")
+    def test_main_sets_up_database_by_default(self, mock_setup, mock_init):
+        db_helper.main([])
+
+        mock_setup.assert_called_once()
+        mock_init.assert_called_once()
+
 
 if __name__ == "__main__":
     unittest.main()
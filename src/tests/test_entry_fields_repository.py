@@ -6,21 +6,30 @@ import repositories.entry_fields_repository as repo
 
 
 class TestEntryFieldsRepository(unittest.TestCase):
+    def setUp(self):
+        repo.invalidate_cache()
+
+    def tearDown(self):
+        repo.invalidate_cache()
+
     @patch("repositories.entry_fields_repository.db")
     def test_get_entry_fields_returns_list(self, mock_db):
-        rows = [SimpleNamespace(name="author"), SimpleNamespace(name="title")]
+        rows = [
+            SimpleNamespace(entry_type_id=1, name="author"),
+            SimpleNamespace(entry_type_id=1, name="title"),
+            SimpleNamespace(entry_type_id=2, name="note"),
+        ]
         mock_result = MagicMock()
         mock_result.fetchall.return_value = rows
         mock_db.session.execute.return_value = mock_result
 
         fields = repo.get_entry_fields(1)
         self.assertEqual(fields, ["author", "title"])
+        self.assertEqual(repo.get_entry_fields("2"), ["note"])
 
-        args = mock_db.session.execute.call_args[0]
-        sql = args[0]
-        params = args[1]
+        mock_db.session.execute.assert_called_once()
+        sql = mock_db.session.execute.call_args[0][0]
         self.assertIn("default_entry_fields", str(sql))
-        self.assertEqual(params["entry_type_id"], 1)
 
     @patch("repositories.entry_fields_repository.db")
     def test_get_entry_fields_empty(self, mock_db):
@@ -30,6 +39,22 @@ class TestEntryFieldsRepository(unittest.TestCase):
 
         fields = repo.get_entry_fields(999)
         self.assertEqual(fields, [])
+        self.assertEqual(repo.get_entry_fields(None), [])
+
+    @patch("repositories.entry_fields_repository.db")
+    def test_invalidate_cache_reloads_entry_fields(self, mock_db):
+        mock_result = MagicMock()
+        mock_result.fetchall.return_value = [
+            SimpleNamespace(entry_type_id=1, name="author")]
+        mock_db.session.execute.return_value = mock_result
+
+        self.assertEqual(repo.get_entry_fields(1), ["author"])
+        mock_result.fetchall.return_value = []
+        self.assertEqual(repo.get_entry_fields(1), ["author"])
+
+        repo.invalidate_cache()
+        self.assertEqual(repo.get_entry_fields(1), [])
+        self.assertEqual(mock_db.session.execute.call_count, 2)
 
 
 if __name__ == "__main__":
@@ -6,16 +6,24 @@ import repositories.entry_type_repository as repo
 
 
 class TestEntryTypeRepository(unittest.TestCase):
+    def setUp(self):
+        repo.invalidate_cache()
+
+    def tearDown(self):
+        repo.invalidate_cache()
+
+    def _mock_rows(self, mock_db, rows):
+        mock_result = MagicMock()
+        mock_result.fetchall.return_value = rows
+        mock_db.session.execute.return_value = mock_result
+
     @patch("repositories.entry_type_repository.db")
     def test_get_entry_types_returns_list(self, mock_db):
         rows = [
             SimpleNamespace(id=1, name="article"),
             SimpleNamespace(id=2, name="book"),
         ]
-
-        mock_result = MagicMock()
-        mock_result.fetchall.return_value = rows
-        mock_db.session.execute.return_value = mock_result
+        self._mock_rows(mock_db, rows)
 
         types = repo.get_entry_types()
         self.assertEqual(len(types), 2)
@@ -29,19 +37,43 @@ class TestEntryTypeRepository(unittest.TestCase):
 
     @patch("repositories.entry_type_repository.db")
     def test_get_entry_types_empty(self, mock_db):
-        mock_result = MagicMock()
-        mock_result.fetchall.return_value = []
-        mock_db.session.execute.return_value = mock_result
+        self._mock_rows(mock_db, [])
 
         types = repo.get_entry_types()
         self.assertEqual(types, [])
 
+    @patch("repositories.entry_type_repository.db")
+    def test_entry_types_are_loaded_once(self, mock_db):
+        self._mock_rows(mock_db, [SimpleNamespace(id=1, name="article")])
+
+        repo.get_entry_types()
+        repo.get_entry_type(1)
+        repo.get_entry_type_by_name("article")
+
+        mock_db.session.execute.assert_called_once()
+
+    @patch("repositories.entry_type_repository.db")
+    def test_invalidate_cache_reloads_entry_types(self, mock_db):
+        self._mock_rows(mock_db, [SimpleNamespace(id=1, name="article")])
+        self.assertEqual(len(repo.get_entry_types()), 1)
+
+        self._mock_rows(mock_db, [])
+        self.assertEqual(len(repo.get_entry_types()), 1)
+
+        repo.invalidate_cache()
+        self.assertEqual(repo.get_entry_types(), [])
+        self.assertEqual(mock_db.session.execute.call_count, 2)
+
+    @patch("repositories.entry_type_repository.db")
+    def test_get_entry_types_returns_a_copy(self, mock_db):
+        self._mock_rows(mock_db, [SimpleNamespace(id=1, name="article")])
+
+        repo.get_entry_types().clear()
+        self.assertEqual(len(repo.get_entry_types()), 1)
+
     @patch("repositories.entry_type_repository.db")
     def test_get_entry_type_by_id_found(self, mock_db):
-        mock_row = SimpleNamespace(id=42, name="custom")
-        mock_result = MagicMock()
-        mock_result.fetchone.return_value = mock_row
-        mock_db.session.execute.return_value = mock_result
+        self._mock_rows(mock_db, [SimpleNamespace(id=42, name="custom")])
 
         et = repo.get_entry_type(42)
         self.assertIsNotNone(et)
@@ -52,27 +84,25 @@ class TestEntryTypeRepository(unittest.TestCase):
         self.assertEqual(et.id, 42)
         self.assertEqual(et.name, "custom")
 
-        args = mock_db.session.execute.call_args[0]
-        sql = args[0]
-        params = args[1]
-        self.assertIn("WHERE id = :entry_type_id", str(sql))
-        self.assertEqual(params["entry_type_id"], 42)
+    @patch("repositories.entry_type_repository.db")
+    def test_get_entry_type_by_id_accepts_form_string(self, mock_db):
+        self._mock_rows(mock_db, [SimpleNamespace(id=42, name="custom")])
+
+        et = repo.get_entry_type("42")
+        self.assertIsNotNone(et)
+        self.assertEqual(et.name, "custom")
 
     @patch("repositories.entry_type_repository.db")
     def test_get_entry_type_by_id_none(self, mock_db):
-        mock_result = MagicMock()
-        mock_result.fetchone.return_value = None
-        mock_db.session.execute.return_value = mock_result
+        self._mock_rows(mock_db, [])
 
-        et = repo.get_entry_type(999)
-        self.assertIsNone(et)
+        self.assertIsNone(repo.get_entry_type(999))
+        self.assertIsNone(repo.get_entry_type("not-a-number"))
+        self.assertIsNone(repo.get_entry_type(None))
 
     @patch("repositories.entry_type_repository.db")
     def test_get_entry_type_by_name_found(self, mock_db):
-        mock_row = SimpleNamespace(id=7, name="misc")
-        mock_result = MagicMock()
-        mock_result.fetchone.return_value = mock_row
-        mock_db.session.execute.return_value = mock_result
+        self._mock_rows(mock_db, [SimpleNamespace(id=7, name="misc")])
 
         et = repo.get_entry_type_by_name("misc")
         self.assertIsNotNone(et)
@@ -83,17 +113,9 @@ class TestEntryTypeRepository(unittest.TestCase):
         self.assertEqual(et.id, 7)
         self.assertEqual(et.name, "misc")
 
-        args = mock_db.session.execute.call_args[0]
-        sql = args[0]
-        params = args[1]
-        self.assertIn("WHERE name = :entry_type", str(sql))
-        self.assertEqual(params["entry_type"], "misc")
-
     @patch("repositories.entry_type_repository.db")
     def test_get_entry_type_by_name_none(self, mock_db):
-        mock_result = MagicMock()
-        mock_result.fetchone.return_value = None
-        mock_db.session.execute.return_value = mock_result
+        self._mock_rows(mock_db, [])
 
         et = repo.get_entry_type_by_name("nope")
         self.assertIsNone(et)
@@ -0,0 +1,77 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+from flask import flash
+
+from config import app
+from etag import conditional, library_etag
+
+
+class TestLibraryEtag(unittest.TestCase):
+    def test_etag_depends_on_version_path_and_query(self):
+        with app.test_request_context("/search?author=bob&year_from=2000"):
+            etag = library_etag(3)
+            self.assertTrue(etag.startswith("3-"))
+            self.assertNotEqual(etag, library_etag(4))
+
+        with app.test_request_context("/search?year_from=2000&author=bob"):
+            self.assertEqual(library_etag(3), etag)
+
+        with app.test_request_context("/search?author=alice&year_from=2000"):
+            self.assertNotEqual(library_etag(3), etag)
+
+        with app.test_request_context("/citations?author=bob&year_from=2000"):
+            self.assertNotEqual(library_etag(3), etag)
+
+
+@patch("etag.get_library_version", return_value=5)
+class TestConditional(unittest.TestCase):
+    def setUp(self):
+        self.view = MagicMock(return_value="page")
+        self.wrapped = conditional(self.view)
+
+    def test_sets_etag_on_response(self, mock_version):
+        with app.test_request_context("/citations"):
+            response = self.wrapped()
+            expected = library_etag(5)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_etag(), (expected, False))
+        self.assertEqual(response.headers["Cache-Control"], "no-cache")
+        self.view.assert_called_once()
+
+    def test_matching_if_none_match_returns_304_without_running_view(self, mock_version):
+        with app.test_request_context("/citations"):
+            etag = library_etag(5)
+
+        with app.test_request_context(
+                "/citations", headers={"If-None-Match": f'"{etag}"'}):
+            response = self.wrapped()
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.get_etag(), (etag, False))
+        self.view.assert_not_called()
+
+    def test_stale_etag_runs_view(self, mock_version):
+        with app.test_request_context("/citations"):
+            etag = library_etag(4)
+
+        with app.test_request_context(
+                "/citations", headers={"If-None-Match": f'"{etag}"'}):
+            response = self.wrapped()
+
+        self.assertEqual(response.status_code, 200)
+        self.view.assert_called_once()
+
+    @patch.dict(app.config, {"SECRET_KEY": "test-secret"})
+    def test_pages_with_flashed_messages_have_no_etag(self, mock_version):
+        with app.test_request_context("/citations"):
+            flash("Citation deleted successfully.", "success")
+            response = self.wrapped()
+
+        self.assertEqual(response, "page")
+        mock_version.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import repositories.facet_repository as facets_repo
+from result_cache import search_results
+
+
+class TestFacetRepository(unittest.TestCase):
+    def setUp(self):
+        search_results.clear()
+
+    @patch("repositories.facet_repository.db")
+    def test_get_search_facets_groups_counts(self, mock_db):
+        mock_db.session.execute.return_value.fetchall.return_value = [
+            SimpleNamespace(grouping_set=0b011, entry_type="misc", year=None,
+                            author=None, hits=1),
+            SimpleNamespace(grouping_set=0b011, entry_type="article", year=None,
+                            author=None, hits=3),
+            SimpleNamespace(grouping_set=0b101, entry_type=None, year=1990,
+                            author=None, hits=1),
+            SimpleNamespace(grouping_set=0b101, entry_type=None, year=None,
+                            author=None, hits=1),
+            SimpleNamespace(grouping_set=0b101, entry_type=None, year=2020,
+                            author=None, hits=3),
+            SimpleNamespace(grouping_set=0b110, entry_type=None, year=None,
+                            author="Doe, Jane", hits=2),
+        ]
+
+        facets = facets_repo.get_search_facets({"author": "doe", "sort_by": "year"})
+
+        self.assertEqual(facets, {
+            "entry_types": [("article", 3), ("misc", 1)],
+            "years": [(2020, 3), (1990, 1)],
+            "authors": [("Doe, Jane", 2)],
+        })
+        args, kwargs = mock_db.session.execute.call_args
+        sql = str(args[0])
+        self.assertIn("GROUP BY GROUPING SETS ((et.name), (c.year_int / 10 * 10), (a.author))", sql)
+        self.assertIn("c.fields->>'author' ILIKE :author", sql)
+        self.assertEqual(args[1], {"author": "%doe%", "top_authors": facets_repo.TOP_AUTHORS})
+
+    @patch("repositories.facet_repository.db")
+    def test_get_search_facets_cached_per_filters(self, mock_db):
+        mock_db.session.execute.return_value.fetchall.return_value = []
+
+        repo_calls = mock_db.session.execute
+        facets_repo.get_search_facets({"author": "doe", "sort_by": "year"})
+        facets_repo.get_search_facets({"author": "doe", "direction": "DESC", "q": ""})
+        self.assertEqual(repo_calls.call_count, 1)
+
+        facets_repo.get_search_facets({"author": "roe"})
+        self.assertEqual(repo_calls.call_count, 2)
+
+        search_results.clear()
+        facets_repo.get_search_facets({"author": "doe"})
+        self.assertEqual(repo_calls.call_count, 3)
+
+    @patch("repositories.facet_repository.db")
+    def test_facets_read_before_a_concurrent_write_are_not_cached(self, mock_db):
+        def execute(*_args):
+            # A write in another request clears the cache while the query runs.
+            search_results.clear()
+            return mock_db.session.execute.return_value
+
+        mock_db.session.execute.side_effect = execute
+        mock_db.session.execute.return_value.fetchall.return_value = []
+
+        facets_repo.get_search_facets({"author": "doe"})
+        facets_repo.get_search_facets({"author": "doe"})
+        self.assertEqual(mock_db.session.execute.call_count, 2)
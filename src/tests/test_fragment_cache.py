@@ -0,0 +1,96 @@
+import sys
+import unittest
+from unittest.mock import patch
+
+import fragment_cache
+from entities.citation import Citation
+from fragment_cache import FragmentCache
+
+
+class TestFragmentCache(unittest.TestCase):
+    def test_get_returns_fragment_for_matching_version(self):
+        cache = FragmentCache(max_bytes=10_000)
+        cache.put(1, "v1", "<p>one</p>")
+
+        self.assertEqual(cache.get(1, "v1"), "<p>one</p>")
+        self.assertIsNone(cache.get(1, "v2"))
+        self.assertIsNone(cache.get(2, "v1"))
+
+    def test_put_replaces_older_version(self):
+        cache = FragmentCache(max_bytes=10_000)
+        cache.put(1, "v1", "old")
+        cache.put(1, "v2", "new")
+
+        self.assertEqual(len(cache), 1)
+        self.assertIsNone(cache.get(1, "v1"))
+        self.assertEqual(cache.get(1, "v2"), "new")
+        self.assertEqual(cache.size, sys.getsizeof("new"))
+
+    def test_evicts_least_recently_used_over_memory_cap(self):
+        fragment = "x" * 100
+        cache = FragmentCache(max_bytes=sys.getsizeof(fragment) * 2)
+        cache.put(1, "v", fragment)
+        cache.put(2, "v", fragment)
+        cache.get(1, "v")
+        cache.put(3, "v", fragment)
+
+        self.assertEqual(cache.get(1, "v"), fragment)
+        self.assertIsNone(cache.get(2, "v"))
+        self.assertEqual(cache.get(3, "v"), fragment)
+        self.assertLessEqual(cache.size, cache.max_bytes)
+
+    def test_fragment_larger_than_cap_is_not_stored(self):
+        cache = FragmentCache(max_bytes=10)
+        cache.put(1, "v", "x" * 100)
+
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.size, 0)
+
+    def test_invalidate_and_clear(self):
+        cache = FragmentCache(max_bytes=10_000)
+        for key in (1, 2, 3):
+            cache.put(key, "v", f"row {key}")
+
+        cache.invalidate([1, 4])
+        self.assertIsNone(cache.get(1, "v"))
+        self.assertEqual(len(cache), 2)
+
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.size, 0)
+
+
+class TestRenderCitationRow(unittest.TestCase):
+    def setUp(self):
+        fragment_cache.citation_rows.clear()
+        self.addCleanup(fragment_cache.citation_rows.clear)
+
+    @patch("fragment_cache.render_template", return_value="<div>row</div>")
+    def test_rows_are_rendered_once_per_version(self, mock_render):
+        citation = Citation(1, "misc", "k1", {})
+        citation.version = "10"
+
+        first = fragment_cache.render_citation_row(citation)
+        second = fragment_cache.render_citation_row(citation)
+
+        self.assertEqual(first, "<div>row</div>")
+        self.assertIs(first, second)
+        mock_render.assert_called_once_with("citation_row.html", c=citation)
+
+        citation.version = "11"
+        fragment_cache.render_citation_row(citation)
+        self.assertEqual(mock_render.call_count, 2)
+
+    @patch("fragment_cache.render_template", return_value="<div>row</div>")
+    def test_rows_without_version_are_not_cached(self, mock_render):
+        citation = Citation(None, "misc", "k1", {})
+
+        fragment_cache.render_citation_row(citation)
+        fragment_cache.render_citation_row(citation)
+
+        self.assertEqual(mock_render.call_count, 2)
+        self.assertEqual(len(fragment_cache.citation_rows), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
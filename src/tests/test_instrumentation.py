@@ -0,0 +1,108 @@
+import json
+import unittest
+
+from flask import Flask, render_template_string
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+import instrumentation
+
+
+class TestInstrumentation(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine("sqlite://")
+        self.app = Flask(__name__)
+        instrumentation.init_app(self.app, slow_query_ms=0)
+        self.client = self.app.test_client()
+
+        @self.app.route("/page")
+        def page():
+            with self.engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+                conn.execute(text("SELECT   2"))
+            return render_template_string(
+                "{{ inner() }}", inner=lambda: render_template_string("row"))
+
+    def tearDown(self):
+        self.engine.dispose()
+
+    def test_server_timing_header(self):
+        with self.assertLogs(self.app.logger, level="INFO"):
+            response = self.client.get("/page")
+
+        timing = response.headers["Server-Timing"]
+        self.assertIn('desc="2 queries"', timing)
+        self.assertRegex(timing, r"^db;dur=[\d.]+;.*, tpl;dur=[\d.]+, total;dur=[\d.]+$")
+
+    def test_logs_request_line_and_slow_queries(self):
+        with self.assertLogs(self.app.logger, level="INFO") as logs:
+            self.client.get("/page?x=1")
+
+        slow = [r for r in logs.records if r.levelname == "WARNING"]
+        self.assertEqual(len(slow), 2)
+        self.assertIn("SELECT 2", slow[1].getMessage())
+
+        line = json.loads(logs.records[-1].getMessage())
+        self.assertEqual(line["path"], "/page")
+        self.assertEqual(line["status"], 200)
+        self.assertEqual(line["queries"], 2)
+        self.assertEqual(
+            [q["statement"] for q in line["slow_queries"]], ["SELECT 1", "SELECT 2"])
+        self.assertGreaterEqual(line["total_ms"], line["db_ms"])
+
+    def test_queries_below_threshold_are_not_slow(self):
+        self.app.config["SLOW_QUERY_MS"] = 60_000
+
+        with self.assertLogs(self.app.logger, level="INFO") as logs:
+            self.client.get("/page")
+
+        self.assertEqual(len(logs.records), 1)
+        self.assertEqual(json.loads(logs.records[0].getMessage())["slow_queries"], [])
+
+    def test_failed_queries_are_not_recorded(self):
+        @self.app.route("/failing")
+        def failing():
+            with self.engine.connect() as conn:
+                with self.assertRaises(OperationalError):
+                    conn.execute(text("SELECT * FROM missing"))
+                conn.execute(text("SELECT 1"))
+            return "ok"
+
+        with self.assertLogs(self.app.logger, level="INFO") as logs:
+            self.client.get("/failing")
+
+        line = json.loads(logs.records[-1].getMessage())
+        self.assertEqual(line["queries"], 1)
+        self.assertEqual([q["statement"] for q in line["slow_queries"]], ["SELECT 1"])
+
+    def test_queries_outside_requests_are_not_recorded(self):
+        with self.app.app_context():
+            with self.engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+            self.assertIsNone(instrumentation.current_stats())
+
+
+class TestRequestStats(unittest.TestCase):
+    def test_nested_templates_are_timed_once(self):
+        stats = instrumentation.RequestStats()
+        stats.template_started()
+        stats.template_started()
+        stats.template_finished()
+        self.assertEqual(stats.template_seconds, 0)
+
+        stats.template_finished()
+        outer = stats.template_seconds
+        self.assertGreater(outer, 0)
+
+        stats.template_finished()
+        self.assertEqual(stats.template_seconds, outer)
+
+    def test_server_timing_values_in_milliseconds(self):
+        stats = instrumentation.RequestStats()
+        stats.query_count = 3
+        stats.db_seconds = 0.0125
+        stats.template_seconds = 0.002
+
+        self.assertEqual(
+            instrumentation.server_timing(stats, 0.05),
+            'db;dur=12.50;desc="3 queries", tpl;dur=2.00, total;dur=50.00')
@@ -0,0 +1,24 @@
+import unittest
+from unittest.mock import patch
+
+from repositories import library_repository as repo
+
+
+class TestLibraryRepository(unittest.TestCase):
+    @patch("repositories.library_repository.db")
+    def test_get_library_version(self, mock_db):
+        mock_db.session.execute.return_value.scalar.return_value = 42
+
+        self.assertEqual(repo.get_library_version(), 42)
+        sql = str(mock_db.session.execute.call_args[0][0])
+        self.assertIn("FROM library_version", sql)
+
+    @patch("repositories.library_repository.db")
+    def test_get_library_version_without_row(self, mock_db):
+        mock_db.session.execute.return_value.scalar.return_value = None
+
+        self.assertEqual(repo.get_library_version(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
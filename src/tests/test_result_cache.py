@@ -0,0 +1,151 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from result_cache import FileBackend, MemoryBackend, ResultCache, cache_key
+
+
+class BackendTests:
+    """Tests shared by the cache backends; `make_backend(max_entries)` creates one."""
+
+    def make_backend(self, max_entries):
+        raise NotImplementedError
+
+    def test_get_returns_stored_value(self):
+        backend = self.make_backend(4)
+        backend.set("a", [1, 2, 3], expires_at=2e9)
+        self.assertEqual(backend.get("a"), [1, 2, 3])
+        self.assertIsNone(backend.get("b"))
+
+    def test_expired_values_are_dropped(self):
+        backend = self.make_backend(4)
+        backend.set("a", [1], expires_at=100)
+        with patch("result_cache.time.time", return_value=99):
+            self.assertEqual(backend.get("a"), [1])
+        with patch("result_cache.time.time", return_value=100):
+            self.assertIsNone(backend.get("a"))
+        self.assertEqual(len(backend), 0)
+
+    def test_least_recently_used_is_evicted(self):
+        backend = self.make_backend(2)
+        backend.set("a", [1], expires_at=2e9)
+        backend.set("b", [2], expires_at=2e9)
+        self.touch(backend, "a")
+        backend.set("c", [3], expires_at=2e9)
+
+        self.assertEqual(len(backend), 2)
+        self.assertEqual(backend.get("a"), [1])
+        self.assertIsNone(backend.get("b"))
+        self.assertEqual(backend.get("c"), [3])
+
+    def test_clear(self):
+        backend = self.make_backend(4)
+        backend.set("a", [1], expires_at=2e9)
+        backend.clear()
+        self.assertIsNone(backend.get("a"))
+        self.assertEqual(len(backend), 0)
+
+    def test_set_is_dropped_after_a_clear_since_generation(self):
+        backend = self.make_backend(4)
+        generation = backend.generation()
+        backend.clear()
+        backend.set("a", [1], expires_at=2e9, generation=generation)
+        self.assertIsNone(backend.get("a"))
+
+        backend.set("a", [2], expires_at=2e9, generation=backend.generation())
+        self.assertEqual(backend.get("a"), [2])
+
+    def touch(self, backend, key):
+        backend.get(key)
+
+
+class TestMemoryBackend(BackendTests, unittest.TestCase):
+    def make_backend(self, max_entries):
+        return MemoryBackend(max_entries)
+
+
+class TestFileBackend(BackendTests, unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()  # pylint: disable=R1732
+        self.addCleanup(self.directory.cleanup)
+
+    def make_backend(self, max_entries):
+        return FileBackend(self.directory.name, max_entries)
+
+    def touch(self, backend, key):
+        # Modification times are too coarse to order files written within
+        # the same moment, so the other entries are aged explicitly.
+        for entry in os.scandir(self.directory.name):
+            os.utime(entry.path, (1, 1))
+        backend.get(key)
+
+    def test_values_are_shared_between_instances(self):
+        self.make_backend(4).set("a", {"x": [1]}, expires_at=2e9)
+        self.assertEqual(self.make_backend(4).get("a"), {"x": [1]})
+
+    def test_unreadable_file_is_a_miss(self):
+        backend = self.make_backend(4)
+        backend.set("a", [1], expires_at=2e9)
+        for entry in os.scandir(self.directory.name):
+            with open(entry.path, "w", encoding="utf-8") as f:
+                f.write("{not json")
+        self.assertIsNone(backend.get("a"))
+
+
+class TestResultCache(unittest.TestCase):
+    def test_counts_hits_and_misses(self):
+        cache = ResultCache(MemoryBackend(4), ttl=60)
+
+        self.assertIsNone(cache.get("a"))
+        cache.put("a", [1])
+        self.assertEqual(cache.get("a"), [1])
+        self.assertEqual(cache.get("a"), [1])
+
+        self.assertEqual(cache.stats(), {"hits": 2, "misses": 1, "entries": 1})
+
+    def test_values_expire_after_ttl(self):
+        cache = ResultCache(MemoryBackend(4), ttl=60)
+        with patch("result_cache.time.time", return_value=1000):
+            cache.put("a", [1])
+        with patch("result_cache.time.time", return_value=1060):
+            self.assertIsNone(cache.get("a"))
+
+    def test_without_backend_nothing_is_cached(self):
+        cache = ResultCache(None, ttl=60)
+        cache.put("a", [1])
+        cache.clear()
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.stats(), {"hits": 0, "misses": 1, "entries": 0})
+
+    def test_put_is_dropped_when_cleared_since_generation(self):
+        cache = ResultCache(MemoryBackend(4), ttl=60)
+        generation = cache.generation()
+        cache.clear()
+        cache.put("a", [1], generation)
+        self.assertIsNone(cache.get("a"))
+
+    def test_clear_local_keeps_shared_backend(self):
+        with tempfile.TemporaryDirectory() as directory:
+            shared = ResultCache(FileBackend(directory, 4), ttl=60)
+            shared.put("a", [1])
+            shared.clear_local()
+            self.assertEqual(shared.get("a"), [1])
+
+        local = ResultCache(MemoryBackend(4), ttl=60)
+        local.put("a", [1])
+        local.clear_local()
+        self.assertIsNone(local.get("a"))
+
+
+class TestCacheKey(unittest.TestCase):
+    def test_equal_queries_give_equal_keys(self):
+        self.assertEqual(
+            cache_key("search", {"author": "bob", "year_from": 2000}, 20, 0),
+            cache_key("search", {"year_from": 2000, "author": "bob"}, 20, 0))
+        self.assertNotEqual(
+            cache_key("search", {"author": "bob"}, 20, 0),
+            cache_key("search", {"author": "bob"}, 20, 20))
+        self.assertNotEqual(
+            cache_key("search", {"author": "bob"}, 20, 0),
+            cache_key("count", {"author": "bob"}, 20, 0))
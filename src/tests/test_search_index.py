@@ -0,0 +1,306 @@
+import json
+import threading
+import unittest
+
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+import repositories.citation_repository as repo
+from config import app, db
+from entities.citation import Citation
+from repositories.search_index_repository import _citations_to_index
+from search_index import SearchIndex, word_similarity
+
+# (entry type, citation key, fields) of the citations searched by the tests
+LIBRARY = [
+    ("article", "smith2020", {
+        "author": "John Smith and Jane Doe", "title": "Deep learning for graphs",
+        "journaltitle": "Journal of Graphs", "year": "2020"}),
+    ("book", "doe2018", {
+        "author": "Jane Doe", "title": "Graph theory", "publisher": "Springer",
+        "year": "2018a"}),
+    ("article", "lee", {
+        "author": "Ann Lee", "title": "Learning deep graphs, deep", "year": "in press"}),
+    ("inproceedings", "smyth2019", {
+        "author": "Tom Smyth", "title": "Shallow nets", "booktitle": "Proceedings of Nets",
+        "year": "2019", "pages": "12-20"}),
+    ("misc", "anon1999", {"title": "Anonymous pamphlet", "year": "1999"}),
+    ("book", "smithson2001", {
+        "author": "Ray Smithson", "title": "Graphs and nets", "year": "2001"}),
+]
+
+# Searches as returned by parse_search_queries(), without the defaults
+SEARCHES = [
+    {},
+    {"q": "graphs"},
+    {"q": "deep learning"},
+    {"q": '"deep learning"'},
+    {"q": "graphs -deep"},
+    {"q": "theory or shallow"},
+    {"q": "12"},
+    {"q": "!!!"},
+    {"author": "smith"},
+    {"author": "sm_th"},
+    {"author": "doe", "q": "graphs"},
+    {"citation_key": "20"},
+    {"citation_key": "smith", "sort_by": "citation_key", "direction": "DESC"},
+    {"entry_type": "article"},
+    {"entry_type": "book", "sort_by": "year", "direction": "DESC"},
+    {"entry_type": "thesis"},
+    {"year_from": 2001},
+    {"year_to": 2018},
+    {"year_from": 1999, "year_to": 2019, "sort_by": "year"},
+    {"sort_by": "year"},
+    {"sort_by": "year", "direction": "DESC"},
+    {"sort_by": "citation_key"},
+    {"author": "smith", "fuzzy": True},
+    {"author": "smyth", "fuzzy": True, "sort_by": "citation_key"},
+    {"citation_key": "smithsn", "fuzzy": True},
+]
+
+
+def library_citations():
+    return [Citation(i, entry_type, key, fields)
+            for i, (entry_type, key, fields) in enumerate(LIBRARY, start=1)]
+
+
+def loader(citations):
+    """Returns a loader for SearchIndex.rebuild() and refresh() reading from a list of citations."""
+    def load(ids=None, after=0):
+        if ids is not None:
+            return [c for c in citations if c.id in ids]
+        return [c for c in citations if c.id > after]
+    return load
+
+
+class TestWordSimilarity(unittest.TestCase):
+    def test_matches_pg_trgm(self):
+        # Examples from the pg_trgm documentation
+        self.assertAlmostEqual(word_similarity("word", "two words"), 0.8)
+        self.assertEqual(word_similarity("smith", "John Smith and Jane Doe"), 1.0)
+        self.assertEqual(word_similarity("word", "nothing alike"), 0.0)
+        self.assertEqual(word_similarity("", "two words"), 0.0)
+
+
+class TestSearchIndex(unittest.TestCase):
+    def setUp(self):
+        self.citations = library_citations()
+        self.index = SearchIndex()
+        self.index.rebuild(loader(self.citations))
+
+    def search(self, **queries):
+        return self.index.search(queries)
+
+    def test_refresh_builds_the_index(self):
+        self.assertTrue(self.index.ready)
+        self.assertEqual(len(self.index), len(LIBRARY))
+        self.assertEqual(self.search(), [1, 2, 3, 4, 5, 6])
+
+    def test_full_text_query(self):
+        self.assertEqual(set(self.search(q="graphs")), {1, 3, 6})
+        self.assertEqual(set(self.search(q="deep learning")), {1, 3})
+        self.assertEqual(self.search(q='"deep learning"'), [1])
+        self.assertEqual(self.search(q="graphs -deep"), [6])
+        self.assertEqual(self.search(q="theory or shallow"), [2, 4])
+        self.assertEqual(self.search(q="12"), [4])
+        self.assertEqual(self.search(q="!!!"), [])
+
+    def test_full_text_orders_by_occurrences(self):
+        self.assertEqual(self.search(q="deep"), [3, 1])
+
+    def test_substring_filters(self):
+        self.assertEqual(self.search(author="smith"), [1, 6])
+        self.assertEqual(self.search(author="SM_TH"), [1, 4, 6])
+        self.assertEqual(self.search(author="h a"), [1])
+        self.assertEqual(self.search(citation_key="20"), [1, 2, 4, 6])
+
+    def test_fuzzy_filters_order_by_similarity(self):
+        self.assertEqual(self.search(author="smith", fuzzy=True), [1, 6])
+        self.assertEqual(self.search(citation_key="smithsn", fuzzy=True), [6, 1])
+        self.assertEqual(
+            self.search(author="smyth", fuzzy=True, sort_by="citation_key"), [4])
+
+    def test_year_range(self):
+        self.assertEqual(self.search(year_from=2001), [1, 2, 4, 6])
+        self.assertEqual(self.search(year_to=2018), [2, 5, 6])
+        self.assertEqual(self.search(year_from="x", year_to=""), [1, 2, 3, 4, 5, 6])
+
+    def test_entry_type(self):
+        self.assertEqual(self.search(entry_type="book"), [2, 6])
+        self.assertEqual(self.search(entry_type="book", author="doe"), [2])
+        self.assertEqual(self.search(entry_type="thesis"), [])
+
+    def test_sort_by_year_puts_missing_years_last_or_first(self):
+        self.assertEqual(self.search(sort_by="year"), [5, 6, 2, 4, 1, 3])
+        self.assertEqual(self.search(sort_by="year", direction="DESC"), [3, 1, 4, 2, 6, 5])
+        self.assertEqual(
+            self.search(sort_by="year", direction="DESC", q="graphs"), [3, 1, 6])
+
+    def test_sort_by_citation_key(self):
+        self.assertEqual(self.search(sort_by="citation_key"), [5, 2, 3, 1, 6, 4])
+        self.assertEqual(
+            self.search(sort_by="citation_key", direction="DESC", entry_type="book"), [6, 2])
+
+    def test_limit_and_offset(self):
+        self.assertEqual(self.index.search({"sort_by": "year"}, limit=2, offset=1), [6, 2])
+        self.assertEqual(self.index.search({}, limit=0, offset=-1), [1, 2, 3, 4, 5, 6])
+
+    def test_count(self):
+        self.assertEqual(self.index.count({}), 6)
+        self.assertEqual(self.index.count({"entry_type": "article"}), 2)
+        self.assertEqual(self.index.count({"entry_type": "article", "q": "deep"}), 2)
+        self.assertEqual(self.index.count({"author": "smith", "year_to": 2010}), 1)
+
+    def test_add_replaces_and_remove_drops(self):
+        self.index.add(Citation(6, "article", "ray2001", {"author": "Ray Smithson"}))
+        self.index.add(Citation(7, "book", "new2024", {"title": "New graphs", "year": "2024"}))
+        self.index.remove(1)
+
+        self.assertEqual(self.search(author="smith"), [6])
+        self.assertEqual(self.search(entry_type="book"), [2, 7])
+        self.assertEqual(self.search(entry_type="article"), [3, 6])
+        self.assertEqual(self.search(q="graphs"), [3, 7])
+        self.assertEqual(self.search(sort_by="year", direction="DESC"), [3, 6, 7, 4, 2, 5])
+        self.assertEqual(self.search(author="smith", fuzzy=True), [6])
+
+    def test_invalidated_citations_are_read_again(self):
+        self.citations[0] = Citation(1, "misc", "smith2020", {"title": "Retracted"})
+        del self.citations[1]
+        self.citations.append(Citation(9, "misc", "late", {"title": "Late"}))
+
+        self.index.invalidate([1, 2])
+        self.index.invalidate_new()
+        self.assertFalse(self.index.ready)
+        self.index.refresh(loader(self.citations))
+
+        self.assertTrue(self.index.ready)
+        self.assertEqual(self.search(entry_type="misc"), [1, 5, 9])
+        self.assertEqual(self.search(q="graph"), [])
+        self.assertEqual(self.index.count({}), 6)
+
+        self.index.invalidate()
+        self.assertTrue(self.index.stale)
+        self.index.refresh(loader(self.citations[:2]))
+        self.assertEqual(self.index.count({}), 6)
+        self.index.rebuild(loader(self.citations[:2]))
+        self.assertEqual(self.search(), [1, 3])
+
+    def test_disabled_index_is_never_ready(self):
+        index = SearchIndex(enabled=False)
+        index.add(self.citations[0])
+        index.rebuild(loader(self.citations))
+        self.assertFalse(index.ready)
+        self.assertEqual(len(index), 0)
+
+
+class TestSearchIndexUpdatesWhileReading(unittest.TestCase):
+    def setUp(self):
+        self.citations = library_citations()
+        self.index = SearchIndex()
+
+    def test_rebuild_does_not_block_searches(self):
+        counts = []
+
+        def load(after=0):
+            # Another request searches while the rebuild reads the database.
+            searcher = threading.Thread(target=lambda: counts.append(self.index.count({})))
+            searcher.start()
+            searcher.join(timeout=5)
+            return loader(self.citations)(after=after)
+
+        self.index.rebuild(load)
+
+        self.assertEqual(counts, [0])
+        self.assertTrue(self.index.ready)
+        self.assertEqual(self.index.count({}), 6)
+
+    def test_writes_during_rebuild_are_read_again(self):
+        def load(after=0):
+            self.assertFalse(self.index.ready)
+            self.index.add(Citation(1, "misc", "smith2020", {}))
+            self.index.remove(2)
+            return loader(self.citations)(after=after)
+
+        self.index.rebuild(load)
+        del self.citations[1]
+        self.citations[0] = Citation(1, "misc", "smith2020", {})
+
+        self.assertFalse(self.index.ready)
+        self.index.refresh(loader(self.citations))
+        self.assertTrue(self.index.ready)
+        self.assertEqual(self.index.search({"entry_type": "misc"}), [1, 5])
+        self.assertEqual(self.index.count({}), 5)
+
+    def test_writes_during_refresh_are_kept(self):
+        self.index.rebuild(loader(self.citations))
+        self.index.invalidate([1])
+
+        def load(ids=None, after=0):
+            # The citation is updated by this process after the old version was read.
+            self.index.add(Citation(1, "misc", "smith2020", {}))
+            return loader(self.citations)(ids=ids, after=after)
+
+        self.index.refresh(load)
+
+        self.assertTrue(self.index.ready)
+        self.assertEqual(self.index.search({"entry_type": "misc"}), [1, 5])
+
+    def test_failed_rebuild_leaves_the_index_stale(self):
+        def load(after=0):
+            raise OSError("connection lost")
+
+        with self.assertRaises(OSError):
+            self.index.rebuild(load)
+
+        self.assertTrue(self.index.stale)
+        self.index.rebuild(loader(self.citations))
+        self.assertTrue(self.index.ready)
+
+
+class TestSearchIndexMatchesDatabase(unittest.TestCase):
+    """
+    Runs SEARCHES through the SQL queries and through an index built from
+    the same citations. Needs a database with the schema; the library is
+    replaced inside a transaction that is rolled back.
+    """
+
+    def setUp(self):
+        context = app.app_context()
+        context.push()
+        self.addCleanup(context.pop)
+        try:
+            db.session.execute(text("SELECT 1 FROM citations LIMIT 1"))
+            self.trigrams = db.session.execute(text(
+                "SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")).scalar() is not None
+        except SQLAlchemyError:
+            db.session.rollback()
+            self.skipTest("no database with the schema")
+        self.addCleanup(db.session.rollback)
+
+        db.session.execute(text("DELETE FROM citations"))
+        for entry_type, key, fields in LIBRARY:
+            db.session.execute(text(
+                """
+                INSERT INTO entry_types (name) VALUES (:entry_type) ON CONFLICT DO NOTHING;
+                INSERT INTO citations (entry_type_id, citation_key, fields)
+                SELECT id, :key, :fields FROM entry_types WHERE name = :entry_type
+                """), {"entry_type": entry_type, "key": key, "fields": json.dumps(fields)})
+
+        self.index = SearchIndex()
+        self.index.rebuild(_citations_to_index)
+
+    def test_searches_match_the_database(self):
+        for queries in SEARCHES:
+            if queries.get("fuzzy") and not self.trigrams:
+                continue
+            with self.subTest(queries=queries):
+                rows = repo._search(repo._select_citations(), queries)
+                expected = [row.id for row in rows]
+                found = self.index.search(queries)
+
+                if queries.get("sort_by") or not (queries.get("q") or queries.get("fuzzy")):
+                    self.assertEqual(found, expected)
+                else:
+                    # Relevance is ranked differently, but the matches are the same.
+                    self.assertEqual(set(found), set(expected))
+                self.assertEqual(self.index.count(queries), len(expected))
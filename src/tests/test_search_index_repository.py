@@ -0,0 +1,81 @@
+import unittest
+from unittest.mock import patch
+
+import repositories.search_index_repository as index_repo
+from entities.citation import Citation
+from search_index import SearchIndex
+from suggestions import SuggestionIndex
+
+
+class TestSearchIndexRepository(unittest.TestCase):
+    @patch("repositories.search_index_repository.get_citations")
+    def test_builds_index_from_pages_of_citations(self, mock_get_citations):
+        pages = [
+            [Citation(1, "misc", "a", {"title": "Graphs"}), Citation(2, "misc", "b", {})],
+            [Citation(5, "book", "c", {"title": "Nets"})],
+            [],
+        ]
+        mock_get_citations.side_effect = pages
+        index = SearchIndex()
+
+        with patch.object(index_repo, "library_index", index):
+            index_repo.refresh_search_index().join()
+            self.assertIsNone(index_repo.refresh_search_index())
+
+        self.assertTrue(index.ready)
+        self.assertEqual(index.search({}), [1, 2, 5])
+        self.assertEqual(
+            [c.kwargs["after"] for c in mock_get_citations.call_args_list], [0, 2, 5])
+
+    @patch("repositories.search_index_repository.get_citations_by_ids")
+    @patch("repositories.search_index_repository.get_citations")
+    def test_reads_imported_citations_in_the_background(
+            self, mock_get_citations, mock_get_citations_by_ids):
+        mock_get_citations.side_effect = [
+            [Citation(1, "misc", "a", {})], [],
+            [Citation(2, "misc", "b", {}), Citation(3, "misc", "c", {})], [],
+        ]
+        mock_get_citations_by_ids.return_value = [Citation(1, "book", "a", {})]
+        index = SearchIndex()
+
+        with patch.object(index_repo, "library_index", index):
+            index_repo.refresh_search_index().join()
+
+            index.invalidate_new()
+            index_repo.refresh_search_index().join()
+            self.assertTrue(index.ready)
+            self.assertEqual(index.search({}), [1, 2, 3])
+
+            index.invalidate([1])
+            self.assertIsNone(index_repo.refresh_search_index())
+            self.assertEqual(index.search({"entry_type": "book"}), [1])
+
+    @patch("repositories.search_index_repository.get_citations_by_ids")
+    def test_reads_invalidated_citations_by_id(self, mock_get_citations_by_ids):
+        mock_get_citations_by_ids.return_value = [Citation(2, "book", "b", {})]
+
+        citations = list(index_repo._citations_to_index(ids={2, 3}))
+
+        self.assertEqual([c.id for c in citations], [2])
+        self.assertEqual(sorted(mock_get_citations_by_ids.call_args[0][0]), [2, 3])
+
+    @patch("repositories.search_index_repository.cache_sync.ensure_started")
+    @patch("repositories.search_index_repository.get_citations")
+    def test_suggestion_index_reads_only_suggested_fields(
+            self, mock_get_citations, mock_ensure_started):
+        mock_get_citations.side_effect = [
+            [Citation(1, "article", "a", {"author": "Ann Lee", "journaltitle": "Nets"})], []]
+        index = SuggestionIndex()
+
+        with patch.object(index_repo, "suggestion_index", index):
+            index_repo.refresh_suggestion_index().join()
+
+        mock_ensure_started.assert_called_once_with(index_repo.app)
+        self.assertTrue(index.ready)
+        self.assertEqual(index.suggest("venue", "ne", 10), [("Nets", 1)])
+        self.assertEqual(mock_get_citations.call_args.kwargs["projection"],
+                         ("author", "journaltitle", "booktitle"))
+
+
+if __name__ == "__main__":
+    unittest.main()
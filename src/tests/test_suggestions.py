@@ -0,0 +1,77 @@
+import unittest
+
+from entities.citation import Citation
+from suggestions import SuggestionIndex
+from tests.test_search_index import library_citations, loader
+
+
+class TestSuggestionIndex(unittest.TestCase):
+    def setUp(self):
+        self.citations = library_citations()
+        self.index = SuggestionIndex()
+        self.index.rebuild(loader(self.citations))
+
+    def suggest(self, kind, prefix, limit=10):
+        return [value for value, _count in self.index.suggest(kind, prefix, limit)]
+
+    def test_authors_match_at_any_word(self):
+        self.assertEqual(self.suggest("author", "smi"), ["John Smith", "Ray Smithson"])
+        self.assertEqual(self.suggest("author", "JANE"), ["Jane Doe"])
+        self.assertEqual(self.suggest("author", "jane  d"), ["Jane Doe"])
+        self.assertEqual(self.suggest("author", "and"), [])
+
+    def test_counts_citations_per_value(self):
+        self.assertEqual(self.index.suggest("author", "doe", 10), [("Jane Doe", 2)])
+
+    def test_citation_keys_match_at_start(self):
+        self.assertEqual(self.suggest("citation_key", "smi"), ["smith2020", "smithson2001"])
+        self.assertEqual(self.suggest("citation_key", "2020"), [])
+
+    def test_venues_are_journal_and_book_titles(self):
+        self.assertEqual(self.suggest("venue", "nets"), ["Proceedings of Nets"])
+        self.assertEqual(self.suggest("venue", "j"), ["Journal of Graphs"])
+        self.assertEqual(self.suggest("venue", "of"),
+                         ["Journal of Graphs", "Proceedings of Nets"])
+
+    def test_limit_bounds_the_suggestions(self):
+        self.assertEqual(self.suggest("citation_key", "s", limit=2), ["smith2020", "smithson2001"])
+        self.assertEqual(self.suggest("citation_key", "s", limit=0), [])
+        self.assertEqual(self.suggest("citation_key", "  "), [])
+
+    def test_values_are_dropped_with_their_last_citation(self):
+        self.index.remove(2)
+        self.assertEqual(self.index.suggest("author", "doe", 10), [("Jane Doe", 1)])
+        self.index.remove(1)
+        self.assertEqual(self.suggest("author", "doe"), [])
+        self.assertEqual(self.suggest("venue", "journal"), [])
+
+    def test_add_replaces_the_values_of_a_citation(self):
+        self.index.add(Citation(4, "article", "smyth2019", {
+            "author": "Tom Smyth", "journaltitle": "Shallow Nets Quarterly"}))
+        self.index.add(Citation(7, "book", "new2024", {"author": "Ann Lee and Al Ng"}))
+
+        self.assertEqual(self.suggest("venue", "nets"), ["Shallow Nets Quarterly"])
+        self.assertEqual(self.suggest("venue", "proc"), [])
+        self.assertEqual(self.index.suggest("author", "lee", 10), [("Ann Lee", 2)])
+        self.assertEqual(self.suggest("citation_key", "new"), ["new2024"])
+
+    def test_writes_before_the_first_build_are_ignored(self):
+        index = SuggestionIndex()
+        index.add(self.citations[0])
+        self.assertEqual(len(index), 0)
+        self.assertFalse(index.ready)
+
+    def test_invalidated_citations_are_read_again(self):
+        self.citations[0] = Citation(1, "misc", "smith2020", {"author": "Jo Smith"})
+        self.citations.append(Citation(9, "misc", "late", {"booktitle": "Late Proceedings"}))
+
+        self.index.invalidate([1])
+        self.index.invalidate_new()
+        self.index.refresh(loader(self.citations))
+
+        self.assertEqual(self.suggest("author", "smith"), ["Jo Smith", "Ray Smithson"])
+        self.assertEqual(self.suggest("venue", "proc"), ["Late Proceedings", "Proceedings of Nets"])
+
+
+if __name__ == "__main__":
+    unittest.main()
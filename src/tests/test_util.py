@@ -107,6 +107,12 @@ class TestUtil(unittest.TestCase):
         self.assertEqual(parsed["author"], "")
         self.assertEqual(parsed["q"], "")
 
+    def test_parse_search_queries_fuzzy_flag(self):
+        self.assertFalse(util.parse_search_queries({})["fuzzy"])
+        self.assertTrue(util.parse_search_queries({"fuzzy": "1"})["fuzzy"])
+        self.assertTrue(util.parse_search_queries({"fuzzy": " On "})["fuzzy"])
+        self.assertFalse(util.parse_search_queries({"fuzzy": "no"})["fuzzy"])
+
     def test_parse_search_queries_handles_str_exception_in_year(self):
         class BadStr:
             def __str__(self):
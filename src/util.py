@@ -69,6 +69,7 @@ def parse_search_queries(args):
     - uppercases `direction` and validates it to either 'ASC' or 'DESC'
     - parses `year_from` and `year_to` to ints when possible, otherwise None
     - restricts `sort_by` to a small whitelist (None if not allowed)
+    - parses `fuzzy` to a bool from common checkbox/flag values
 
     Returns a dict with the same keys the rest of the app expects.
     """
@@ -109,4 +110,5 @@ def parse_search_queries(args):
         "year_to": _int_or_none(args.get("year_to")),
         "sort_by": sort_by,
         "direction": direction,
+        "fuzzy": _str_lower("fuzzy") in ("1", "true", "on", "yes"),
     }